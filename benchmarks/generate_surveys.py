@@ -0,0 +1,152 @@
+"""Synthetic student and instructor survey workbooks for benchmarking.
+
+    python benchmarks/generate_surveys.py --students 10000 --instructors 300 -o /tmp/surveys
+
+Writes students.xlsx and instructors.xlsx shaped like the real survey
+exports: an ID and Name column, one "Day start-end" column per class
+period, a Building column and a few free-text questions.  Some periods
+are more popular than others, so demand is uneven the way it is in
+practice.  The same seed always gives the same workbooks.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler_core import TEACH_WITH_COLUMN, format_minutes  # noqa: E402
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+FIRST_START = 8 * 60       # Periods start from 8:00am ...
+START_STEP = 30            # ... every half hour ...
+STARTS_PER_DAY = 24        # ... until 7:30pm
+LENGTHS = [60, 90, 120]    # And last one, one and a half or two hours
+MAX_PERIODS = len(DAYS) * STARTS_PER_DAY * len(LENGTHS)
+
+# Share of each answer in an average period's column; blank is the rest
+STUDENT_ANSWERS = {"First Choice": 0.10, "Fits": 0.20, "Does Not Fit": 0.30}
+INSTRUCTOR_ANSWERS = {"First Choice": 0.15, "Fits": 0.35, "Does Not Fit": 0.30}
+
+QUESTIONS = {
+    "Grade": ["6", "7", "8", "9", "10", "11", "12"],
+    "Parent Contact": ["Email", "Phone", "Text", None],
+    "Notes": [None, None, None, "Needs a ride", "Has a sibling in the program", "Prefers afternoons"],
+}
+
+
+def class_periods(count):
+    """count distinct "Day start-end" headers, spread over the week and overlapping within a day."""
+    if count > MAX_PERIODS:
+        raise ValueError(f"At most {MAX_PERIODS} class periods can be generated")
+    headers = []
+    for k in range(count):
+        day = DAYS[k % len(DAYS)]
+        position = k // len(DAYS)
+        start = FIRST_START + START_STEP * (position % STARTS_PER_DAY)
+        length = LENGTHS[position // STARTS_PER_DAY]
+        headers.append(f"{day} {format_minutes(start)}-{format_minutes(start + length)}")
+    return headers
+
+
+def building_names(count):
+    return [f"Building {chr(ord('A') + k)}" if k < 26 else f"Building {k + 1}" for k in range(count)]
+
+
+def _answers(rng, rows, shares, popularity):
+    # One column of answers; "wanting" answers scale with the period's popularity
+    wanting = {answer: share * popularity for answer, share in shares.items() if answer != "Does Not Fit"}
+    scale = min(1.0, 0.95 / max(sum(wanting.values()), 1e-9))
+    probabilities = {answer: share * scale for answer, share in wanting.items()}
+    probabilities["Does Not Fit"] = min(shares.get("Does Not Fit", 0.0), 1.0 - sum(probabilities.values()))
+    labels = list(probabilities) + [None]
+    weights = list(probabilities.values()) + [max(0.0, 1.0 - sum(probabilities.values()))]
+    return rng.choice(np.array(labels, dtype=object), size=rows, p=weights)
+
+
+def _popularity(rng, count):
+    # Mean 1; a few periods draw two or three times the average demand
+    values = rng.gamma(4.0, 0.25, size=count)
+    return values / values.mean()
+
+
+def make_students(count, periods, buildings=3, answers=None, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {"ID": np.arange(100000, 100000 + count), "Name": [f"Student {k}" for k in range(count)]}
+    if buildings:
+        data["Building"] = rng.choice(np.array(building_names(buildings), dtype=object), size=count)
+    for header, popularity in zip(periods, _popularity(rng, len(periods))):
+        data[header] = _answers(rng, count, answers or STUDENT_ANSWERS, popularity)
+    for question, choices in QUESTIONS.items():
+        data[question] = rng.choice(np.array(choices, dtype=object), size=count)
+    return pd.DataFrame(data)
+
+
+def make_instructors(count, periods, buildings=3, answers=None, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    data = {"ID": [f"T{k:04d}" for k in range(count)], "Name": [f"Instructor {k}" for k in range(count)]}
+    if buildings:
+        data["Building"] = rng.choice(np.array(building_names(buildings), dtype=object), size=count)
+    data[TEACH_WITH_COLUMN] = rng.choice(np.array(["Yes", "No", "No Preference", None], dtype=object),
+                                         size=count, p=[0.4, 0.2, 0.3, 0.1])
+    for header in periods:
+        data[header] = _answers(rng, count, answers or INSTRUCTOR_ANSWERS, 1.0)
+    return pd.DataFrame(data)
+
+
+def parse_answers(text):
+    """Parse "First Choice=0.1, Fits=0.2, Does Not Fit=0.3" into answer shares."""
+    shares = {}
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        answer, _, value = part.partition("=")
+        answer = answer.strip()
+        if answer not in STUDENT_ANSWERS:
+            raise argparse.ArgumentTypeError(f"Unknown answer: {answer}")
+        shares[answer] = float(value)
+    if sum(shares.values()) > 1:
+        raise argparse.ArgumentTypeError("Answer shares add up to more than 1")
+    return shares
+
+
+def write_surveys(directory, students=1000, instructors=60, periods=25, buildings=3,
+                  student_answers=None, seed=0):
+    """Write students.xlsx and instructors.xlsx into directory; returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    headers = class_periods(periods)
+    student_file = os.path.join(directory, "students.xlsx")
+    instructor_file = os.path.join(directory, "instructors.xlsx")
+    make_students(students, headers, buildings, student_answers, seed).to_excel(student_file, index=False)
+    make_instructors(instructors, headers, buildings, seed=seed).to_excel(instructor_file, index=False)
+    return student_file, instructor_file
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Write synthetic survey workbooks for benchmarking.")
+    parser.add_argument("-o", "--output", default=".", help="Directory to write the workbooks to")
+    parser.add_argument("--students", type=int, default=1000, help="Number of students")
+    parser.add_argument("--instructors", type=int, default=60, help="Number of instructors")
+    parser.add_argument("--periods", type=int, default=25, help=f"Class periods (at most {MAX_PERIODS})")
+    parser.add_argument("--buildings", type=int, default=3, help="Buildings (0 leaves out the column)")
+    parser.add_argument("--answers", type=parse_answers,
+                        help='Student answer shares in an average period, e.g. "First Choice=0.1,Fits=0.2,'
+                             'Does Not Fit=0.3" (the rest are blank)')
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    answers = dict(STUDENT_ANSWERS, **args.answers) if args.answers else None
+    for filename in write_surveys(args.output, args.students, args.instructors, args.periods,
+                                  args.buildings, answers, args.seed):
+        print(f"Wrote {filename}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
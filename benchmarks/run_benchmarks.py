@@ -0,0 +1,148 @@
+"""Time each stage of an import-schedule-export run on synthetic surveys.
+
+    python benchmarks/run_benchmarks.py --students 1000 10000 -o results.json
+
+For every student count, generates the survey workbooks (see
+generate_surveys.py) and times, separately:
+
+- read_students / read_instructors: pd.read_excel of each workbook
+- load_students / load_instructors: encoding them, as process_student_data does
+- count_candidates: the per-period counts behind the Classes table
+- generate: the selected solver, with the given settings
+- export: writing the schedule workbook
+
+Each stage is run --repeat times; the JSON result keeps every timing plus
+the best and the median, with the settings, the schedule summary and the
+library versions, so files from different releases can be compared.
+Only the Qt-free core is imported, so it runs on machines without a display.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generate_surveys import write_surveys  # noqa: E402
+from schedule_export import export_schedule  # noqa: E402
+from scheduler_core import DEFAULT_SETTINGS, SOLVERS, Scheduler  # noqa: E402
+
+STAGES = ["read_students", "read_instructors", "load_students", "load_instructors",
+          "count_candidates", "generate", "export"]
+
+
+def _revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_once(student_file, instructor_file, settings, export_file):
+    """One pass through every stage; returns ({stage: seconds}, scheduler)."""
+    timings = {}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    scheduler = Scheduler(settings)
+    students = timed("read_students", pd.read_excel, student_file)
+    instructors = timed("read_instructors", pd.read_excel, instructor_file)
+    timed("load_students", scheduler.load_students, students)
+    timed("load_instructors", scheduler.load_instructors, instructors)
+    timed("count_candidates", lambda: [scheduler.candidate_counts(class_name) for class_name in scheduler.classes])
+    timed("generate", scheduler.generate)
+    timed("export", export_schedule, export_file, scheduler.schedule, scheduler.students)
+    return timings, scheduler
+
+
+def benchmark(students, args, settings, directory):
+    student_file, instructor_file = write_surveys(
+        os.path.join(directory, f"surveys-{students}"), students, args.instructors or max(10, students // 30),
+        args.periods, args.buildings, seed=args.seed)
+    export_file = os.path.join(directory, f"schedule-{students}.xlsx")
+
+    runs = []
+    for repeat in range(args.repeat):
+        timings, scheduler = run_once(student_file, instructor_file, settings, export_file)
+        runs.append(timings)
+        print(f"{students} students, run {repeat + 1}: "
+              + ", ".join(f"{stage} {timings[stage]:.3f}s" for stage in STAGES), file=sys.stderr)
+
+    stages = {}
+    for stage in STAGES:
+        values = [timings[stage] for timings in runs]
+        stages[stage] = {"best": min(values), "median": statistics.median(values), "runs": values}
+    return {
+        "students": students,
+        "instructors": len(scheduler.instructors),
+        "periods": len(scheduler.classes),
+        "buildings": args.buildings,
+        "stages": stages,
+        "total": sum(stages[stage]["best"] for stage in STAGES),
+        "rows_per_second": students / stages["load_students"]["best"] if stages["load_students"]["best"] else None,
+        "summary": scheduler.summary(),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler on synthetic survey workbooks.")
+    parser.add_argument("--students", type=int, nargs="+", default=[1000, 10000],
+                        help="Student counts to benchmark (default: 1000 10000)")
+    parser.add_argument("--instructors", type=int, help="Instructor count (default: one per 30 students)")
+    parser.add_argument("--periods", type=int, default=25, help="Class periods")
+    parser.add_argument("--buildings", type=int, default=3, help="Buildings (0 leaves out the column)")
+    parser.add_argument("--solver", choices=list(SOLVERS), default=DEFAULT_SETTINGS["solver"],
+                        help="Scheduling algorithm")
+    parser.add_argument("--partition-by-building", action=argparse.BooleanOptionalAction,
+                        default=DEFAULT_SETTINGS["partition_by_building"],
+                        help="Schedule each building on its own, in parallel")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per student count")
+    parser.add_argument("--seed", type=int, default=0, help="Survey generator seed")
+    parser.add_argument("--workdir", help="Where to write the workbooks (default: a temporary directory)")
+    parser.add_argument("-o", "--output", default="benchmark-results.json", help="JSON file to write")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    settings = dict(DEFAULT_SETTINGS, solver=args.solver, partition_by_building=args.partition_by_building)
+
+    with tempfile.TemporaryDirectory(prefix="pyra-bench-") as scratch:
+        directory = args.workdir or scratch
+        results = [benchmark(students, args, settings, directory) for students in args.students]
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": _revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"pandas": pd.__version__, "numpy": np.__version__},
+        "settings": settings,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,250 @@
 import sys
 import os
 import pandas as pd
+from collections import deque
 from datetime import datetime
-import re
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QPushButton, QFileDialog, 
-                            QTabWidget, QTableWidget, QTableWidgetItem, 
+                            QTabWidget, QTableWidget, QTableWidgetItem, QTableView,
                             QHeaderView, QMessageBox, QComboBox, QSpinBox,
                             QFormLayout, QLineEdit, QGroupBox, QTextEdit,
                             QProgressBar, QSplitter, QFrame, QStackedWidget)
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import (Qt, QSize, QObject, QRunnable, QThreadPool, pyqtSignal,
+                          QAbstractTableModel, QModelIndex, QSortFilterProxyModel)
 from PyQt5.QtGui import QIcon, QFont, QColor
 
-class Student:
-    def __init__(self, student_id, data):
-        self.id = student_id
-        self.data = data
-        self.classes = {}  # Dictionary to store class preferences
-        self.building = "N/A"
-        
-        # Process data to extract and clean data #
-        for column, value in data.items():
-            # Class data (extract)
-            if re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', column):
-                self.classes[column] = value if pd.notna(value) else ""
-            # Building assignment (clean)
-            elif re.match(r'^Building', column):
-                self.building = data.get(column)
+from import_cache import ImportCache
+from instrumentation import OperationStats
+from schedule_export import export_schedule
+from scheduler_core import (Cancelled, Scheduler, SOLVERS, compare_schedules, parse_answer_synonyms,
+                            parse_setting_range)
 
-class Instructor:
-    def __init__(self, instructor_id, data):
-        self.id = instructor_id
-        self.data = data
-        self.classes = {}  # Dictionary to store class availability
-        self.teach_with_preference = "No Preference"
-        
-        # Process data to extract class availability and preferences
-        for column, value in data.items():
-            if re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', column):
-                self.classes[column] = value if pd.notna(value) else ""
-            elif column == "Would you like to teach with someone else?":
-                self.teach_with_preference = value if pd.notna(value) else "No Preference"
+class WorkerSignals(QObject):
+    progress = pyqtSignal(str, int, int)  # stage, done, total (0 when unknown)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
 
-class ClassPeriod:
-    def __init__(self, name):
-        self.name = name
-        self.students = []
-        self.instructors = []
-        self.day = name.split()[0] if " " in name else ""
-        
-        # Extract time from format "Day HH:MMam/pm-HH:MMam/pm"
-        #TODO: ensure 1PM-3PM == 1:00pm - 3:00pm
-        time_pattern = r'(\d+)(:\d+)((?:am|pm))-(\d+)(:\d+)((?:am|pm))'
-        time_match = re.search(time_pattern, name)
-        
-        if time_match:
-            print(time_match.group(2))
-            self.start_time = time_match.group(1) + time_match.group(2) + time_match.group(3)
-            self.end_time =   time_match.group(4) + time_match.group(5) + time_match.group(6)
+class Worker(QRunnable):
+    """Runs fn(progress) on the thread pool and reports back through queued signals."""
 
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = WorkerSignals()
+        self.cancel_requested = False
+    
+    def progress(self, stage, done, total):
+        # Called from the worker thread; this is where cancellation takes effect
+        if self.cancel_requested:
+            raise Cancelled()
+        self.signals.progress.emit(stage, done, total)
+    
+    def run(self):
+        try:
+            result = self.fn(self.progress)
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
         else:
-            self.start_time = ""
-            self.end_time = ""
+            self.signals.finished.emit(result)
+
+SORT_ROLE = Qt.UserRole + 1  # Raw values so numeric columns sort as numbers
+
+class RowTableModel(QAbstractTableModel):
+    """Read-only table over a list of row keys.
+    
+    Cells are computed on demand from the scheduler data, so only the rows
+    the view actually paints (or the proxy sorts/filters) are ever touched.
+    Subclasses provide headers, row_keys() and value(key, column), and
+    field_columns when a change to some fields only affects some columns.
+    """
+    headers = []
+    field_columns = {}  # ChangeEvent field -> the columns showing it; unlisted fields affect every column
+    
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.keys = []
+        self.rows = {}  # Key -> row
+    
+    def refresh(self):
+        self.beginResetModel()
+        self.keys = self.row_keys()
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.endResetModel()
+    
+    def apply_change(self, event):
+        """Insert, remove and repaint just the rows a ChangeEvent names."""
+        if event.reset:
+            self.refresh()
+            return
         
-        self.name = self.day + self.start_time + self.end_time #TODO: make faster
+        # Removed rows go in runs from the bottom up, so earlier rows keep their numbers
+        removed = sorted((self.rows[key] for key in event.removed if key in self.rows), reverse=True)
+        if removed:
+            runs = []
+            for row in removed:
+                if runs and runs[-1][0] == row + 1:
+                    runs[-1][0] = row
+                else:
+                    runs.append([row, row])
+            for first, last in runs:
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self.keys[first:last + 1]
+                self.endRemoveRows()
+            self.rows = {key: row for row, key in enumerate(self.keys)}
+        
+        # Added rows go where row_keys() has them (e.g. a repair's new section
+        # next to its period): after the nearest earlier key already shown
+        added = {key for key in event.added if key not in self.rows}
+        if added:
+            inserts = {}  # Row to insert before -> keys
+            row = 0
+            for key in self.row_keys():
+                if key in self.rows:
+                    row = self.rows[key] + 1
+                elif key in added:
+                    inserts.setdefault(row, []).append(key)
+            # From the bottom up, so the rows above keep their numbers
+            for row, keys in sorted(inserts.items(), reverse=True):
+                self.beginInsertRows(QModelIndex(), row, row + len(keys) - 1)
+                self.keys[row:row] = keys
+                self.endInsertRows()
+            self.rows = {key: row for row, key in enumerate(self.keys)}
+        
+        rows = sorted(self.rows[key] for key in event.changed if key in self.rows)
+        if not rows:
+            return
+        columns = self.changed_columns(event.fields)
+        if len(rows) > len(self.keys) // 2:
+            rows = [(rows[0], rows[-1])]  # One signal for the lot is cheaper than one per row
+        else:
+            rows = [(row, row) for row in rows]
+        for first, last in rows:
+            self.dataChanged.emit(self.index(first, columns[0]), self.index(last, columns[-1]))
+    
+    def changed_columns(self, fields):
+        if fields is None or any(field not in self.field_columns for field in fields):
+            return list(range(len(self.headers)))
+        return sorted({column for field in fields for column in self.field_columns[field]})
+    
+    def row_keys(self):
+        return []
+    
+    def value(self, key, column):
+        return ""
+    
+    def foreground(self, key, column):
+        return None
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.keys)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.keys[index.row()]
+        if role == Qt.DisplayRole:
+            return str(self.value(key, index.column()))
+        if role == SORT_ROLE:
+            return self.value(key, index.column())
+        if role == Qt.ForegroundRole:
+            return self.foreground(key, index.column())
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+class StudentsTableModel(RowTableModel):
+    headers = ["Student ID", "Building", "Data Points", "Classes"]
+    
+    def row_keys(self):
+        return list(self.scheduler.students)
+    
+    def value(self, key, column):
+        student = self.scheduler.students[key]
+        if column == 0:
+            return key
+        if column == 1:
+            return str(student.building)
+        if column == 2:
+            return student.data_points
+        return ", ".join([f"{class_name}: {preference}" 
+                          for class_name, preference in student.classes.items() 
+                          if preference])
+
+class InstructorsTableModel(RowTableModel):
+    headers = ["Instructor ID", "Teach with Others", "Class Limit", "Available Classes"]
+    
+    def row_keys(self):
+        return list(self.scheduler.instructors)
+    
+    def value(self, key, column):
+        instructor = self.scheduler.instructors[key]
+        if column == 0:
+            return key
+        if column == 1:
+            return str(instructor.teach_with_preference)
+        if column == 2:
+            # Blank when the global Maximum Classes per Instructor setting applies
+            return "" if instructor.class_limit is None else instructor.class_limit
+        return ", ".join(instructor.available_classes)
+
+class ClassesTableModel(RowTableModel):
+    headers = ["Class Name", "Students", "Instructors", "Status"]
+    field_columns = {"students": [1, 3], "instructors": [2, 3]}
+    
+    def row_keys(self):
+        return list(self.scheduler.classes)
+    
+    def value(self, key, column):
+        if column == 0:
+            return key
+        if column == 3:
+            return "Ready" if self.scheduler.is_ready(key) else "Not Ready"
+        # Potential students (First Choice or Fits) and potential instructors
+        return self.scheduler.candidate_counts(key)[column - 1]
+    
+    def foreground(self, key, column):
+        if column == 3:
+            return QColor("green" if self.scheduler.is_ready(key) else "red")
+        return None
+
+class RoomsTableModel(RowTableModel):
+    headers = ["Room", "Capacity", "Building"]
+    
+    def row_keys(self):
+        return list(range(len(self.scheduler.rooms)))
+    
+    def value(self, key, column):
+        room = self.scheduler.rooms[key]
+        return [room.name, room.capacity, room.building][column]
+
+class ScheduleTableModel(RowTableModel):
+    headers = ["Class Time", "Instructors", "Students", "Room", "Status"]
+    
+    def row_keys(self):
+        # The scheduled classes themselves, so rows survive sections opening or closing
+        return list(self.scheduler.schedule)
+    
+    def value(self, scheduled, column):
+        if column == 0:
+            return scheduled.title
+        if column == 1:
+            return ", ".join(scheduled.instructor_ids)
+        if column == 2:
+            return f"{len(scheduled.student_ids)} students"
+        if column == 3:
+            return scheduled.room
+        return scheduled.status
 
 class ClassSchedulerApp(QMainWindow):
     def __init__(self):
@@ -71,18 +252,28 @@ class ClassSchedulerApp(QMainWindow):
         self.setWindowTitle("Class Scheduler")
         self.setMinimumSize(1200, 800)
         
-        # Application data
-        self.students = {}
-        self.instructors = {}
-        self.classes = {}
+        # Application data and settings live in the Qt-free scheduling core
+        self.scheduler = Scheduler()
+        self.settings = self.scheduler.settings
+        
+        # Changes to the data queue up here (possibly from a worker thread) and
+        # are shown by apply_changes() once the operation making them is done
+        self.pending_changes = deque()
+        self.scheduler.subscribe(self.pending_changes.append)
+        
+        # Parsed workbooks are cached on disk by content hash
+        self.import_cache = ImportCache()
+        
+        # Long running operations run one at a time on the thread pool
+        self.thread_pool = QThreadPool()
+        self.current_worker = None  # Kept until the next job so queued signals still arrive
+        self.busy = False
         
-        # Settings with defaults
-        self.settings = {
-            "max_students_per_class": 20,
-            "max_instructors_per_class": 2,
-            "min_students_per_class": 6,
-            "prioritize_first_choice": True
-        }
+        # Diagnostics: every background operation is timed (see log_operation_stats);
+        # peak memory tracing slows operations down several times, so it is opt-in
+        self.operation_stats = None
+        self.trace_memory = False
+        self.profile_path = None  # Set to profile the next operation only
         
         # Setup UI
         self.setup_ui()
@@ -103,10 +294,22 @@ class ClassSchedulerApp(QMainWindow):
         self.create_students_tab()
         self.create_instructors_tab()
         self.create_classes_tab()
+        self.create_rooms_tab()
         self.create_schedule_tab()
         self.create_settings_tab()
+        self.create_sweep_tab()
         
-        # Status bar
+        # Status bar with progress of background operations
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(250)
+        self.progress_bar.hide()
+        
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_background)
+        self.cancel_btn.hide()
+        
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.cancel_btn)
         self.statusBar().showMessage("Ready")
     
     def create_dashboard_tab(self):
@@ -124,14 +327,15 @@ class ClassSchedulerApp(QMainWindow):
         stats_frame.setFrameShape(QFrame.StyledPanel)
         stats_layout = QHBoxLayout(stats_frame)
         
-        # Statistics boxes
+        # Statistics boxes, one per scheduler collection
         stats_boxes = [
-            {"title": "Students", "value": "0", "id": "students_count"},
-            {"title": "Instructors", "value": "0", "id": "instructors_count"},
-            {"title": "Classes", "value": "0", "id": "classes_count"},
-            {"title": "Scheduled Classes", "value": "0", "id": "scheduled_count"}
+            {"title": "Students", "value": "0", "id": "students_count", "entity": "students"},
+            {"title": "Instructors", "value": "0", "id": "instructors_count", "entity": "instructors"},
+            {"title": "Classes", "value": "0", "id": "classes_count", "entity": "classes"},
+            {"title": "Scheduled Classes", "value": "0", "id": "scheduled_count", "entity": "schedule"}
         ]
         
+        self.stats_labels = {}  # Entity -> its count label
         for box in stats_boxes:
             group_box = QGroupBox(box["title"])
             box_layout = QVBoxLayout(group_box)
@@ -140,6 +344,7 @@ class ClassSchedulerApp(QMainWindow):
             value_label.setAlignment(Qt.AlignCenter)
             value_label.setFont(QFont("Arial", 24))
             value_label.setObjectName(box["id"])
+            self.stats_labels[box["entity"]] = value_label
             
             box_layout.addWidget(value_label)
             stats_layout.addWidget(group_box)
@@ -193,17 +398,24 @@ class ClassSchedulerApp(QMainWindow):
         import_btn = QPushButton("Import Students")
         import_btn.clicked.connect(self.import_students)
         
+        reimport_btn = QPushButton("Re-import Changes")
+        reimport_btn.clicked.connect(self.reimport_students)
+        
         clear_btn = QPushButton("Clear Students")
         clear_btn.clicked.connect(self.clear_students)
         
+        remove_btn = QPushButton("Remove Selected")
+        remove_btn.clicked.connect(self.remove_selected_students)
+        
         controls_layout.addWidget(import_btn)
+        controls_layout.addWidget(reimport_btn)
         controls_layout.addWidget(clear_btn)
+        controls_layout.addWidget(remove_btn)
         controls_layout.addStretch()
         
-        # Table for students
-        self.students_table = QTableWidget(0, 4)  # Start with 4 columns
-        self.students_table.setHorizontalHeaderLabels(["Student ID", "Building", "Data Points", "Classes"])
-        self.students_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Table for students, backed by a model over the scheduler data
+        self.students_table_model = StudentsTableModel(self.scheduler, self)
+        self.students_table = self.create_table_view(self.students_table_model, controls_layout)
         
         layout.addLayout(controls_layout)
         layout.addWidget(self.students_table)
@@ -221,18 +433,24 @@ class ClassSchedulerApp(QMainWindow):
         import_btn = QPushButton("Import Instructors")
         import_btn.clicked.connect(self.import_instructors)
         
+        reimport_btn = QPushButton("Re-import Changes")
+        reimport_btn.clicked.connect(self.reimport_instructors)
+        
         clear_btn = QPushButton("Clear Instructors")
         clear_btn.clicked.connect(self.clear_instructors)
         
+        remove_btn = QPushButton("Remove Selected")
+        remove_btn.clicked.connect(self.remove_selected_instructors)
+        
         controls_layout.addWidget(import_btn)
+        controls_layout.addWidget(reimport_btn)
         controls_layout.addWidget(clear_btn)
+        controls_layout.addWidget(remove_btn)
         controls_layout.addStretch()
         
-        # Table for instructors
-        self.instructors_table = QTableWidget(0, 3)  # Start with 3 columns
-        self.instructors_table.setHorizontalHeaderLabels(
-            ["Instructor ID", "Teach with Others", "Available Classes"])
-        self.instructors_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Table for instructors, backed by a model over the scheduler data
+        self.instructors_table_model = InstructorsTableModel(self.scheduler, self)
+        self.instructors_table = self.create_table_view(self.instructors_table_model, controls_layout)
         
         layout.addLayout(controls_layout)
         layout.addWidget(self.instructors_table)
@@ -257,11 +475,9 @@ class ClassSchedulerApp(QMainWindow):
         controls_layout.addWidget(clear_classes_btn)
         controls_layout.addStretch()
         
-        # Table for classes
-        self.classes_table = QTableWidget(0, 4)
-        self.classes_table.setHorizontalHeaderLabels(
-            ["Class Name", "Students", "Instructors", "Status"])
-        self.classes_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Table for classes, backed by a model over the scheduler data
+        self.classes_table_model = ClassesTableModel(self.scheduler, self)
+        self.classes_table = self.create_table_view(self.classes_table_model, controls_layout)
         
         layout.addLayout(controls_layout)
         layout.addWidget(self.classes_table)
@@ -269,6 +485,33 @@ class ClassSchedulerApp(QMainWindow):
         # Add tab
         self.tabs.addTab(classes_widget, "Classes")
     
+    def create_rooms_tab(self):
+        rooms_widget = QWidget()
+        layout = QVBoxLayout(rooms_widget)
+        
+        # Controls
+        controls_layout = QHBoxLayout()
+        
+        import_btn = QPushButton("Import Rooms")
+        import_btn.clicked.connect(self.import_rooms)
+        
+        clear_btn = QPushButton("Clear Rooms")
+        clear_btn.clicked.connect(self.clear_rooms)
+        
+        controls_layout.addWidget(import_btn)
+        controls_layout.addWidget(clear_btn)
+        controls_layout.addStretch()
+        
+        # Table for rooms, backed by a model over the room inventory
+        self.rooms_table_model = RoomsTableModel(self.scheduler, self)
+        self.rooms_table = self.create_table_view(self.rooms_table_model, controls_layout)
+        
+        layout.addLayout(controls_layout)
+        layout.addWidget(self.rooms_table)
+        
+        # Add tab
+        self.tabs.addTab(rooms_widget, "Rooms")
+    
     def create_schedule_tab(self):
         schedule_widget = QWidget()
         layout = QVBoxLayout(schedule_widget)
@@ -286,11 +529,9 @@ class ClassSchedulerApp(QMainWindow):
         controls_layout.addWidget(export_btn)
         controls_layout.addStretch()
         
-        # Schedule view
-        self.schedule_table = QTableWidget(0, 5)
-        self.schedule_table.setHorizontalHeaderLabels(
-            ["Class Time", "Instructors", "Students", "Room", "Status"])
-        self.schedule_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Schedule view, backed by a model over the generated schedule
+        self.schedule_table_model = ScheduleTableModel(self.scheduler, self)
+        self.schedule_table = self.create_table_view(self.schedule_table_model, controls_layout)
         
         layout.addLayout(controls_layout)
         layout.addWidget(self.schedule_table)
@@ -298,6 +539,29 @@ class ClassSchedulerApp(QMainWindow):
         # Add tab
         self.tabs.addTab(schedule_widget, "Schedule")
     
+    def create_table_view(self, model, controls_layout):
+        # Sorting and filtering go through a proxy; the model itself is never copied
+        proxy = QSortFilterProxyModel(self)
+        proxy.setSourceModel(model)
+        proxy.setSortRole(SORT_ROLE)
+        proxy.setFilterKeyColumn(-1)
+        proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        
+        filter_edit = QLineEdit()
+        filter_edit.setPlaceholderText("Filter...")
+        filter_edit.setClearButtonEnabled(True)
+        filter_edit.textChanged.connect(proxy.setFilterFixedString)
+        controls_layout.addWidget(filter_edit)
+        
+        view = QTableView()
+        view.setModel(proxy)
+        view.setSortingEnabled(True)
+        view.sortByColumn(-1, Qt.AscendingOrder)  # Keep import order until a header is clicked
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Fixed row heights so the view never measures rows it does not paint
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        return view
+    
     def create_settings_tab(self):
         settings_widget = QWidget()
         layout = QFormLayout(settings_widget)
@@ -327,20 +591,243 @@ class ClassSchedulerApp(QMainWindow):
         self.prioritize_combo.currentTextChanged.connect(
             lambda text: self.update_setting("prioritize_first_choice", text == "Yes"))
         
+        self.max_classes_spinbox = QSpinBox()
+        self.max_classes_spinbox.setRange(1, 20)
+        self.max_classes_spinbox.setValue(self.settings["max_classes_per_student"])
+        self.max_classes_spinbox.valueChanged.connect(
+            lambda val: self.update_setting("max_classes_per_student", val))
+        
+        self.max_instructor_classes_spinbox = QSpinBox()
+        self.max_instructor_classes_spinbox.setRange(1, 20)
+        self.max_instructor_classes_spinbox.setValue(self.settings["max_classes_per_instructor"])
+        self.max_instructor_classes_spinbox.valueChanged.connect(
+            lambda val: self.update_setting("max_classes_per_instructor", val))
+        
+        self.split_sections_combo = QComboBox()
+        self.split_sections_combo.addItems(["Yes", "No"])
+        self.split_sections_combo.setCurrentText("Yes" if self.settings["split_sections"] else "No")
+        self.split_sections_combo.currentTextChanged.connect(
+            lambda text: self.update_setting("split_sections", text == "Yes"))
+        
+        self.partition_combo = QComboBox()
+        self.partition_combo.addItems(["Yes", "No"])
+        self.partition_combo.setCurrentText("Yes" if self.settings["partition_by_building"] else "No")
+        self.partition_combo.currentTextChanged.connect(
+            lambda text: self.update_setting("partition_by_building", text == "Yes"))
+        
+        self.local_search_spinbox = QSpinBox()
+        self.local_search_spinbox.setRange(0, 600)
+        self.local_search_spinbox.setSpecialValueText("Off")
+        self.local_search_spinbox.setSuffix(" s")
+        self.local_search_spinbox.setValue(int(self.settings["local_search_seconds"]))
+        self.local_search_spinbox.valueChanged.connect(
+            lambda val: self.update_setting("local_search_seconds", val))
+        
+        # Extra spellings of the survey answers, used by the next import
+        self.answer_synonyms_edit = QLineEdit()
+        self.answer_synonyms_edit.setPlaceholderText("e.g. Available=Fits; Preferred=First Choice")
+        self.answer_synonyms_edit.setText("; ".join(f"{spelling}={label}" for spelling, label
+                                                    in self.settings["answer_synonyms"].items()))
+        self.answer_synonyms_edit.editingFinished.connect(self.set_answer_synonyms)
+        
+        self.solver_combo = QComboBox()
+        self.solver_combo.addItems(list(SOLVERS))
+        self.solver_combo.setCurrentText(self.settings["solver"])
+        self.solver_combo.currentTextChanged.connect(
+            lambda text: self.update_setting("solver", text))
+        
         # Add fields to layout
         layout.addRow("Maximum Students per Class:", self.max_students_spinbox)
         layout.addRow("Maximum Instructors per Class:", self.max_instructors_spinbox)
         layout.addRow("Minimum Students for Class to Run:", self.min_students_spinbox)
         layout.addRow("Prioritize First Choice Students:", self.prioritize_combo)
+        layout.addRow("Maximum Classes per Student:", self.max_classes_spinbox)
+        layout.addRow("Maximum Classes per Instructor:", self.max_instructor_classes_spinbox)
+        layout.addRow("Split Full Classes into Sections:", self.split_sections_combo)
+        layout.addRow("Schedule Each Building Separately:", self.partition_combo)
+        layout.addRow("Scheduling Algorithm:", self.solver_combo)
+        layout.addRow("Improve Schedule by Local Search For:", self.local_search_spinbox)
+        layout.addRow("Answer Synonyms:", self.answer_synonyms_edit)
         
         # Save settings button
         save_btn = QPushButton("Save Settings")
         save_btn.clicked.connect(self.save_settings)
         layout.addRow("", save_btn)
         
+        clear_cache_btn = QPushButton("Clear Import Cache")
+        clear_cache_btn.clicked.connect(self.clear_import_cache)
+        layout.addRow("", clear_cache_btn)
+        
+        # Diagnostics
+        self.trace_memory_combo = QComboBox()
+        self.trace_memory_combo.addItems(["Yes", "No"])
+        self.trace_memory_combo.setCurrentText("Yes" if self.trace_memory else "No")
+        self.trace_memory_combo.currentTextChanged.connect(self.set_trace_memory)
+        layout.addRow("Record Peak Memory (slower):", self.trace_memory_combo)
+        
+        profile_btn = QPushButton("Profile Next Operation...")
+        profile_btn.clicked.connect(self.profile_next_operation)
+        layout.addRow("", profile_btn)
+        
         # Add tab
         self.tabs.addTab(settings_widget, "Settings")
     
+    def create_sweep_tab(self):
+        sweep_widget = QWidget()
+        layout = QVBoxLayout(sweep_widget)
+        
+        # Ranges to sweep, e.g. "10-30:5" or "10, 15, 20"; empty keeps the current setting
+        ranges_group = QGroupBox("Setting Ranges")
+        ranges_layout = QFormLayout(ranges_group)
+        
+        self.sweep_inputs = {}
+        for key, label in [("max_students_per_class", "Maximum Students per Class:"),
+                           ("max_instructors_per_class", "Maximum Instructors per Class:"),
+                           ("min_students_per_class", "Minimum Students for Class to Run:"),
+                           ("max_classes_per_instructor", "Maximum Classes per Instructor:")]:
+            line_edit = QLineEdit()
+            line_edit.setPlaceholderText(f"e.g. 10-30:5 (current: {self.settings[key]})")
+            ranges_layout.addRow(label, line_edit)
+            self.sweep_inputs[key] = line_edit
+        
+        self.sweep_prioritize_combo = QComboBox()
+        self.sweep_prioritize_combo.addItems(["Current", "Yes", "No", "Both"])
+        ranges_layout.addRow("Prioritize First Choice Students:", self.sweep_prioritize_combo)
+        
+        layout.addWidget(ranges_group)
+        
+        # Controls
+        controls_layout = QHBoxLayout()
+        
+        run_btn = QPushButton("Run Sweep")
+        run_btn.clicked.connect(self.run_sweep)
+        
+        controls_layout.addWidget(run_btn)
+        controls_layout.addStretch()
+        layout.addLayout(controls_layout)
+        
+        # Comparison table
+        self.sweep_table = QTableWidget(0, 0)
+        self.sweep_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.sweep_table)
+        
+        # Schedules generated earlier from the same data, compared without rerunning them
+        compare_group = QGroupBox("Compare Cached Schedules")
+        compare_layout = QVBoxLayout(compare_group)
+        
+        pick_layout = QHBoxLayout()
+        self.compare_first_combo = QComboBox()
+        self.compare_second_combo = QComboBox()
+        compare_btn = QPushButton("Compare")
+        compare_btn.clicked.connect(self.compare_cached_schedules)
+        pick_layout.addWidget(QLabel("First:"))
+        pick_layout.addWidget(self.compare_first_combo, 1)
+        pick_layout.addWidget(QLabel("Second:"))
+        pick_layout.addWidget(self.compare_second_combo, 1)
+        pick_layout.addWidget(compare_btn)
+        compare_layout.addLayout(pick_layout)
+        
+        self.compare_table = QTableWidget(0, 0)
+        self.compare_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        compare_layout.addWidget(self.compare_table)
+        layout.addWidget(compare_group)
+        self.cached_schedules = []
+        self.tabs.currentChanged.connect(
+            lambda index: self.refresh_cached_schedules() if index == self.tabs.indexOf(sweep_widget) else None)
+        
+        # Add tab
+        self.tabs.addTab(sweep_widget, "What-If")
+    
+    def run_sweep(self):
+        if self.is_busy():
+            return
+        
+        if not self.scheduler.students or not self.scheduler.instructors:
+            QMessageBox.warning(self, "Warning", "Please import both students and instructors first.")
+            return
+        
+        try:
+            ranges = {}
+            for key, line_edit in self.sweep_inputs.items():
+                values = parse_setting_range(line_edit.text())
+                ranges[key] = values or [self.settings[key]]
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", f"Invalid setting range: {str(e)}")
+            return
+        
+        prioritize = self.sweep_prioritize_combo.currentText()
+        ranges["prioritize_first_choice"] = {
+            "Current": [self.settings["prioritize_first_choice"]],
+            "Yes": [True],
+            "No": [False],
+            "Both": [True, False],
+        }[prioritize]
+        if self.settings["solver"] != "Optimal" and prioritize != "Current":
+            self.log_activity(f"Prioritize First Choice Students only affects the Optimal algorithm; "
+                              f"the {self.settings['solver']} sweep keeps the current setting")
+        
+        self.run_in_background(
+            "Running sweep",
+            lambda progress: self.scheduler.sweep(ranges, progress=progress),
+            self.sweep_finished,
+            lambda message: self.background_failed("Failed to run sweep", "Error running sweep", message))
+    
+    def sweep_finished(self, results):
+        self.sweep_table.clear()
+        self.sweep_table.setColumnCount(len(results.columns))
+        self.sweep_table.setRowCount(len(results))
+        self.sweep_table.setHorizontalHeaderLabels([str(col) for col in results.columns])
+        for row_position, row in enumerate(results.to_dict("records")):
+            for col, (name, value) in enumerate(row.items()):
+                self.sweep_table.setItem(row_position, col, QTableWidgetItem(self.result_text(name, value)))
+        
+        self.log_activity(f"Sweep ran {len(results)} setting combinations")
+    
+    def result_text(self, name, value):
+        # A summary figure or setting as shown in the What-If tables
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "Yes" if value else "No"
+        if isinstance(value, float):
+            return f"{value:.0%}" if name == "First Choice Rate" else f"{value:.2f}"
+        return str(value)
+    
+    def refresh_cached_schedules(self):
+        # Cached schedules for the current data, newest last; the newest two are compared by default
+        self.cached_schedules = self.scheduler.cached_schedules()
+        labels = []
+        for number, entry in enumerate(self.cached_schedules, 1):
+            changed = [f"{name}={self.result_text(name, value)}" for name, value in entry.settings.items()
+                       if name != "solver" and value != self.settings.get(name)]
+            details = ", ".join(changed) if changed else "current settings"
+            labels.append(f"{number}. {entry.settings['solver']} ({details})")
+        for combo, default in [(self.compare_first_combo, len(labels) - 2), (self.compare_second_combo, len(labels) - 1)]:
+            combo.clear()
+            combo.addItems(labels)
+            combo.setCurrentIndex(max(default, 0) if labels else -1)
+    
+    def compare_cached_schedules(self):
+        first = self.compare_first_combo.currentIndex()
+        second = self.compare_second_combo.currentIndex()
+        if len(self.cached_schedules) < 2 or first < 0 or second < 0:
+            QMessageBox.information(self, "Compare Schedules",
+                                    "Generate at least two schedules from the current data to compare them.")
+            return
+        
+        comparison = compare_schedules(self.cached_schedules[first], self.cached_schedules[second])
+        self.compare_table.clear()
+        self.compare_table.setColumnCount(len(comparison.columns))
+        self.compare_table.setRowCount(len(comparison))
+        self.compare_table.setHorizontalHeaderLabels([str(col) for col in comparison.columns])
+        self.compare_table.setVerticalHeaderLabels([str(name) for name in comparison.index])
+        for row_position, (name, row) in enumerate(comparison.to_dict("index").items()):
+            for col, value in enumerate(row.values()):
+                self.compare_table.setItem(row_position, col, QTableWidgetItem(self.result_text(name, value)))
+        
+        self.log_activity(f"Compared cached schedules {self.compare_first_combo.currentText()} "
+                          f"and {self.compare_second_combo.currentText()}")
+    
     def update_setting(self, key, value):
         self.settings[key] = value
         self.log_activity(f"Updated setting: {key} = {value}")
@@ -350,154 +837,142 @@ class ClassSchedulerApp(QMainWindow):
         QMessageBox.information(self, "Settings", "Settings saved successfully!")
         self.log_activity("Settings saved")
     
+    def set_answer_synonyms(self):
+        try:
+            synonyms = parse_answer_synonyms(self.answer_synonyms_edit.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Answer Synonyms", str(e))
+            return
+        if synonyms != self.settings["answer_synonyms"]:
+            self.update_setting("answer_synonyms", synonyms)
+    
+    def log_unrecognized(self, kind, unrecognized):
+        if unrecognized:
+            self.log_activity(f"{kind.capitalize()}: {unrecognized}")
+    
+    def clear_import_cache(self):
+        self.import_cache.clear()
+        self.log_activity("Import cache cleared")
+    
+    def set_trace_memory(self, text):
+        self.trace_memory = text == "Yes"
+        self.log_activity(f"Peak memory recording {'on' if self.trace_memory else 'off'}")
+    
+    def profile_next_operation(self):
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Save Profile", "pyra.prof", "Profile Files (*.prof)")
+        if not filename:
+            return
+        self.profile_path = filename
+        self.log_activity(f"The next operation will be profiled to {filename}")
+    
     def import_students(self):
+        if self.is_busy():
+            return
+        
         filename, _ = QFileDialog.getOpenFileName(
             self, "Import Students", "", "Excel Files (*.xlsx *.xls)")
         
         if not filename:
             return
         
-        try:
-            df = pd.read_excel(filename)
-            self.process_student_data(df)
-            self.log_activity(f"Imported {len(df)} students from {os.path.basename(filename)}")
-            self.update_dashboard_stats()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to import students: {str(e)}")
-            self.log_activity(f"Error importing students: {str(e)}")
-    
-    def process_student_data(self, df):
-        # Clear existing students
-        self.students = {}
-        
-        # Find class columns - any column that starts with a day of the week
-        class_columns = [col for col in df.columns if re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', col)]
-        
-        # Process each student row
-        for _, row in df.iterrows():
-            student_id = str(row.get('ID', 'Unknown'))
-            student_data = row.to_dict()
-            student = Student(student_id, student_data)
-            self.students[student_id] = student
-            
-            # Create classes if they don't exist
-            for class_name in class_columns:
-                if class_name not in self.classes:
-                    self.classes[class_name] = ClassPeriod(class_name)
+        # The worker only parses; the scheduler changes on the GUI thread, in students_imported,
+        # so the table views never see students disappear under them
+        def load(progress):
+            matrix, cached = self.import_cache.read_survey(filename, progress, self.settings["answer_synonyms"])
+            return matrix, cached, matrix.describe_unrecognized()
         
-        # Update students table
-        self.update_students_table()
-        self.update_classes_table()
+        self.run_in_background(
+            f"Importing students from {os.path.basename(filename)}", load,
+            lambda result: self.students_imported(*result, filename),
+            lambda message: self.background_failed("Failed to import students", "Error importing students", message))
+    
+    def students_imported(self, matrix, cached, unrecognized, filename):
+        count = len(matrix.row_index)
+        self.operation_stats.rows = count
+        with self.operation_stats.phase("Applying import"):
+            self.scheduler.set_student_matrix(matrix)
+        with self.operation_stats.phase("Updating tables"):
+            self.apply_changes()
+        source = " (cached)" if cached else ""
+        self.log_activity(f"Imported {count} students from {os.path.basename(filename)}{source}")
+        self.log_unrecognized("students", unrecognized)
     
-    def update_students_table(self):
-        self.students_table.setRowCount(0)
+    def reimport_students(self):
+        self.reimport("students", self.scheduler.reimport_students)
+    
+    def reimport_instructors(self):
+        self.reimport("instructors", self.scheduler.reimport_instructors)
+    
+    def reimport(self, kind, apply_reimport):
+        if self.is_busy():
+            return
         
-        for student_id, student in self.students.items():
-            row_position = self.students_table.rowCount()
-            self.students_table.insertRow(row_position)
-            
-            # Set student ID
-            self.students_table.setItem(row_position, 0, QTableWidgetItem(student_id))
-            
-            # Set building if available
-            building = student.building
-            self.students_table.setItem(row_position, 1, QTableWidgetItem(str(building)))
-            
-            # Count data points
-            data_points = sum(1 for key in student.data if key not in ['ID', 'Building'] and pd.notna(student.data[key]))
-            self.students_table.setItem(row_position, 2, QTableWidgetItem(str(data_points)))
-            
-            # List classes
-            classes_text = ", ".join([f"{class_name}: {preference}" 
-                                     for class_name, preference in student.classes.items() 
-                                     if preference])
-            self.students_table.setItem(row_position, 3, QTableWidgetItem(classes_text))
+        filename, _ = QFileDialog.getOpenFileName(
+            self, f"Re-import {kind.capitalize()}", "", "Excel Files (*.xlsx *.xls)")
+        
+        if not filename:
+            return
+        
+        # Parsed on the worker; only rows whose content changed since the last
+        # import are then applied, on the GUI thread, in reimported
+        def load(progress):
+            matrix, _ = self.import_cache.read_survey(filename, progress, self.settings["answer_synonyms"])
+            return matrix, matrix.describe_unrecognized()
+        
+        self.run_in_background(
+            f"Re-importing {kind} from {os.path.basename(filename)}", load,
+            lambda result: self.reimported(kind, apply_reimport, *result, filename),
+            lambda message: self.background_failed(f"Failed to re-import {kind}", f"Error re-importing {kind}", message))
+    
+    def reimported(self, kind, apply_reimport, matrix, unrecognized, filename):
+        with self.operation_stats.phase("Applying changes"):
+            report = apply_reimport(matrix)
+        self.operation_stats.rows = len(report.added) + len(report.changed) + report.unchanged
+        with self.operation_stats.phase("Updating tables"):
+            self.apply_changes()
+        self.log_activity(f"Re-imported {kind} from {os.path.basename(filename)}: {report.describe(kind)}")
+        self.log_unrecognized(kind, unrecognized)
+    
+    def process_student_data(self, df):
+        self.scheduler.load_students(df)
+        self.apply_changes()
     
     def import_instructors(self):
+        if self.is_busy():
+            return
+        
         filename, _ = QFileDialog.getOpenFileName(
             self, "Import Instructors", "", "Excel Files (*.xlsx *.xls)")
         
         if not filename:
             return
         
-        try:
-            df = pd.read_excel(filename)
-            self.process_instructor_data(df)
-            self.log_activity(f"Imported {len(df)} instructors from {os.path.basename(filename)}")
-            self.update_dashboard_stats()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to import instructors: {str(e)}")
-            self.log_activity(f"Error importing instructors: {str(e)}")
-    
-    def process_instructor_data(self, df):
-        # Clear existing instructors
-        self.instructors = {}
-        
-        # Find class columns - any column that starts with a day of the week
-        class_columns = [col for col in df.columns if re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', col)]
-        
-        # Process each instructor row
-        for _, row in df.iterrows():
-            instructor_id = str(row.get('ID', 'Unknown'))
-            instructor_data = row.to_dict()
-            instructor = Instructor(instructor_id, instructor_data)
-            self.instructors[instructor_id] = instructor
-            
-            # Create classes if they don't exist
-            for class_name in class_columns:
-                if class_name not in self.classes:
-                    self.classes[class_name] = ClassPeriod(class_name)
+        # The worker only parses; the scheduler changes on the GUI thread, in instructors_imported,
+        # so the table views never see instructors disappear under them
+        def load(progress):
+            matrix, cached = self.import_cache.read_survey(filename, progress, self.settings["answer_synonyms"])
+            return matrix, cached, matrix.describe_unrecognized()
         
-        # Update instructors table
-        self.update_instructors_table()
-        self.update_classes_table()
+        self.run_in_background(
+            f"Importing instructors from {os.path.basename(filename)}", load,
+            lambda result: self.instructors_imported(*result, filename),
+            lambda message: self.background_failed("Failed to import instructors", "Error importing instructors", message))
     
-    def update_instructors_table(self):
-        self.instructors_table.setRowCount(0)
-        
-        for instructor_id, instructor in self.instructors.items():
-            row_position = self.instructors_table.rowCount()
-            self.instructors_table.insertRow(row_position)
-            
-            # Set instructor ID
-            self.instructors_table.setItem(row_position, 0, QTableWidgetItem(instructor_id))
-            
-            # Set teaching preference
-            pref = instructor.teach_with_preference
-            self.instructors_table.setItem(row_position, 1, QTableWidgetItem(str(pref)))
-            
-            # List available classes
-            available_classes = ", ".join([class_name for class_name, availability in instructor.classes.items() 
-                                          if availability and availability.lower() != "does not fit"])
-            self.instructors_table.setItem(row_position, 2, QTableWidgetItem(available_classes))
+    def instructors_imported(self, matrix, cached, unrecognized, filename):
+        count = len(matrix.row_index)
+        self.operation_stats.rows = count
+        with self.operation_stats.phase("Applying import"):
+            self.scheduler.set_instructor_matrix(matrix)
+        with self.operation_stats.phase("Updating tables"):
+            self.apply_changes()
+        source = " (cached)" if cached else ""
+        self.log_activity(f"Imported {count} instructors from {os.path.basename(filename)}{source}")
+        self.log_unrecognized("instructors", unrecognized)
     
-    def update_classes_table(self):
-        self.classes_table.setRowCount(0)
-        
-        for class_name, class_obj in self.classes.items():
-            row_position = self.classes_table.rowCount()
-            self.classes_table.insertRow(row_position)
-            
-            # Set class name
-            self.classes_table.setItem(row_position, 0, QTableWidgetItem(class_name))
-            
-            # Count potential students (those who marked First Choice or Fits)
-            student_count = sum(1 for student in self.students.values() 
-                               if class_name in student.classes and 
-                               student.classes[class_name] in ["First Choice", "Fits"])
-            self.classes_table.setItem(row_position, 1, QTableWidgetItem(str(student_count)))
-            
-            # Count potential instructors
-            instructor_count = sum(1 for instructor in self.instructors.values() 
-                                  if class_name in instructor.classes and 
-                                  instructor.classes[class_name] != "Does Not Fit")
-            self.classes_table.setItem(row_position, 2, QTableWidgetItem(str(instructor_count)))
-            
-            # Class status
-            status = "Ready" if student_count >= self.settings["min_students_per_class"] and instructor_count > 0 else "Not Ready"
-            status_item = QTableWidgetItem(status)
-            status_item.setForeground(QColor("green" if status == "Ready" else "red"))
-            self.classes_table.setItem(row_position, 3, status_item)
+    def process_instructor_data(self, df):
+        self.scheduler.load_instructors(df)
+        self.apply_changes()
     
     def add_class_dialog(self):
         # In a real app, we'd create a dialog to add a class manually
@@ -507,195 +982,264 @@ class ClassSchedulerApp(QMainWindow):
         self.log_activity("Add class dialog opened")
     
     def generate_schedule(self):
-        if not self.students or not self.instructors:
-            QMessageBox.warning(self, "Warning", "Please import both students and instructors first.")
+        if self.is_busy():
             return
         
-        # Clear current schedule
-        self.schedule_table.setRowCount(0)
-        
-        # Track assigned students and instructors
-        assigned_students = set()
-        assigned_instructors = {}  # Dict to track number of classes per instructor
-        
-        # Process classes by day/time
-        for class_name, class_obj in sorted(self.classes.items(), 
-                                           key=lambda x: (x[1].day, x[1].start_time if x[1].start_time else "")):
-            # Get potential students for this class
-            first_choice_students = [
-                student_id for student_id, student in self.students.items()
-                if class_name in student.classes and student.classes[class_name] == "First Choice"
-                and student_id not in assigned_students
-            ]
-            
-            fits_students = [
-                student_id for student_id, student in self.students.items()
-                if class_name in student.classes and student.classes[class_name] == "Fits"
-                and student_id not in assigned_students
-            ]
-            
-            # Get potential instructors for this class
-            available_instructors = [
-                instructor_id for instructor_id, instructor in self.instructors.items()
-                if class_name in instructor.classes and instructor.classes[class_name] != "Does Not Fit"
-                and (instructor_id not in assigned_instructors or 
-                     assigned_instructors[instructor_id] < 2)  # Limit instructors to 2 classes
-            ]
-            
-            # Prioritize instructors with fewer assigned classes
-            available_instructors.sort(key=lambda x: assigned_instructors.get(x, 0))
-            
-            # Check if we have enough students and instructors
-            total_potential_students = len(first_choice_students) + len(fits_students)
-            
-            if (total_potential_students >= self.settings["min_students_per_class"] and 
-                len(available_instructors) > 0):
-                
-                # Assign instructors (up to max_instructors_per_class)
-                selected_instructors = available_instructors[:self.settings["max_instructors_per_class"]]
-                
-                # Update assigned instructors count
-                for instructor_id in selected_instructors:
-                    assigned_instructors[instructor_id] = assigned_instructors.get(instructor_id, 0) + 1
-                
-                # First prioritize First Choice students
-                selected_students = first_choice_students
-                
-                # If we need more students, add from Fits category
-                if len(selected_students) < self.settings["max_students_per_class"]:
-                    remaining_slots = self.settings["max_students_per_class"] - len(selected_students)
-                    selected_students.extend(fits_students[:remaining_slots])
-                
-                # If we have too many students, cap at maximum
-                if len(selected_students) > self.settings["max_students_per_class"]:
-                    selected_students = selected_students[:self.settings["max_students_per_class"]]
-                
-                # Mark these students as assigned
-                assigned_students.update(selected_students)
-                
-                # Add to schedule table
-                self.add_to_schedule(class_name, selected_instructors, selected_students)
-        
-        self.log_activity(f"Schedule generated with {self.schedule_table.rowCount()} classes")
-        self.update_dashboard_stats()
+        if not self.scheduler.students or not self.scheduler.instructors:
+            QMessageBox.warning(self, "Warning", "Please import both students and instructors first.")
+            return
         
-        # Switch to schedule tab
-        self.tabs.setCurrentIndex(self.tabs.indexOf(self.tabs.findChild(QWidget, "Schedule")))
+        # Run the selected scheduling algorithm off the GUI thread
+        self.run_in_background(
+            "Generating schedule", self.scheduler.generate, self.schedule_generated,
+            lambda message: self.background_failed("Failed to generate schedule", "Error generating schedule", message))
     
-    def add_to_schedule(self, class_name, instructor_ids, student_ids):
-        row_position = self.schedule_table.rowCount()
-        self.schedule_table.insertRow(row_position)
-        
-        # Set class name/time
-        self.schedule_table.setItem(row_position, 0, QTableWidgetItem(class_name))
+    def schedule_generated(self, schedule):
+        self.operation_stats.rows = len(self.scheduler.students)
+        with self.operation_stats.phase("Updating tables"):
+            self.apply_changes()
         
-        # Set instructors
-        instructor_names = ", ".join(instructor_ids)
-        self.schedule_table.setItem(row_position, 1, QTableWidgetItem(instructor_names))
+        source = " (from cache)" if self.scheduler.schedule_cached else ""
+        self.log_activity(f"Schedule generated with {len(schedule)} classes{source}")
+        if self.scheduler.search_report:
+            self.log_activity(self.scheduler.search_report.describe())
+        self.refresh_cached_schedules()
         
-        # Set students
-        student_count = len(student_ids)
-        student_text = f"{student_count} students"
-        self.schedule_table.setItem(row_position, 2, QTableWidgetItem(student_text))
-        
-        # Set room (placeholder)
-        self.schedule_table.setItem(row_position, 3, QTableWidgetItem("TBD"))
-        
-        # Set status
-        status = "Scheduled"
-        self.schedule_table.setItem(row_position, 4, QTableWidgetItem(status))
+        # Switch to schedule tab
+        self.tabs.setCurrentIndex(self.tabs.indexOf(self.tabs.findChild(QWidget, "Schedule")))
     
     def export_schedule(self):
-        if self.schedule_table.rowCount() == 0:
+        if self.is_busy():
+            return
+        
+        if not self.scheduler.schedule:
             QMessageBox.warning(self, "Warning", "Please generate a schedule first.")
             return
         
-        filename, _ = QFileDialog.getSaveFileName(
-            self, "Export Schedule", "", "Excel Files (*.xlsx)")
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Schedule", "",
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)")
         
         if not filename:
             return
         
-        try:
-            # Create a dataframe from the schedule table
-            rows = []
-            for row in range(self.schedule_table.rowCount()):
-                row_data = {}
-                row_data["Class Time"] = self.schedule_table.item(row, 0).text()
-                row_data["Instructors"] = self.schedule_table.item(row, 1).text()
-                row_data["Students"] = self.schedule_table.item(row, 2).text()
-                row_data["Room"] = self.schedule_table.item(row, 3).text()
-                row_data["Status"] = self.schedule_table.item(row, 4).text()
-                rows.append(row_data)
-            
-            df = pd.DataFrame(rows)
-            
-            # Export to Excel
-            df.to_excel(filename, index=False)
-            
-            QMessageBox.information(self, "Export", "Schedule exported successfully!")
-            self.log_activity(f"Schedule exported to {os.path.basename(filename)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to export schedule: {str(e)}")
-            self.log_activity(f"Error exporting schedule: {str(e)}")
+        # Default the extension from the chosen filter
+        if not os.path.splitext(filename)[1]:
+            filename += selected_filter[selected_filter.rindex("*") + 1:-1] if "*" in selected_filter else ".xlsx"
+        
+        # Rows stream straight from the schedule data to the file
+        schedule = self.scheduler.schedule
+        students = self.scheduler.students
+        self.run_in_background(
+            f"Exporting schedule to {os.path.basename(filename)}",
+            lambda progress: export_schedule(filename, schedule, students, progress),
+            lambda result: self.schedule_exported(filename),
+            lambda message: self.background_failed("Failed to export schedule", "Error exporting schedule", message))
+    
+    def schedule_exported(self, filename):
+        self.operation_stats.rows = sum(len(scheduled.student_ids) for scheduled in self.scheduler.schedule)
+        QMessageBox.information(self, "Export", "Schedule exported successfully!")
+        self.log_activity(f"Schedule exported to {os.path.basename(filename)}")
     
     def clear_students(self):
+        if self.is_busy():
+            return
+        
         reply = QMessageBox.question(self, "Clear Students", 
                                     "Are you sure you want to clear all students?",
                                     QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.students = {}
-            self.update_students_table()
+            self.scheduler.clear_students()
+            self.apply_changes()
             self.log_activity("All students cleared")
-            self.update_dashboard_stats()
     
     def clear_instructors(self):
+        if self.is_busy():
+            return
+        
         reply = QMessageBox.question(self, "Clear Instructors", 
                                     "Are you sure you want to clear all instructors?",
                                     QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.instructors = {}
-            self.update_instructors_table()
+            self.scheduler.clear_instructors()
+            self.apply_changes()
             self.log_activity("All instructors cleared")
-            self.update_dashboard_stats()
+    
+    def selected_keys(self, view):
+        # Model keys of the selected rows, mapped back through the sort/filter proxy
+        proxy = view.model()
+        model = proxy.sourceModel()
+        rows = sorted({proxy.mapToSource(index).row() for index in view.selectionModel().selectedIndexes()})
+        return [model.keys[row] for row in rows]
+    
+    def remove_selected_students(self):
+        self.remove_selected(self.students_table, "students", self.scheduler.remove_student)
+    
+    def remove_selected_instructors(self):
+        self.remove_selected(self.instructors_table, "instructors", self.scheduler.remove_instructor)
+    
+    def remove_selected(self, view, kind, remove):
+        if self.is_busy():
+            return
+        
+        keys = self.selected_keys(view)
+        if not keys:
+            QMessageBox.information(self, "Remove", f"Select the {kind} to remove first.")
+            return
+        
+        reply = QMessageBox.question(self, "Remove", 
+                                    f"Remove {len(keys)} {kind}? Affected classes in the schedule are repaired.",
+                                    QMessageBox.Yes | QMessageBox.No)
+        
+        if reply == QMessageBox.Yes:
+            # Incremental: only the periods these people touched are rescheduled
+            periods = set()
+            for key in keys:
+                periods.update(remove(key))
+            self.apply_changes()
+            self.log_activity(f"Removed {len(keys)} {kind}; repaired {len(periods)} scheduled periods")
+    
+    def import_rooms(self):
+        if self.is_busy():
+            return
+        
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Import Rooms", "", "Excel Files (*.xlsx *.xls)")
+        
+        if not filename:
+            return
+        
+        # Room inventories are small, no need for a worker
+        try:
+            self.scheduler.load_rooms(pd.read_excel(filename))
+            self.apply_changes()
+            self.log_activity(f"Imported {len(self.scheduler.rooms)} rooms from {os.path.basename(filename)}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to import rooms: {str(e)}")
+            self.log_activity(f"Error importing rooms: {str(e)}")
+    
+    def clear_rooms(self):
+        if self.is_busy():
+            return
+        
+        reply = QMessageBox.question(self, "Clear Rooms", 
+                                    "Are you sure you want to clear all rooms?",
+                                    QMessageBox.Yes | QMessageBox.No)
+        
+        if reply == QMessageBox.Yes:
+            self.scheduler.clear_rooms()
+            self.apply_changes()
+            self.log_activity("All rooms cleared")
     
     def clear_classes(self):
+        if self.is_busy():
+            return
+        
         reply = QMessageBox.question(self, "Clear Classes", 
                                     "Are you sure you want to clear all classes?",
                                     QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.classes = {}
-            self.update_classes_table()
+            self.scheduler.clear_classes()
+            self.apply_changes()
             self.log_activity("All classes cleared")
-            self.update_dashboard_stats()
+    
+    def run_in_background(self, description, fn, on_finished, on_failed):
+        # Phases follow the progress stages; result handlers may add their own
+        stats = OperationStats(description, self.trace_memory, self.profile_path)
+        self.profile_path = None
+        worker = Worker(lambda progress: stats.start().run(fn, stats.progress(progress)))
+        self.operation_stats = stats
+        
+        # Clear the busy state before the result handlers run
+        for signal in (worker.signals.finished, worker.signals.failed, worker.signals.cancelled):
+            signal.connect(self.background_done)
+        worker.signals.progress.connect(self.show_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.finished.connect(lambda result: self.log_operation_stats(stats))
+        worker.signals.failed.connect(on_failed)
+        worker.signals.failed.connect(lambda message: stats.finish())
+        worker.signals.cancelled.connect(lambda: self.log_activity(f"{description} cancelled"))
+        worker.signals.cancelled.connect(stats.finish)
+        # Whatever a failed or cancelled operation did change is still shown
+        worker.signals.failed.connect(lambda message: self.apply_changes())
+        worker.signals.cancelled.connect(self.apply_changes)
+        
+        self.current_worker = worker
+        self.busy = True
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.show()
+        self.statusBar().showMessage(description)
+        self.thread_pool.start(worker)
+    
+    def is_busy(self):
+        if self.busy:
+            QMessageBox.warning(self, "Warning", "Please wait for the current operation to finish or cancel it.")
+            return True
+        return False
+    
+    def show_progress(self, stage, done, total):
+        if total > 0:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+        else:
+            self.progress_bar.setRange(0, 0)  # Busy indicator
+        self.statusBar().showMessage(stage)
+    
+    def cancel_background(self):
+        if self.busy:
+            self.current_worker.cancel_requested = True
+            self.cancel_btn.setEnabled(False)
+            self.statusBar().showMessage("Cancelling...")
+    
+    def background_done(self, *args):
+        self.busy = False
+        self.progress_bar.hide()
+        self.cancel_btn.hide()
+        self.statusBar().showMessage("Ready")
+    
+    def background_failed(self, title, log_prefix, message):
+        QMessageBox.critical(self, "Error", f"{title}: {message}")
+        self.log_activity(f"{log_prefix}: {message}")
     
     def log_activity(self, message):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.log_text.append(f"[{timestamp}] {message}")
     
-    def update_dashboard_stats(self):
-        # Update dashboard statistics
-        student_count_label = self.findChild(QLabel, "students_count")
-        if student_count_label:
-            student_count_label.setText(str(len(self.students)))
-        
-        instructor_count_label = self.findChild(QLabel, "instructors_count")
-        if instructor_count_label:
-            instructor_count_label.setText(str(len(self.instructors)))
-        
-        class_count_label = self.findChild(QLabel, "classes_count")
-        if class_count_label:
-            class_count_label.setText(str(len(self.classes)))
-        
-        scheduled_count_label = self.findChild(QLabel, "scheduled_count")
-        if scheduled_count_label:
-            scheduled_count_label.setText(str(self.schedule_table.rowCount()))
+    def log_operation_stats(self, stats):
+        # One key=value entry per phase, ending with the total
+        for phase in stats.finish():
+            self.log_activity(f"Timing {phase.format()}")
+        if stats.profile_path:
+            self.log_activity(f"Profile of {stats.operation} written to {stats.profile_path}")
+    
+    def apply_changes(self):
+        # Each table updates only the rows the queued changes touched, and
+        # only the counters of the collections that changed are redrawn
+        models = {"students": self.students_table_model, "instructors": self.instructors_table_model,
+                  "classes": self.classes_table_model, "rooms": self.rooms_table_model,
+                  "schedule": self.schedule_table_model}
+        changed = set()
+        while self.pending_changes:
+            event = self.pending_changes.popleft()
+            models[event.entity].apply_change(event)
+            if event.reset or event.added or event.removed:
+                changed.add(event.entity)
+        self.update_dashboard_stats(changed)
+    
+    def update_dashboard_stats(self, entities=None):
+        # Counts for the given collections (default: all of them)
+        for entity, label in self.stats_labels.items():
+            if entities is None or entity in entities:
+                label.setText(str(len(getattr(self.scheduler, entity))))
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Sweep workers in the frozen executable
     app = QApplication(sys.argv)
     window = ClassSchedulerApp()
     window.show()
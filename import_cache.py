@@ -0,0 +1,136 @@
+"""On-disk cache of parsed survey workbooks.
+
+Entries are keyed by the SHA-256 of the workbook's bytes plus the parser
+version (and the answer synonyms in use), so a re-import of an unchanged file skips pd.read_excel and the
+preference encoding entirely and memory-maps the saved matrix instead.
+Entries are evicted by age and by total size, least recently used first.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from scheduler_core import PARSER_VERSION, PreferenceMatrix
+
+
+def default_cache_directory():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "pyra", "imports")
+
+
+def file_digest(filename, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImportCache:
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024, max_age_days=30):
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 60 * 60
+
+    def key(self, filename, synonyms=None):
+        key = f"{file_digest(filename)}-v{PARSER_VERSION}"
+        if synonyms:
+            # Different synonyms can encode the same workbook differently
+            text = repr(sorted(synonyms.items())).encode("utf-8")
+            key += f"-s{hashlib.sha256(text).hexdigest()[:16]}"
+        return key
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key):
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            matrix = PreferenceMatrix.load(entry)
+        except Exception:
+            # A damaged entry is just a miss
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        os.utime(entry)  # Recently used
+        return matrix
+
+    def store(self, key, matrix):
+        os.makedirs(self.directory, exist_ok=True)
+        entry = self._entry(key)
+
+        # Write into a scratch directory and rename, so readers never see half an entry
+        scratch = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            matrix.save(scratch)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(scratch, entry)
+        except OSError:
+            shutil.rmtree(scratch, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self):
+        """(path, size in bytes, last used) for every complete entry."""
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            result.append((path, size, os.path.getmtime(path)))
+        return result
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for path, size, used in self.entries():
+            if now - used > self.max_age:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                entries.append((used, size, path))
+
+        # Drop least recently used entries until the cache fits
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for used, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def read_survey(self, filename, progress=None, synonyms=None):
+        """Parsed preference matrix for a workbook, and whether it came from the cache."""
+        if progress:
+            progress("Checking import cache", 0, 0)
+        key = self.key(filename, synonyms)
+        matrix = self.load(key)
+        if matrix is not None:
+            return matrix, True
+
+        if progress:
+            progress("Reading workbook", 0, 0)
+        matrix = PreferenceMatrix(pd.read_excel(filename), progress, synonyms)
+        if progress:
+            progress("Caching import", 0, 0)
+        try:
+            self.store(key, matrix)
+        except OSError:
+            pass  # Caching is best effort; the import itself succeeded
+        return matrix, False
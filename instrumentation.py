@@ -0,0 +1,145 @@
+"""Per-phase timing, throughput and peak memory for long-running operations.
+
+An OperationStats follows one import, schedule generation or export.  Its
+phases are the stages the operation already reports through its progress
+callback, so the scheduling core needs no timing code of its own: each new
+stage name closes the previous phase.  Callers can add phases of their own
+(e.g. filling the tables afterwards) with phase().
+
+Peak memory comes from tracemalloc, reset at every phase boundary, and an
+optional cProfile capture writes a .prof file for the operation, to be
+read with pstats or snakeviz.
+"""
+import cProfile
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+class PhaseStats(namedtuple("PhaseStats", ["operation", "phase", "seconds", "rows", "peak_bytes"])):
+    """Wall time, rows handled and traced memory peak (None when not traced) of one phase."""
+
+    __slots__ = ()
+
+    @property
+    def rows_per_second(self):
+        if not self.rows or self.seconds <= 0:
+            return None
+        return self.rows / self.seconds
+
+    def as_dict(self):
+        return {"operation": self.operation, "phase": self.phase, "seconds": round(self.seconds, 4),
+                "rows": self.rows, "rows_per_s": None if self.rows_per_second is None else round(self.rows_per_second),
+                "peak_mb": None if self.peak_bytes is None else round(self.peak_bytes / 2 ** 20, 1)}
+
+    def format(self):
+        # key=value pairs, so log lines can be grepped and parsed
+        return " ".join(f'{key}="{value}"' if isinstance(value, str) and " " in value else f"{key}={value}"
+                        for key, value in self.as_dict().items() if value is not None)
+
+
+class OperationStats:
+    """Phase timings for one operation; the last entry (phase "total") covers all of it.
+
+    rows, when set before finish(), is the number of records the operation
+    handled.  It is reported with the total only: phases handle different
+    things (files, rows, tables), so a per-phase rate would be meaningless.
+    """
+
+    SETUP_PHASE = "Setup"  # Time before the first progress report
+
+    def __init__(self, operation, trace_memory=True, profile_path=None):
+        self.operation = operation
+        self.trace_memory = trace_memory
+        self.profile_path = profile_path
+        self.rows = None
+        self.phases = []  # PhaseStats, in order
+        self._started = None
+        self._phase = None
+        self._phase_started = None
+        self._overall_peak = 0
+        self._owns_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._started = time.perf_counter()
+        self._open(self.SETUP_PHASE)
+        return self
+
+    def _open(self, phase):
+        self._phase = phase
+        self._phase_started = time.perf_counter()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def _close(self):
+        if self._phase is None:
+            return
+        peak = None
+        if tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            self._overall_peak = max(self._overall_peak, peak)
+        self.phases.append(PhaseStats(self.operation, self._phase, time.perf_counter() - self._phase_started,
+                                      None, peak))
+        self._phase = None
+
+    def enter_phase(self, phase):
+        if phase != self._phase:
+            self._close()
+            self._open(phase)
+
+    def progress(self, forward=None):
+        """A progress callback that starts a phase per stage name, then calls forward."""
+        def report(stage, done, total):
+            self.enter_phase(stage)
+            if forward:
+                forward(stage, done, total)
+        return report
+
+    @contextmanager
+    def phase(self, name):
+        self.enter_phase(name)
+        try:
+            yield
+        finally:
+            self._close()
+
+    def run(self, fn, *args):
+        """fn(*args), under cProfile when a profile_path is set; the profile is dumped even if fn raises."""
+        if not self.profile_path:
+            return fn(*args)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args)
+        finally:
+            profile.dump_stats(self.profile_path)
+
+    def finish(self, rows=None):
+        """Close the last phase and add the total; returns the phases."""
+        if rows is not None:
+            self.rows = rows
+        self._close()
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+        # Empty setup phases (the first stage was reported straight away) are noise
+        phases = [phase for phase in self.phases if phase.phase != self.SETUP_PHASE or phase.seconds >= 0.001]
+        phases.append(PhaseStats(self.operation, "total", time.perf_counter() - self._started, self.rows,
+                                 self._overall_peak if self.trace_memory else None))
+        self.phases = phases
+        return self.phases
+
+    def describe(self):
+        total = self.phases[-1]
+        parts = [f"{phase.phase} {phase.seconds:.2f}s" for phase in self.phases[:-1]]
+        text = f"{self.operation} took {total.seconds:.2f}s"
+        if parts:
+            text += f" ({', '.join(parts)})"
+        if total.rows_per_second is not None:
+            text += f", {total.rows_per_second:,.0f} rows/s"
+        if total.peak_bytes is not None:
+            text += f", peak {total.peak_bytes / 2 ** 20:.1f} MB"
+        return text
@@ -0,0 +1,198 @@
+"""Streaming schedule export to .xlsx, .csv and .parquet.
+
+Rows are generated straight from the schedule data and written as they
+are produced, so memory stays flat however long the rosters get:
+
+- Schedule: one row per scheduled class
+- Roster: one row per student-class assignment
+- one sheet per instructor with the students in each of their classes
+
+xlsx uses openpyxl's write-only mode.  CSV writes the roster to the chosen
+file with "_schedule" and "_instructors" siblings, and Parquet does the
+same in row-group batches (needs pyarrow).
+"""
+import csv
+import os
+import re
+
+SCHEDULE_COLUMNS = ["Class Time", "Instructors", "Students", "Room", "Status"]
+ROSTER_COLUMNS = ["Class Time", "Student ID", "Building", "Preference", "Instructors", "Room"]
+INSTRUCTOR_COLUMNS = ["Instructor ID"] + ROSTER_COLUMNS
+
+BATCH_SIZE = 10000  # Rows per Parquet row group
+
+
+def iter_schedule_rows(schedule):
+    for scheduled in schedule:
+        yield [scheduled.title, ", ".join(scheduled.instructor_ids),
+               f"{len(scheduled.student_ids)} students", scheduled.room, scheduled.status]
+
+
+def _cell(value):
+    # Write-only cells only take plain values; NaN becomes an empty cell
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _roster_rows(scheduled, students):
+    instructors = ", ".join(scheduled.instructor_ids)
+    for student_id in scheduled.student_ids:
+        student = students.get(student_id)
+        if student is None:
+            building, preference = "", ""
+        else:
+            building, preference = _cell(student.building), student.classes.get(scheduled.class_name, "")
+        yield [scheduled.title, student_id, building, preference, instructors, scheduled.room]
+
+
+def iter_roster_rows(schedule, students):
+    for scheduled in schedule:
+        yield from _roster_rows(scheduled, students)
+
+
+def classes_by_instructor(schedule):
+    # Instructor ID -> the scheduled classes they teach, in schedule order
+    classes = {}
+    for scheduled in schedule:
+        for instructor_id in scheduled.instructor_ids:
+            classes.setdefault(instructor_id, []).append(scheduled)
+    return classes
+
+
+def iter_instructor_rows(schedule, students):
+    for instructor_id, taught in classes_by_instructor(schedule).items():
+        for scheduled in taught:
+            for row in _roster_rows(scheduled, students):
+                yield [instructor_id] + row
+
+
+def _sheet_title(name, used):
+    # Excel sheet names: at most 31 characters, none of []:*?/\, unique ignoring case
+    base = re.sub(r'[\[\]:*?/\\]', "_", str(name)).strip("'") or "Instructor"
+    base = base[:31]
+    title = base
+    suffix = 2
+    while title.lower() in used:
+        tail = f" ({suffix})"
+        title = base[:31 - len(tail)] + tail
+        suffix += 1
+    used.add(title.lower())
+    return title
+
+
+def export_xlsx(filename, schedule, students, progress=None):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+
+    if progress:
+        progress("Writing schedule", 0, 0)
+    sheet = workbook.create_sheet("Schedule")
+    sheet.append(SCHEDULE_COLUMNS)
+    for row in iter_schedule_rows(schedule):
+        sheet.append([_cell(value) for value in row])
+
+    sheet = workbook.create_sheet("Roster")
+    sheet.append(ROSTER_COLUMNS)
+    for position, scheduled in enumerate(schedule):
+        if progress:
+            progress("Writing roster", position, len(schedule))
+        for row in _roster_rows(scheduled, students):
+            sheet.append([_cell(value) for value in row])
+
+    used = {"schedule", "roster"}
+    by_instructor = classes_by_instructor(schedule)
+    for position, (instructor_id, taught) in enumerate(by_instructor.items()):
+        if progress:
+            progress("Writing instructor sheets", position, len(by_instructor))
+        sheet = workbook.create_sheet(_sheet_title(instructor_id, used))
+        sheet.append(ROSTER_COLUMNS)
+        for scheduled in taught:
+            for row in _roster_rows(scheduled, students):
+                sheet.append([_cell(value) for value in row])
+
+    if progress:
+        progress("Saving workbook", 0, 0)
+    workbook.save(filename)
+
+
+def _sibling(filename, suffix):
+    base, extension = os.path.splitext(filename)
+    return f"{base}_{suffix}{extension}"
+
+
+def _write_csv(filename, columns, rows):
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def export_csv(filename, schedule, students, progress=None):
+    if progress:
+        progress("Writing roster", 0, 3)
+    _write_csv(filename, ROSTER_COLUMNS, iter_roster_rows(schedule, students))
+    if progress:
+        progress("Writing schedule", 1, 3)
+    _write_csv(_sibling(filename, "schedule"), SCHEDULE_COLUMNS, iter_schedule_rows(schedule))
+    if progress:
+        progress("Writing instructor rosters", 2, 3)
+    _write_csv(_sibling(filename, "instructors"), INSTRUCTOR_COLUMNS, iter_instructor_rows(schedule, students))
+
+
+def _write_parquet(filename, columns, rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    with pq.ParquetWriter(filename, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                writer.write_table(_parquet_table(pa, schema, columns, batch))
+                batch = []
+        if batch:
+            writer.write_table(_parquet_table(pa, schema, columns, batch))
+
+
+def _parquet_table(pa, schema, columns, batch):
+    # Everything is written as text; counts and IDs are already strings in the schedule
+    data = {column: [None if row[i] is None else str(row[i]) for row in batch]
+            for i, column in enumerate(columns)}
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+def export_parquet(filename, schedule, students, progress=None):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Parquet export requires the pyarrow package") from None
+
+    if progress:
+        progress("Writing roster", 0, 3)
+    _write_parquet(filename, ROSTER_COLUMNS, iter_roster_rows(schedule, students))
+    if progress:
+        progress("Writing schedule", 1, 3)
+    _write_parquet(_sibling(filename, "schedule"), SCHEDULE_COLUMNS, iter_schedule_rows(schedule))
+    if progress:
+        progress("Writing instructor rosters", 2, 3)
+    _write_parquet(_sibling(filename, "instructors"), INSTRUCTOR_COLUMNS, iter_instructor_rows(schedule, students))
+
+
+EXPORTERS = {
+    ".xlsx": export_xlsx,
+    ".csv": export_csv,
+    ".parquet": export_parquet,
+}
+
+
+def export_schedule(filename, schedule, students, progress=None):
+    """Write the schedule and rosters in the format given by the file extension."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: {extension or filename}")
+    EXPORTERS[extension](filename, schedule, students, progress)
@@ -0,0 +1,166 @@
+"""Headless batch scheduling: read the survey workbooks, generate and write the schedule.
+
+    python scheduler_cli.py students.xlsx instructors.xlsx -o schedule.xlsx
+
+Only imports the Qt-free scheduling core, so it runs on servers without a display.
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from import_cache import ImportCache
+from instrumentation import OperationStats
+from schedule_export import export_schedule
+from scheduler_core import (DEFAULT_SETTINGS, OBJECTIVE_WEIGHTS, SOLVERS, Scheduler, parse_answer_synonyms,
+                            parse_objective_weights)
+
+
+OPERATIONS = ["import", "generate", "export"]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a class schedule from survey workbooks.")
+    parser.add_argument("students", help="Students survey workbook (.xlsx/.xls)")
+    parser.add_argument("instructors", help="Instructors survey workbook (.xlsx/.xls)")
+    parser.add_argument("--rooms", help="Room inventory workbook with Room, Capacity and Building columns")
+    parser.add_argument("-o", "--output", default="schedule.xlsx",
+                        help="Schedule file to write (.xlsx, .csv or .parquet, default: schedule.xlsx)")
+    parser.add_argument("--solver", choices=list(SOLVERS), default=DEFAULT_SETTINGS["solver"],
+                        help="Scheduling algorithm")
+    parser.add_argument("--max-students", type=int, default=DEFAULT_SETTINGS["max_students_per_class"],
+                        help="Maximum students per class")
+    parser.add_argument("--max-instructors", type=int, default=DEFAULT_SETTINGS["max_instructors_per_class"],
+                        help="Maximum instructors per class")
+    parser.add_argument("--min-students", type=int, default=DEFAULT_SETTINGS["min_students_per_class"],
+                        help="Minimum students for a class to run")
+    parser.add_argument("--max-classes-per-student", type=int,
+                        default=DEFAULT_SETTINGS["max_classes_per_student"],
+                        help="Non-overlapping classes each student may take")
+    parser.add_argument("--max-classes-per-instructor", type=int,
+                        default=DEFAULT_SETTINGS["max_classes_per_instructor"],
+                        help="Classes each instructor may teach, unless their sheet row gives a Maximum Classes value")
+    parser.add_argument("--prioritize-first-choice", action=argparse.BooleanOptionalAction,
+                        default=DEFAULT_SETTINGS["prioritize_first_choice"],
+                        help="Prefer First Choice students over Fits")
+    parser.add_argument("--split-sections", action=argparse.BooleanOptionalAction,
+                        default=DEFAULT_SETTINGS["split_sections"],
+                        help="Open parallel sections of full classes while instructors and rooms allow")
+    parser.add_argument("--partition-by-building", action=argparse.BooleanOptionalAction,
+                        default=DEFAULT_SETTINGS["partition_by_building"],
+                        help="Schedule each building on its own, in parallel")
+    parser.add_argument("--local-search-seconds", type=float, default=DEFAULT_SETTINGS["local_search_seconds"],
+                        help="Improve the generated schedule by local search for this long (default: off)")
+    parser.add_argument("--objective-weights", type=parse_objective_weights, default={},
+                        help="Local search objective weights, e.g. first_choice=2,load_balance=0 "
+                             f"(terms: {', '.join(OBJECTIVE_WEIGHTS)})")
+    parser.add_argument("--synonym", action="append", default=[], metavar="TEXT=ANSWER",
+                        help='Accept TEXT as a survey answer, e.g. --synonym "Available=Fits" (repeatable)')
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always re-read the workbooks instead of using the import cache")
+    parser.add_argument("--cache-dir", help="Import cache directory (default: per-user cache)")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print the wall time of each phase and the rows per second of each operation")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also record each phase's peak memory with tracemalloc (slower)")
+    parser.add_argument("--profile", choices=OPERATIONS,
+                        help="Capture a cProfile of one operation")
+    parser.add_argument("--profile-output", default="pyra.prof",
+                        help="Profile file to write (default: pyra.prof)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        synonyms = parse_answer_synonyms(";".join(args.synonym))
+    except ValueError as e:
+        parser.error(str(e))
+
+    scheduler = Scheduler({
+        "max_students_per_class": args.max_students,
+        "max_instructors_per_class": args.max_instructors,
+        "min_students_per_class": args.min_students,
+        "prioritize_first_choice": args.prioritize_first_choice,
+        "max_classes_per_student": args.max_classes_per_student,
+        "max_classes_per_instructor": args.max_classes_per_instructor,
+        "split_sections": args.split_sections,
+        "partition_by_building": args.partition_by_building,
+        "local_search_seconds": args.local_search_seconds,
+        "objective_weights": dict(OBJECTIVE_WEIGHTS, **args.objective_weights),
+        "answer_synonyms": synonyms,
+        "solver": args.solver,
+    })
+
+    operations = []
+
+    def timed(operation, rows, fn, *fn_args):
+        # fn(*fn_args, progress) with its phases timed; rows() counts the records it handled
+        stats = OperationStats(operation, args.trace_memory,
+                               args.profile_output if args.profile == operation else None)
+        operations.append(stats)
+        result = stats.start().run(fn, *fn_args, stats.progress())
+        stats.finish(rows())
+        return result
+
+    def load_inputs(progress):
+        if args.no_cache:
+            progress("Reading workbook", 0, 0)
+            students = pd.read_excel(args.students)
+            scheduler.load_students(students, progress)
+            progress("Reading workbook", 0, 0)
+            instructors = pd.read_excel(args.instructors)
+            scheduler.load_instructors(instructors, progress)
+        else:
+            cache = ImportCache(args.cache_dir)
+            scheduler.set_student_matrix(cache.read_survey(args.students, progress, synonyms)[0])
+            scheduler.set_instructor_matrix(cache.read_survey(args.instructors, progress, synonyms)[0])
+        if args.rooms:
+            progress("Reading rooms", 0, 0)
+            scheduler.load_rooms(pd.read_excel(args.rooms))
+
+    try:
+        timed("import", lambda: len(scheduler.students) + len(scheduler.instructors), load_inputs)
+    except Exception as e:
+        print(f"Failed to import: {str(e)}", file=sys.stderr)
+        return 1
+
+    for kind, matrix in [("Students", scheduler.preferences.student_matrix),
+                         ("Instructors", scheduler.preferences.instructor_matrix)]:
+        unrecognized = matrix.describe_unrecognized() if matrix is not None else ""
+        if unrecognized:
+            print(f"{kind}: {unrecognized}", file=sys.stderr)
+
+    if not scheduler.students or not scheduler.instructors:
+        print("Both students and instructors are required.", file=sys.stderr)
+        return 1
+
+    schedule = timed("generate", lambda: len(scheduler.students), scheduler.generate)
+
+    try:
+        timed("export", lambda: sum(len(scheduled.student_ids) for scheduled in schedule),
+              export_schedule, args.output, schedule, scheduler.students)
+    except Exception as e:
+        print(f"Failed to export schedule: {str(e)}", file=sys.stderr)
+        return 1
+
+    summary = scheduler.summary()
+    print(f"Imported {len(scheduler.students)} students and {len(scheduler.instructors)} instructors")
+    print(f"Schedule generated with {summary['Scheduled Classes']} classes, "
+          f"{summary['Placed Students']} students placed in {summary['Placements']} seats "
+          f"({summary['First Choice Rate']:.0%} first choice)")
+    if scheduler.search_report:
+        print(scheduler.search_report.describe())
+    print(f"Schedule exported to {args.output}")
+    if args.timings or args.trace_memory:
+        for stats in operations:
+            for phase in stats.phases:
+                print(f"Timing {phase.format()}")
+    if args.profile:
+        print(f"Profile of {args.profile} written to {args.profile_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
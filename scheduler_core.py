@@ -0,0 +1,2923 @@
+"""Qt-free scheduling core: survey import, class periods and schedule generation.
+
+Used by the desktop app (class-scheduler-app.py) and by the headless
+command line (scheduler_cli.py).
+"""
+import os
+import re
+import sys
+import math
+import time
+import bisect
+import hashlib
+import pickle
+import heapq
+import itertools
+import random
+from collections import Counter, OrderedDict, deque, namedtuple
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+DAY_PATTERN = re.compile(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)')
+BUILDING_PATTERN = re.compile(r'^Building')
+TEACH_WITH_COLUMN = "Would you like to teach with someone else?"
+CLASS_LIMIT_PATTERN = re.compile(r'^Max(imum)?\s+Classes', re.IGNORECASE)  # Per-instructor cap
+
+# Preference codes stored in the preference matrix, ordered so that
+# "eligible" checks become integer comparisons (code >= FITS)
+BLANK = 0
+DOES_NOT_FIT = 1
+OTHER = 2  # Any other non-empty answer, kept verbatim in other_values
+FITS = 3
+FIRST_CHOICE = 4
+
+PREFERENCE_CODES = {"Does Not Fit": DOES_NOT_FIT, "Fits": FITS, "First Choice": FIRST_CHOICE}
+PREFERENCE_LABELS = {BLANK: "", DOES_NOT_FIT: "Does Not Fit", FITS: "Fits", FIRST_CHOICE: "First Choice"}
+
+# Other accepted spellings of the answers, compared after normalize_answer();
+# the answer_synonyms setting adds more ({spelling: answer label})
+ANSWER_SYNONYMS = {
+    "1st choice": "First Choice",
+    "first": "First Choice",
+    "fit": "Fits",
+    "it fits": "Fits",
+    "doesn't fit": "Does Not Fit",
+    "doesnt fit": "Does Not Fit",
+    "not a fit": "Does Not Fit",
+}
+
+SMALL_FRAME_ROWS = 64  # Below this, PreferenceMatrix encodes row by row
+
+# Bump whenever the PreferenceMatrix encoding or saved layout changes; it is
+# part of the import cache key, so older cache entries stop matching
+PARSER_VERSION = 5
+
+
+class Cancelled(Exception):
+    """Raised from a progress callback to abandon the running operation."""
+
+
+def row_hashes(df):
+    """One 64-bit content hash per row, for matching rows across exports of a sheet.
+    
+    Columns are hashed by name in sorted order and as text, with blanks
+    empty and integral floats written as integers, so reordered columns or
+    a column turning float because of a new blank do not register as changes.
+    """
+    normalized = {}
+    for column in sorted(df.columns, key=str):
+        values = df[column]
+        if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+            values = values.astype("Int64")
+        normalized[str(column)] = values.astype(str).where(values.notna(), "")
+    return pd.util.hash_pandas_object(pd.DataFrame(normalized, index=df.index), index=False).to_numpy()
+
+
+def normalize_answer(value):
+    # Case, surrounding or repeated whitespace and curly apostrophes do not matter
+    return " ".join(str(value).replace("\u2019", "'").split()).casefold()
+
+
+def answer_codes(synonyms=None):
+    """normalize_answer() spelling -> preference code, for the labels, ANSWER_SYNONYMS and synonyms."""
+    codes = {normalize_answer(label): code for label, code in PREFERENCE_CODES.items()}
+    for spelling, label in dict(ANSWER_SYNONYMS, **(synonyms or {})).items():
+        if label not in PREFERENCE_CODES:
+            raise ValueError(f"Unknown answer for synonym {spelling!r}: {label}")
+        codes[normalize_answer(spelling)] = PREFERENCE_CODES[label]
+    return codes
+
+
+def parse_answer_synonyms(text):
+    """Parse "Available=Fits; Preferred=First Choice" into an answer_synonyms setting."""
+    labels = {normalize_answer(label): label for label in PREFERENCE_CODES}
+    synonyms = {}
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        spelling, _, label = part.partition("=")
+        if normalize_answer(label) not in labels or not spelling.strip():
+            raise ValueError(f"Invalid synonym: {part.strip()} (expected text=First Choice, Fits or Does Not Fit)")
+        synonyms[spelling.strip()] = labels[normalize_answer(label)]
+    return synonyms
+
+
+def is_class_column(column):
+    return isinstance(column, str) and DAY_PATTERN.match(column) is not None
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _compact_frame(df, class_columns):
+    # The survey columns other than the class periods (those live in the
+    # codes), with repetitive text columns stored as categoricals
+    frame = df.drop(columns=class_columns).reset_index(drop=True)
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_string_dtype(values.dtype) and values.nunique() <= len(values) // 2:
+            frame[column] = values.astype("category")
+    return frame
+
+
+class PreferenceMatrix:
+    """Survey answers encoded once per DataFrame as a people x class periods int8 matrix.
+    
+    The class period answers exist only as codes (plus the rare OTHER text);
+    the remaining survey columns are kept once, in a shared compact frame,
+    and record() puts a full row back together on demand.  Answers are
+    matched ignoring case and spacing, through answer_codes(synonyms).
+    """
+
+    # Arrays written by save() as .npy files, and the attributes pickled next to them
+    SAVED_ARRAYS = ["codes", "data_points", "row_hashes"]
+    SAVED_FIELDS = ["columns", "class_columns", "ids", "other_values", "buildings", "teach_with", "class_limits",
+                    "synonyms"]
+    
+    # Per-row fields read from optional columns, and their value when a sheet lacks the column
+    ROW_FIELD_DEFAULTS = {"buildings": None, "teach_with": "No Preference", "class_limits": None}
+    
+    def __init__(self, df, progress=None, synonyms=None):
+        self.synonyms = dict(synonyms or {})
+        
+        # Classify the columns once instead of once per row; period names are
+        # interned so every dict keyed by them shares one string per period
+        self.columns = [_intern(col) for col in df.columns]
+        self.class_columns = [col for col in self.columns if is_class_column(col)]
+        
+        self.ids = self._read_ids(df)
+        self._build_indexes()
+        
+        self.codes, self.other_values = self._encode(df, progress)
+        if progress:
+            progress("Indexing rows", 0, 0)
+        for name, values in self._row_fields(df).items():
+            setattr(self, name, values)
+        self.data_points = self._count_data_points(df)
+        # For diffing a later export, see diff_matrices.  A handful of rows
+        # (add_student and the like) is hashed only once the hashes are read
+        if len(df) <= SMALL_FRAME_ROWS:
+            self._row_hashes = np.zeros(len(df), dtype=np.uint64)
+            self._unhashed = [(0, df)]
+        else:
+            self.row_hashes = row_hashes(df)
+        
+        self._frame = _compact_frame(df, self.class_columns)
+        self._frame_path = None
+        self._pending_frames = []  # Rows added by append(), not yet concatenated
+    
+    @staticmethod
+    def _read_ids(df):
+        ids = df['ID'].tolist() if 'ID' in df.columns else ['Unknown'] * len(df)
+        return [str(value) for value in ids]
+    
+    def _encode(self, df, progress=None):
+        # Each distinct answer is normalized and looked up once: a column is
+        # factorized as a Categorical, its few categories are coded, and the
+        # codes are gathered in one take.  Returns the codes and the OTHER
+        # answers keyed by (row, column).
+        lookup = answer_codes(self.synonyms)
+        known = {}  # Raw answer -> code, shared by all columns
+        
+        def code_for(value):
+            code = known.get(value)
+            if code is None:
+                text = normalize_answer(value)
+                code = known[value] = lookup.get(text, OTHER) if text else BLANK
+            return code
+        
+        codes = np.zeros((len(df), len(self.class_columns)), dtype=np.int8)
+        other_values = {}  # (row, column) -> raw answer for OTHER codes
+        if len(df) <= SMALL_FRAME_ROWS:
+            # A handful of rows (incremental changes): plain lookups beat
+            # factorizing every column by orders of magnitude
+            block = df.reindex(columns=self.class_columns).to_numpy(dtype=object)
+            for (row, j), value in np.ndenumerate(block):
+                if value is None or (isinstance(value, float) and value != value):
+                    continue
+                code = codes[row, j] = code_for(value)
+                if code == OTHER:
+                    other_values[(row, j)] = value
+            return codes, other_values
+        for j, column in enumerate(self.class_columns):
+            if progress:
+                progress("Encoding preferences", j, len(self.class_columns))
+            values = pd.Categorical(df[column])
+            # Missing answers have category code -1, which picks the trailing BLANK
+            table = np.array([code_for(value) for value in values.categories] + [BLANK], dtype=np.int8)
+            column_codes = table[values.codes]
+            other_rows = np.flatnonzero(column_codes == OTHER)
+            if len(other_rows):
+                raw = df[column].to_numpy()
+                for row in other_rows:
+                    other_values[(int(row), j)] = raw[row]
+            codes[:, j] = column_codes
+        return codes, other_values
+    
+    def unrecognized_answers(self):
+        """Class period answers that matched no preference (coded OTHER) as {answer: count}, most common first."""
+        counts = Counter(str(value) for (row, _), value in self.other_values.items() if self.ids[row] is not None)
+        return dict(counts.most_common())
+    
+    def describe_unrecognized(self, limit=5):
+        # "" when every answer was recognized
+        answers = self.unrecognized_answers()
+        if not answers:
+            return ""
+        shown = [f"{answer!r} ({count})" for answer, count in list(answers.items())[:limit]]
+        if len(answers) > limit:
+            shown.append(f"{len(answers) - limit} more")
+        return f"{sum(answers.values())} unrecognized answers: {', '.join(shown)}"
+    
+    @staticmethod
+    def _row_fields(df):
+        fields = {}
+        
+        # Building assignment - the last Building* column wins
+        building_columns = [col for col in df.columns if isinstance(col, str) and BUILDING_PATTERN.match(col)]
+        fields["buildings"] = [_intern(value) for value in df[building_columns[-1]]] if building_columns else None
+        
+        if TEACH_WITH_COLUMN in df.columns:
+            answers = df[TEACH_WITH_COLUMN].where(df[TEACH_WITH_COLUMN].notna(), "No Preference")
+            fields["teach_with"] = [_intern(value) for value in answers]
+        else:
+            fields["teach_with"] = None
+        
+        # Optional per-person class cap; blanks and non-numbers fall back to the setting
+        limit_columns = [col for col in df.columns if isinstance(col, str) and CLASS_LIMIT_PATTERN.match(col)]
+        if limit_columns:
+            limits = pd.to_numeric(df[limit_columns[-1]], errors="coerce")
+            fields["class_limits"] = [None if pd.isna(value) else max(0, int(value)) for value in limits]
+        else:
+            fields["class_limits"] = None
+        return fields
+    
+    @staticmethod
+    def _count_data_points(df):
+        # Answered questions per row, excluding the ID and Building columns
+        other_columns = [col for col in df.columns if col not in ['ID', 'Building']]
+        return df[other_columns].notna().sum(axis=1).to_numpy()
+    
+    def take(self, rows):
+        """A new matrix holding copies of the given rows, e.g. the changed rows of a re-import."""
+        part = PreferenceMatrix.__new__(PreferenceMatrix)
+        part.columns = self.columns
+        part.class_columns = self.class_columns
+        part.synonyms = self.synonyms
+        part.ids = [self.ids[row] for row in rows]
+        part._build_indexes()
+        
+        part.codes = np.array(self.codes[rows])
+        part.data_points = np.array(self.data_points[rows])
+        part.row_hashes = np.array(self.row_hashes[rows])
+        position = {row: k for k, row in enumerate(rows)}
+        part.other_values = {(position[row], j): value for (row, j), value in self.other_values.items()
+                             if row in position}
+        for name in self.ROW_FIELD_DEFAULTS:
+            values = getattr(self, name)
+            setattr(part, name, None if values is None else [values[row] for row in rows])
+        
+        part._frame = self.frame.iloc[rows].reset_index(drop=True)
+        part._frame_path = None
+        part._pending_frames = []
+        return part
+    
+    def append(self, other):
+        """Add the rows of another matrix (or a DataFrame) as the newest rows; returns their row numbers.
+        
+        An ID that is already present is superseded (later rows win), so
+        this is also how a person's answers are updated.  Codes are copied
+        across by period name; periods this matrix does not have are dropped.
+        """
+        if isinstance(other, pd.DataFrame):
+            other = PreferenceMatrix(other, synonyms=self.synonyms)
+        first_row = len(self.ids)
+        count = len(other.ids)
+        rows = list(range(first_row, first_row + count))
+        
+        codes = np.zeros((count, len(self.class_columns)), dtype=np.int8)
+        columns = {}  # other's column -> this matrix's column
+        for k, column in enumerate(other.class_columns):
+            j = self.column_index.get(column)
+            if j is not None:
+                codes[:, j] = other.codes[:, k]
+                columns[k] = j
+        for (row, k), value in other.other_values.items():
+            if k in columns:
+                self.other_values[(first_row + row, columns[k])] = value
+        self.codes = np.concatenate([self.codes, codes])
+        self.data_points = np.concatenate([self.data_points, other.data_points])
+        self._row_hashes = np.concatenate([self._row_hashes, other._row_hashes])
+        self._unhashed += [(first_row + row, df) for row, df in other._unhashed]
+        self._pending_frames.append(other.frame)
+        known = set(self.columns)
+        self.columns = self.columns + [col for col in other.columns
+                                       if col not in known and not is_class_column(col)]
+        
+        for name, default in self.ROW_FIELD_DEFAULTS.items():
+            current, values = getattr(self, name), getattr(other, name)
+            if current is None and values is None:
+                continue
+            if current is None:
+                current = [default] * first_row
+            setattr(self, name, list(current) + (values if values is not None else [default] * count))
+        
+        for row, person_id in zip(rows, other.ids):
+            self.ids.append(person_id)
+            if person_id is not None:
+                self._index_row(person_id, row)
+        return rows
+    
+    @property
+    def row_hashes(self):
+        for first_row, df in self._unhashed:
+            self._row_hashes[first_row:first_row + len(df)] = row_hashes(df)
+        self._unhashed = []
+        return self._row_hashes
+    
+    @row_hashes.setter
+    def row_hashes(self, values):
+        self._row_hashes = values
+        self._unhashed = []  # (first row, DataFrame) blocks whose hashes are still zero
+    
+    def remove(self, person_id):
+        # Rows stay in place (row numbers are held by Student/Instructor views);
+        # the ID is blanked out so the person no longer resolves
+        row = self.row_index.pop(person_id, None)
+        if row is not None:
+            self.ids[row] = None
+    
+    def _index_row(self, person_id, row):
+        # Later rows win on duplicate IDs, as they did when rows overwrote the
+        # dict; the row they replace is blanked out, so only one row has the ID
+        previous = self.row_index.get(person_id)
+        if previous is not None:
+            self.ids[previous] = None
+        self.row_index[person_id] = row
+    
+    def _build_indexes(self):
+        self.column_index = {col: j for j, col in enumerate(self.class_columns)}
+        self.row_index = {}
+        for row, person_id in enumerate(self.ids):
+            if person_id is not None:
+                self._index_row(person_id, row)
+    
+    @property
+    def frame(self):
+        # Raw survey columns; read lazily for matrices loaded from disk, with
+        # rows added by append() concatenated on first access
+        if self._frame is None and self._frame_path is not None:
+            self._frame = pd.read_pickle(self._frame_path)
+        if self._pending_frames:
+            self._frame = pd.concat([self._frame] + self._pending_frames, ignore_index=True)
+            self._pending_frames = []
+        return self._frame
+    
+    def save(self, directory):
+        for name in self.SAVED_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.pickle"), "wb") as f:
+            pickle.dump({name: getattr(self, name) for name in self.SAVED_FIELDS}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        self.frame.to_pickle(os.path.join(directory, "frame.pickle"))
+    
+    @classmethod
+    def load(cls, directory):
+        """Read a matrix written by save(); the arrays are memory-mapped, not copied."""
+        matrix = cls.__new__(cls)
+        with open(os.path.join(directory, "meta.pickle"), "rb") as f:
+            for name, value in pickle.load(f).items():
+                setattr(matrix, name, value)
+        for name in cls.SAVED_ARRAYS:
+            setattr(matrix, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+        matrix._frame = None
+        matrix._pending_frames = []
+        matrix._frame_path = os.path.join(directory, "frame.pickle")
+        matrix._build_indexes()
+        return matrix
+    
+    def __getstate__(self):
+        # Worker processes only need the encoded data, not the raw survey frame
+        state = self.__dict__.copy()
+        state["_frame"] = None
+        state["_pending_frames"] = []
+        return state
+    
+    def record(self, row):
+        """The full survey row as {column: value}, class periods decoded (blank answers are NaN)."""
+        values = self.frame.iloc[row].to_dict()
+        record = {}
+        for column in self.columns:
+            j = self.column_index.get(column)
+            if j is None:
+                record[column] = values.get(column)
+            else:
+                record[column] = np.nan if self.codes[row, j] == BLANK else self.label(row, j)
+        return record
+    
+    def label(self, row, j):
+        code = self.codes[row, j]
+        if code == OTHER:
+            return self.other_values[(row, j)]
+        return PREFERENCE_LABELS[int(code)]
+
+
+def diff_matrices(old, new):
+    """(added, removed, changed) IDs from one import of a survey to the next, matched by ID."""
+    old_hashes = {person_id: old.row_hashes[row] for person_id, row in old.row_index.items()}
+    added = []
+    changed = []
+    for person_id, row in new.row_index.items():
+        if person_id not in old_hashes:
+            added.append(person_id)
+        elif old_hashes[person_id] != new.row_hashes[row]:
+            changed.append(person_id)
+    removed = [person_id for person_id in old.row_index if person_id not in new.row_index]
+    return added, removed, changed
+
+
+class ReimportReport(namedtuple("ReimportReport", ["added", "removed", "changed", "unchanged", "periods", "full"])):
+    """What a re-import changed; full is True when it had to replace everything."""
+    
+    __slots__ = ()
+    
+    def describe(self, kind):
+        if self.full:
+            return f"{len(self.added)} {kind} (class periods changed, fully re-imported)"
+        return (f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed, "
+                f"{self.unchanged} unchanged {kind}; {len(self.periods)} scheduled periods repaired")
+
+
+class PreferenceRow(Mapping):
+    """Read-only {class column: answer} view over one row of a PreferenceMatrix."""
+
+    __slots__ = ("matrix", "row")
+    
+    def __init__(self, matrix, row):
+        self.matrix = matrix
+        self.row = row
+    
+    def __getitem__(self, column):
+        return self.matrix.label(self.row, self.matrix.column_index[column])
+    
+    def __contains__(self, column):
+        return column in self.matrix.column_index
+    
+    def __iter__(self):
+        return iter(self.matrix.class_columns)
+    
+    def __len__(self):
+        return len(self.matrix.class_columns)
+
+
+class Student:
+    __slots__ = ("id", "matrix", "row")
+    
+    def __init__(self, student_id, matrix, row):
+        self.id = student_id
+        self.matrix = matrix
+        self.row = row
+    
+    @property
+    def classes(self):
+        # Class preferences, decoded on access
+        return PreferenceRow(self.matrix, self.row)
+    
+    @property
+    def building(self):
+        if self.matrix.buildings is None:
+            return "N/A"
+        return self.matrix.buildings[self.row]
+    
+    @property
+    def data(self):
+        return self.matrix.record(self.row)
+    
+    @property
+    def data_points(self):
+        return int(self.matrix.data_points[self.row])
+
+class Instructor:
+    __slots__ = ("id", "matrix", "row")
+    
+    def __init__(self, instructor_id, matrix, row):
+        self.id = instructor_id
+        self.matrix = matrix
+        self.row = row
+    
+    @property
+    def classes(self):
+        # Class availability, decoded on access
+        return PreferenceRow(self.matrix, self.row)
+    
+    @property
+    def available_classes(self):
+        # Every period not marked Does Not Fit, as the scheduler sees it
+        codes = self.matrix.codes[self.row]
+        return [self.matrix.class_columns[j] for j in np.flatnonzero(codes != DOES_NOT_FIT)]
+    
+    @property
+    def teach_with_preference(self):
+        if self.matrix.teach_with is None:
+            return "No Preference"
+        return self.matrix.teach_with[self.row]
+    
+    @property
+    def building(self):
+        if self.matrix.buildings is None:
+            return "N/A"
+        return self.matrix.buildings[self.row]
+    
+    @property
+    def class_limit(self):
+        # None when the sheet gives no cap, so the global setting applies
+        if self.matrix.class_limits is None:
+            return None
+        return self.matrix.class_limits[self.row]
+    
+    @property
+    def data(self):
+        return self.matrix.record(self.row)
+
+def teach_with_weight(answer):
+    # "Yes" pairs up readily, "No" never, anything else (No Preference, blank) in between
+    text = str(answer).strip().lower()
+    if text.startswith("yes"):
+        return 2
+    if re.match(r'no\b(?!\s*preference)', text):
+        return 0
+    return 1
+
+
+def _named_ids(answer):
+    return re.findall(r'[\w.-]+', str(answer))
+
+
+def _pair_weight(keen, shared, period_count):
+    # Keenness first, shared periods as the tie-breaker
+    return keen * (period_count + 1) + shared
+
+
+def co_teaching_partners(matrix):
+    """Instructor ID -> preferred co-teacher, as a greedy maximum-weight matching.
+    
+    Two instructors are connected when both are willing to co-teach and they
+    share at least one period neither marked Does Not Fit.  Edges are weighted
+    by how keen both are (naming the other's ID in the answer counts most),
+    then by the number of shared periods.  Greedy matching over the edges in
+    weight order is within half of the optimum and runs in O(E log E), which
+    stays quick with a few hundred instructors.
+    """
+    if matrix is None or matrix.teach_with is None:
+        return {}
+    ids = list(matrix.row_index.keys())
+    rows = np.fromiter(matrix.row_index.values(), dtype=np.intp, count=len(ids))
+    answers = [matrix.teach_with[row] for row in rows]
+    willing = np.array([teach_with_weight(answer) for answer in answers], dtype=np.int64)
+    
+    # Shared available periods for every pair in one matrix product
+    available = (matrix.codes[rows] != DOES_NOT_FIT).astype(np.int32)
+    shared = available @ available.T
+    
+    # Answers that name another instructor's ID
+    position = {str(instructor_id): i for i, instructor_id in enumerate(ids)}
+    named = np.zeros((len(ids), len(ids)), dtype=np.int64)
+    for i, answer in enumerate(answers):
+        for token in _named_ids(answer):
+            k = position.get(token)
+            if k is not None and k != i:
+                named[i, k] = 1
+    
+    keen = willing[:, None] + willing[None, :] + 4 * (named + named.T)
+    weight = _pair_weight(keen, shared, available.shape[1])
+    mask = (shared > 0) & (willing[:, None] > 0) & (willing[None, :] > 0)
+    first, second = np.nonzero(np.triu(mask, k=1))
+    
+    partners = {}
+    for k in np.argsort(-weight[first, second], kind="stable"):
+        a, b = ids[first[k]], ids[second[k]]
+        if a not in partners and b not in partners:
+            partners[a] = b
+            partners[b] = a
+    return partners
+
+
+def best_co_teacher(matrix, partners, instructor_id):
+    """Highest-weight unmatched partner for one instructor, as co_teaching_partners weighs them.
+    
+    Used to re-pair a single instructor after an incremental change without
+    redoing the whole matching; O(instructors x periods).
+    """
+    if matrix is None or matrix.teach_with is None:
+        return None
+    row = matrix.row_index[instructor_id]
+    willing = teach_with_weight(matrix.teach_with[row])
+    if willing == 0:
+        return None
+    others = [other_id for other_id in matrix.row_index if other_id != instructor_id and other_id not in partners]
+    if not others:
+        return None
+    rows = np.fromiter((matrix.row_index[other_id] for other_id in others), dtype=np.intp, count=len(others))
+    answers = [matrix.teach_with[other_row] for other_row in rows]
+    other_willing = np.array([teach_with_weight(answer) for answer in answers], dtype=np.int64)
+    
+    available = (matrix.codes[rows] != DOES_NOT_FIT).astype(np.int32)
+    shared = available @ (matrix.codes[row] != DOES_NOT_FIT).astype(np.int32)
+    
+    mine = set(_named_ids(matrix.teach_with[row]))
+    named = np.array([(other_id in mine) + (instructor_id in _named_ids(answer))
+                      for other_id, answer in zip(others, answers)], dtype=np.int64)
+    
+    weight = _pair_weight(willing + other_willing + 4 * named, shared, matrix.codes.shape[1])
+    weight[(shared == 0) | (other_willing == 0)] = -1
+    best = int(np.argmax(weight))
+    return others[best] if weight[best] >= 0 else None
+
+
+class PreferenceIndex:
+    """Class period -> ordered sets of student/instructor IDs per preference level.
+    
+    Built once per import from the preference matrices.  Scheduling works on
+    a copy() and discards people as they are assigned, so each lookup returns
+    only the remaining candidates.  Dicts are used as ordered sets to keep
+    candidates in import order.
+    """
+    
+    STUDENT_LEVELS = (FIRST_CHOICE, FITS)
+    
+    def __init__(self):
+        self.student_matrix = None
+        self.instructor_matrix = None
+        self.students = {}     # class_name -> {level: {student_id: None}}
+        self.instructors = {}  # class_name -> {instructor_id: None}, anything but Does Not Fit
+        self.partners = {}     # instructor_id -> co-teaching partner, see co_teaching_partners
+        self.class_limits = {} # instructor_id -> class cap from the sheet, where given
+    
+    @staticmethod
+    def _rows_in_id_order(matrix):
+        # One row per ID (the last one on duplicates), in first-seen ID order
+        ids = np.array(list(matrix.row_index.keys()), dtype=object)
+        rows = np.fromiter(matrix.row_index.values(), dtype=np.intp, count=len(ids))
+        return ids, matrix.codes[rows]
+    
+    def set_students(self, matrix):
+        self.student_matrix = matrix
+        self.students = {}
+        if matrix is None:
+            return
+        ids, codes = self._rows_in_id_order(matrix)
+        for j, class_name in enumerate(matrix.class_columns):
+            column = codes[:, j]
+            self.students[class_name] = {
+                level: dict.fromkeys(ids[column == level].tolist())
+                for level in self.STUDENT_LEVELS
+            }
+    
+    def set_instructors(self, matrix):
+        self.instructor_matrix = matrix
+        self.instructors = {}
+        self.partners = co_teaching_partners(matrix)
+        self.class_limits = {}
+        if matrix is None:
+            return
+        if matrix.class_limits is not None:
+            self.class_limits = {instructor_id: matrix.class_limits[row]
+                                 for instructor_id, row in matrix.row_index.items()
+                                 if matrix.class_limits[row] is not None}
+        ids, codes = self._rows_in_id_order(matrix)
+        for j, class_name in enumerate(matrix.class_columns):
+            self.instructors[class_name] = dict.fromkeys(ids[codes[:, j] != DOES_NOT_FIT].tolist())
+    
+    def students_for(self, class_name, level):
+        return self.students.get(class_name, {}).get(level, {})
+    
+    def instructors_for(self, class_name):
+        return self.instructors.get(class_name, {})
+    
+    def count_students(self, class_name):
+        levels = self.students.get(class_name, {})
+        return sum(len(levels.get(level, ())) for level in self.STUDENT_LEVELS)
+    
+    def discard_student(self, student_id):
+        # Only the periods this student marked need touching
+        matrix = self.student_matrix
+        row = matrix.row_index[student_id]
+        for j in np.flatnonzero(matrix.codes[row] >= FITS):
+            level = int(matrix.codes[row, j])
+            self.students[matrix.class_columns[j]][level].pop(student_id, None)
+    
+    def add_student(self, student_id):
+        # Index the student's current matrix row; they go last in import order
+        matrix = self.student_matrix
+        row = matrix.row_index[student_id]
+        for j in np.flatnonzero(matrix.codes[row] >= FITS):
+            level = int(matrix.codes[row, j])
+            self.students[matrix.class_columns[j]][level][student_id] = None
+    
+    def add_instructor(self, instructor_id):
+        matrix = self.instructor_matrix
+        row = matrix.row_index[instructor_id]
+        for j in np.flatnonzero(matrix.codes[row] != DOES_NOT_FIT):
+            self.instructors[matrix.class_columns[j]][instructor_id] = None
+        self.class_limits.pop(instructor_id, None)
+        if matrix.class_limits is not None and matrix.class_limits[row] is not None:
+            self.class_limits[instructor_id] = matrix.class_limits[row]
+    
+    def unpair(self, instructor_id):
+        # Returns the former partner, now unmatched
+        partner = self.partners.pop(instructor_id, None)
+        if partner is not None:
+            self.partners.pop(partner, None)
+        return partner
+    
+    def pair(self, instructor_id):
+        partner = best_co_teacher(self.instructor_matrix, self.partners, instructor_id)
+        if partner is not None:
+            self.partners[instructor_id] = partner
+            self.partners[partner] = instructor_id
+    
+    def class_limit(self, instructor_id, settings):
+        return self.class_limits.get(instructor_id, settings["max_classes_per_instructor"])
+    
+    def discard_instructor(self, instructor_id):
+        matrix = self.instructor_matrix
+        row = matrix.row_index[instructor_id]
+        for j in np.flatnonzero(matrix.codes[row] != DOES_NOT_FIT):
+            self.instructors[matrix.class_columns[j]].pop(instructor_id, None)
+    
+    def subset(self, student_ids, instructor_ids):
+        """Index restricted to the given people, e.g. one building's partition."""
+        index = PreferenceIndex()
+        index.student_matrix = self.student_matrix
+        index.instructor_matrix = self.instructor_matrix
+        index.students = {
+            class_name: {level: {student_id: None for student_id in ids if student_id in student_ids}
+                         for level, ids in levels.items()}
+            for class_name, levels in self.students.items()
+        }
+        index.instructors = {
+            class_name: {instructor_id: None for instructor_id in ids if instructor_id in instructor_ids}
+            for class_name, ids in self.instructors.items()
+        }
+        index.partners = {a: b for a, b in self.partners.items() if a in instructor_ids and b in instructor_ids}
+        index.class_limits = self.class_limits
+        return index
+    
+    def copy(self):
+        index = PreferenceIndex()
+        index.student_matrix = self.student_matrix
+        index.instructor_matrix = self.instructor_matrix
+        index.students = {
+            class_name: {level: ids.copy() for level, ids in levels.items()}
+            for class_name, levels in self.students.items()
+        }
+        index.instructors = {class_name: ids.copy() for class_name, ids in self.instructors.items()}
+        index.partners = self.partners  # Read-only while scheduling
+        index.class_limits = self.class_limits
+        return index
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MINUTES_PER_DAY = 24 * 60
+
+_CLOCK = r'(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?\s*(?:m\b\.?)?'
+SLOT_DAY_PATTERN = re.compile(r'^\s*(\w+)\b')
+# Searched for anywhere after the day, so "Monday Art 1:00pm-3:00pm" reads too
+SLOT_TIME_PATTERN = re.compile(r'\b' + _CLOCK + r'\s*(?:-|\u2013|\u2014|to)\s*' + _CLOCK, re.IGNORECASE)
+
+
+class TimeSlot(namedtuple("TimeSlot", ["day", "start", "end"])):
+    """Weekday index plus start/end in minutes since midnight.
+    
+    week_start/week_end place the slot on a single weekly timeline
+    (Monday 00:00 = 0), which is what sorting and overlap checks use.
+    """
+    __slots__ = ()
+    
+    @property
+    def week_start(self):
+        return self.day * MINUTES_PER_DAY + self.start
+    
+    @property
+    def week_end(self):
+        return self.day * MINUTES_PER_DAY + self.end
+    
+    def overlaps(self, other):
+        return self.week_start < other.week_end and other.week_start < self.week_end
+
+
+def _minutes(hour, minute, meridiem):
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem == "p" else 0)
+    return hour * 60 + minute
+
+
+def format_minutes(minutes):
+    hour, minute = divmod(minutes % MINUTES_PER_DAY, 60)
+    return f"{hour % 12 or 12}:{minute:02d}{'am' if hour < 12 else 'pm'}"
+
+
+_interned_slots = {}
+
+
+@lru_cache(maxsize=None)
+def parse_time_slot(header):
+    """TimeSlot for a "Day start-end" column header, or None if it has no readable time.
+    
+    Accepts "Monday 1:00pm-3:00pm", "Monday 1PM-3PM", "Monday 1:00 pm - 3:00 pm",
+    "Monday 13:00-15:00" and "Monday 1-3pm", with or without other text
+    (e.g. "Monday - Art 1:00pm-3:00pm") between the day and the time.
+    Memoized per header, and equal slots are interned so every period at the
+    same time shares one object.
+    """
+    day_match = SLOT_DAY_PATTERN.match(header)
+    if not day_match:
+        return None
+    day = day_match.group(1).capitalize()
+    if day not in DAYS:
+        return None
+    match = SLOT_TIME_PATTERN.search(header, day_match.end())
+    if not match:
+        return None
+    
+    start_hour, start_minute, start_meridiem = match.group(1), match.group(2), match.group(3)
+    end_hour, end_minute, end_meridiem = match.group(4), match.group(5), match.group(6)
+    start_hour, end_hour = int(start_hour), int(end_hour)
+    start_minute, end_minute = int(start_minute or 0), int(end_minute or 0)
+    start_meridiem = start_meridiem.lower() if start_meridiem else None
+    end_meridiem = end_meridiem.lower() if end_meridiem else None
+    if start_hour > 24 or end_hour > 24 or start_minute > 59 or end_minute > 59:
+        return None
+    
+    end = _minutes(end_hour, end_minute, end_meridiem or start_meridiem)
+    if start_meridiem or not end_meridiem:
+        start = _minutes(start_hour, start_minute, start_meridiem)
+    else:
+        # "1-3pm" shares the end's am/pm, "11-1pm" starts in the morning
+        start = _minutes(start_hour, start_minute, end_meridiem)
+        if start > end:
+            start = _minutes(start_hour, start_minute, "a")
+    if end <= start:
+        end += MINUTES_PER_DAY  # Runs past midnight
+    
+    slot = TimeSlot(DAYS.index(day), start, end)
+    return _interned_slots.setdefault(slot, slot)
+
+
+class ClassPeriod:
+    def __init__(self, name):
+        self.name = name
+        self.students = []
+        self.instructors = []
+        self.day = name.split()[0] if " " in name else ""
+        
+        # Normalized time, shared with every other period at the same time
+        self.slot = parse_time_slot(name)
+        if self.slot:
+            self.start_time = format_minutes(self.slot.start)
+            self.end_time = format_minutes(self.slot.end)
+        else:
+            self.start_time = ""
+            self.end_time = ""
+    
+    @property
+    def sort_key(self):
+        # Weekly timeline order; periods without a readable time go last
+        if self.slot is None:
+            return (1, 0, 0, self.name)
+        return (0, self.slot.week_start, self.slot.week_end, self.name)
+
+
+class IntervalIndex:
+    """Class periods sorted by weekly start minute for overlap queries.
+    
+    A query bisects the start times, and because no period is longer than
+    max_length only periods starting in [start - max_length, end) need
+    checking: O(log n + m) for m periods starting in that window.
+    """
+    
+    def __init__(self, classes):
+        items = sorted((class_obj.slot.week_start, class_obj.slot.week_end, class_name)
+                       for class_name, class_obj in classes.items() if class_obj.slot)
+        self.starts = [start for start, _, _ in items]
+        self.ends = [end for _, end, _ in items]
+        self.names = [class_name for _, _, class_name in items]
+        self.max_length = max((end - start for start, end, _ in items), default=0)
+    
+    def overlapping(self, start, end):
+        """Names of the periods overlapping [start, end) in weekly minutes."""
+        lo = bisect.bisect_right(self.starts, start - self.max_length)
+        hi = bisect.bisect_left(self.starts, end)
+        return [self.names[i] for i in range(lo, hi) if self.ends[i] > start]
+    
+    def overlapping_slot(self, slot):
+        return self.overlapping(slot.week_start, slot.week_end)
+
+
+class ScheduledClass:
+    """One row of the generated schedule."""
+
+    __slots__ = ("class_name", "instructor_ids", "student_ids", "section", "building", "room", "status")
+    
+    def __init__(self, class_name, instructor_ids, student_ids, section=None):
+        self.class_name = class_name
+        self.instructor_ids = list(instructor_ids)
+        self.student_ids = list(student_ids)
+        self.section = section  # 1, 2, ... when the period runs as parallel sections
+        self.building = None    # Set when buildings are scheduled separately
+        self.room = "TBD"
+        self.status = "Scheduled"
+    
+    def copy(self):
+        scheduled = ScheduledClass(self.class_name, self.instructor_ids, self.student_ids, self.section)
+        scheduled.building = self.building
+        scheduled.room = self.room
+        scheduled.status = self.status
+        return scheduled
+    
+    @property
+    def title(self):
+        details = []
+        if self.building is not None:
+            details.append(str(self.building))
+        if self.section is not None:
+            details.append(f"Section {self.section}")
+        if not details:
+            return self.class_name
+        return f"{self.class_name} ({', '.join(details)})"
+
+
+INSTRUCTOR_CLASS_LIMIT = 2  # Default maximum number of classes per instructor
+INFINITY = float("inf")
+
+
+class Occupancy:
+    """Weekly time already booked for one person.
+    
+    Booked slots never overlap each other, so sorted by start their ends are
+    sorted too and only the last slot starting before a candidate's end can
+    reach into it: conflicts() is a single bisect.  A period without a
+    readable time is treated as clashing with everything.
+    """
+    __slots__ = ("starts", "ends", "unknown")
+    
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.unknown = 0
+    
+    def __len__(self):
+        return len(self.starts) + self.unknown
+    
+    def conflicts(self, slot):
+        if slot is None or self.unknown:
+            return len(self) > 0
+        i = bisect.bisect_left(self.starts, slot.week_end)
+        return i > 0 and self.ends[i - 1] > slot.week_start
+    
+    def add(self, slot):
+        if slot is None:
+            self.unknown += 1
+            return
+        i = bisect.bisect_left(self.starts, slot.week_start)
+        self.starts.insert(i, slot.week_start)
+        self.ends.insert(i, slot.week_end)
+    
+    def remove(self, slot):
+        if slot is None:
+            self.unknown -= 1
+            return
+        i = bisect.bisect_left(self.starts, slot.week_start)
+        del self.starts[i]
+        del self.ends[i]
+
+
+def conflict_groups(class_names, classes):
+    """Split periods into runs of overlapping times; at most one per run can be taken."""
+    timed = sorted((classes[class_name].slot, class_name) for class_name in class_names
+                   if classes[class_name].slot is not None)
+    if len(timed) < len(class_names):
+        return [list(class_names)]  # Unreadable times clash with everything
+    groups = []
+    group_end = None
+    for slot, class_name in timed:
+        if group_end is not None and slot.week_start < group_end:
+            groups[-1].append(class_name)
+            group_end = max(group_end, slot.week_end)
+        else:
+            groups.append([class_name])
+            group_end = slot.week_end
+    return groups
+
+
+def sorted_class_periods(classes):
+    # Class periods in weekday/start time order
+    return sorted(classes.items(), key=lambda x: x[1].sort_key)
+
+
+class InstructorLoads:
+    """Classes per instructor, with a lazily maintained min-heap per period.
+    
+    Each period's heap holds (load, import position, instructor_id) entries
+    and is built on first use.  Loads only grow during a run, so instead of
+    updating every heap an instructor appears in, a stale entry is re-keyed
+    when it reaches the top and a full instructor is dropped there.  Picking
+    the least-loaded eligible instructor is then O(log n) amortized instead
+    of a sort of the whole candidate list per period.  Instructors already
+    teaching at an overlapping time are skipped but stay in the heap.
+    """
+    
+    def __init__(self, preferences, settings):
+        self.preferences = preferences
+        self.settings = settings
+        self.load = Counter()
+        self.teaching = {}  # instructor_id -> Occupancy
+        self._heaps = {}
+    
+    def is_free(self, instructor_id):
+        return self.load[instructor_id] < self.preferences.class_limit(instructor_id, self.settings)
+    
+    def is_free_at(self, instructor_id, slot):
+        return (self.is_free(instructor_id)
+                and (instructor_id not in self.teaching or not self.teaching[instructor_id].conflicts(slot)))
+    
+    def _heap(self, class_name):
+        heap = self._heaps.get(class_name)
+        if heap is None:
+            heap = [(self.load[instructor_id], position, instructor_id)
+                    for position, instructor_id in enumerate(self.preferences.instructors_for(class_name))]
+            heapq.heapify(heap)
+            self._heaps[class_name] = heap
+        return heap
+    
+    def _settle(self, heap):
+        # Bring a current, non-full entry to the top; False when none is left
+        while heap:
+            load, position, instructor_id = heap[0]
+            if not self.is_free(instructor_id):
+                heapq.heappop(heap)
+            elif self.load[instructor_id] != load:
+                heapq.heapreplace(heap, (self.load[instructor_id], position, instructor_id))
+            else:
+                return True
+        return False
+    
+    def has_available(self, class_name, slot=None):
+        return bool(self.select(class_name, 1, slot, book=False))
+    
+    def select(self, class_name, count, slot=None, book=True):
+        """Book up to count least-loaded instructors free at slot, each followed by their co-teaching partner."""
+        heap = self._heap(class_name)
+        available = self.preferences.instructors_for(class_name)
+        selected = []
+        popped = []
+        while len(selected) < count and self._settle(heap):
+            entry = heapq.heappop(heap)
+            popped.append(entry)
+            instructor_id = entry[2]
+            if instructor_id in selected or not self.is_free_at(instructor_id, slot):
+                continue
+            selected.append(instructor_id)
+            partner = self.preferences.partners.get(instructor_id)
+            if (len(selected) < count and partner in available and partner not in selected
+                    and self.is_free_at(partner, slot)):
+                selected.append(partner)
+        if book:
+            for instructor_id in selected:
+                self.load[instructor_id] += 1
+                self.teaching.setdefault(instructor_id, Occupancy()).add(slot)
+        # Popped entries go back and are re-keyed (or dropped) on their next visit
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return selected
+
+
+def greedy_schedule(classes, preferences, settings, progress=None):
+    """Single pass over the periods in day/time order, filling each from the remaining candidates."""
+    schedule = []
+    
+    # Work on a copy of the index; people are discarded from it once fully booked
+    candidates = preferences.copy()
+    instructor_loads = InstructorLoads(candidates, settings)
+    booked = {}  # student_id -> Occupancy, for students with at least one class
+    max_classes = settings["max_classes_per_student"]
+    
+    def free(student_id, slot):
+        return student_id not in booked or not booked[student_id].conflicts(slot)
+    
+    periods = sorted_class_periods(classes)
+    for position, (class_name, class_obj) in enumerate(periods):
+        if progress:
+            progress("Scheduling classes", position, len(periods))
+        
+        # Get potential students for this class who are free at this time
+        slot = class_obj.slot
+        first_choice_students = [student_id for student_id in candidates.students_for(class_name, FIRST_CHOICE)
+                                 if free(student_id, slot)]
+        fits_students = [student_id for student_id in candidates.students_for(class_name, FITS)
+                         if free(student_id, slot)]
+        
+        # Check if we have enough students and instructors (those below their class limit)
+        total_potential_students = len(first_choice_students) + len(fits_students)
+        
+        if (total_potential_students >= settings["min_students_per_class"] and 
+            instructor_loads.has_available(class_name, slot)):
+            
+            # Assign the least-loaded instructors (up to max_instructors_per_class),
+            # seating the lead instructor's co-teaching partner next when available
+            selected_instructors = instructor_loads.select(class_name, settings["max_instructors_per_class"], slot)
+            
+            # First prioritize First Choice students
+            selected_students = first_choice_students
+            
+            # If we need more students, add from Fits category
+            if len(selected_students) < settings["max_students_per_class"]:
+                remaining_slots = settings["max_students_per_class"] - len(selected_students)
+                selected_students.extend(fits_students[:remaining_slots])
+            
+            # If we have too many students, cap at maximum
+            if len(selected_students) > settings["max_students_per_class"]:
+                selected_students = selected_students[:settings["max_students_per_class"]]
+            
+            # Book these students; full ones leave the candidate pool
+            for student_id in selected_students:
+                occupancy = booked.setdefault(student_id, Occupancy())
+                occupancy.add(slot)
+                if len(occupancy) >= max_classes:
+                    candidates.discard_student(student_id)
+            
+            schedule.append(ScheduledClass(class_name, selected_instructors, selected_students))
+    
+    return schedule
+
+
+class MinCostFlow:
+    """Min-cost max-flow over integer edge costs.
+    
+    Primal-dual method: Dijkstra with node potentials finds the current
+    shortest distance, then a Dinic blocking flow saturates every shortest
+    augmenting path at that distance at once.  Polynomial, and the number
+    of phases stays small when costs are small integers as they are here.
+    """
+    
+    def __init__(self, node_count):
+        self.node_count = node_count
+        self.graph = [[] for _ in range(node_count)]  # node -> edge ids
+        self.to = []
+        self.capacity = []
+        self.cost = []
+    
+    def add_edge(self, u, v, capacity, cost):
+        # Edge ids come in pairs: e is forward, e ^ 1 its residual
+        edge = len(self.to)
+        self.to += [v, u]
+        self.capacity += [capacity, 0]
+        self.cost += [cost, -cost]
+        self.graph[u].append(edge)
+        self.graph[v].append(edge + 1)
+        return edge
+    
+    def flow(self, edge):
+        return self.capacity[edge ^ 1]
+    
+    def solve(self, source, sink, on_phase=None):
+        n = self.node_count
+        to, capacity, cost, graph = self.to, self.capacity, self.cost, self.graph
+        potential = [0] * n  # Valid start: every initial cost is non-negative
+        total_flow = total_cost = 0
+        
+        while True:
+            # Shortest distances on reduced costs
+            dist = [INFINITY] * n
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                pu = potential[u]
+                for e in graph[u]:
+                    if capacity[e] > 0:
+                        v = to[e]
+                        nd = d + cost[e] + pu - potential[v]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            heapq.heappush(heap, (nd, v))
+            if dist[sink] == INFINITY:
+                break
+            
+            # Clamping at dist[sink] keeps every reduced cost non-negative
+            limit = dist[sink]
+            for v in range(n):
+                potential[v] += min(dist[v], limit)
+            
+            # Saturate all zero reduced cost paths at this distance
+            while True:
+                level = self._admissible_levels(source, potential)
+                if level[sink] < 0:
+                    break
+                pushed = self._blocking_flow(source, sink, level, potential)
+                if not pushed:
+                    break
+                total_flow += pushed
+            
+            if on_phase:
+                on_phase(total_flow)
+        
+        for e in range(0, len(to), 2):
+            total_cost += self.flow(e) * cost[e]
+        return total_flow, total_cost
+    
+    def _admissible(self, e, u, potential):
+        return self.capacity[e] > 0 and self.cost[e] + potential[u] - potential[self.to[e]] == 0
+    
+    def _admissible_levels(self, source, potential):
+        level = [-1] * self.node_count
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for e in self.graph[u]:
+                v = self.to[e]
+                if level[v] < 0 and self._admissible(e, u, potential):
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level
+    
+    def _blocking_flow(self, source, sink, level, potential):
+        to, capacity, graph = self.to, self.capacity, self.graph
+        next_edge = [0] * self.node_count
+        pushed = 0
+        
+        # Iterative DFS; paths can zigzag through many residual edges
+        path = []
+        u = source
+        while True:
+            if u == sink:
+                amount = min(capacity[e] for e in path)
+                for e in path:
+                    capacity[e] -= amount
+                    capacity[e ^ 1] += amount
+                pushed += amount
+                path = []
+                u = source
+                continue
+            edges = graph[u]
+            while next_edge[u] < len(edges):
+                e = edges[next_edge[u]]
+                if level[to[e]] == level[u] + 1 and self._admissible(e, u, potential):
+                    break
+                next_edge[u] += 1
+            if next_edge[u] < len(edges):
+                e = edges[next_edge[u]]
+                path.append(e)
+                u = to[e]
+            elif u == source:
+                return pushed
+            else:
+                # Dead end: retreat and skip the edge that led here
+                level[u] = -1
+                e = path.pop()
+                u = to[e ^ 1]
+                next_edge[u] += 1
+
+
+def _staff_periods(periods, classes, preferences, settings, progress=None):
+    """Give each period at least one instructor where possible, then fill up to the maximum."""
+    instructors = {}  # instructor_id -> [available periods]
+    for class_name in periods:
+        for instructor_id in preferences.instructors_for(class_name):
+            instructors.setdefault(instructor_id, []).append(class_name)
+    
+    # As for students in _place_students, each run of overlapping periods an
+    # instructor could teach gets a capacity 1 node, so nobody is booked twice
+    # at the same time
+    groups = {instructor_id: [run for run in conflict_groups(available, classes) if len(run) > 1]
+              for instructor_id, available in instructors.items()}
+    
+    source, sink = 0, 1
+    period_nodes = {class_name: 2 + i for i, class_name in enumerate(periods)}
+    first_instructor = len(periods) + 2
+    first_group = first_instructor + len(instructors)
+    flow = MinCostFlow(first_group + sum(len(runs) for runs in groups.values()))
+    
+    # Each further class costs an instructor more than the spread of the
+    # preference costs below, so the load is spread before preferences count
+    load_cost = 4
+    for node, instructor_id in enumerate(instructors):
+        for load in range(preferences.class_limit(instructor_id, settings)):
+            flow.add_edge(source, first_instructor + node, 1, load * load_cost)
+    
+    # First instructor per period is cheap and extra ones are expensive, so a
+    # min-cost max flow staffs as many periods as possible before doubling up
+    extra_cost = 10 * len(periods) + 10
+    for class_name, period_node in period_nodes.items():
+        flow.add_edge(period_node, sink, 1, 0)
+        extra = settings["max_instructors_per_class"] - 1
+        if extra > 0:
+            flow.add_edge(period_node, sink, extra, extra_cost)
+    
+    matrix = preferences.instructor_matrix
+    edges = []
+    group_node = first_group
+    for node, (instructor_id, available) in enumerate(instructors.items()):
+        instructor_node = first_instructor + node
+        row = matrix.row_index[instructor_id]
+        run_nodes = {}
+        for run in groups[instructor_id]:
+            flow.add_edge(instructor_node, group_node, 1, 0)
+            for class_name in run:
+                run_nodes[class_name] = group_node
+            group_node += 1
+        for class_name in available:
+            # Stated preference for the period makes an instructor cheaper
+            code = matrix.codes[row, matrix.column_index[class_name]]
+            cost = 1 if code == FIRST_CHOICE else 2 if code == FITS else 3
+            edge = flow.add_edge(run_nodes.get(class_name, instructor_node), period_nodes[class_name], 1, cost)
+            edges.append((edge, instructor_id, class_name))
+    
+    on_phase = None
+    if progress:
+        on_phase = lambda flow_value: progress("Matching instructors", flow_value, len(periods))
+    flow.solve(source, sink, on_phase)
+    
+    staffed = {}
+    for edge, instructor_id, class_name in edges:
+        if flow.flow(edge):
+            staffed.setdefault(class_name, []).append(instructor_id)
+    return staffed
+
+
+def _pair_co_teachers(staffed, classes, preferences, settings):
+    # Swap each period's extra instructor for the lead's co-teaching partner
+    # when the partner is available there, free at that time and still has
+    # room for a class
+    load = Counter(instructor_id for staff in staffed.values() for instructor_id in staff)
+    teaching = {}  # instructor_id -> Occupancy
+    for class_name, staff in staffed.items():
+        for instructor_id in staff:
+            teaching.setdefault(instructor_id, Occupancy()).add(classes[class_name].slot)
+    for class_name, staff in staffed.items():
+        partner = preferences.partners.get(staff[0])
+        slot = classes[class_name].slot
+        if (partner is None or partner in staff
+                or load[partner] >= preferences.class_limit(partner, settings)
+                or partner not in preferences.instructors_for(class_name)
+                or (partner in teaching and teaching[partner].conflicts(slot))):
+            continue
+        if len(staff) < settings["max_instructors_per_class"]:
+            staff.append(partner)
+        elif len(staff) > 1:
+            replaced = staff.pop()
+            load[replaced] -= 1
+            teaching[replaced].remove(slot)
+            staff.append(partner)
+        else:
+            continue
+        load[partner] += 1
+        teaching.setdefault(partner, Occupancy()).add(slot)
+
+
+def _place_students(periods, classes, preferences, settings, progress=None):
+    # student_id -> [(class_name, level)] over the periods being filled
+    choices = {}
+    for class_name in periods:
+        for level in PreferenceIndex.STUDENT_LEVELS:
+            for student_id in preferences.students_for(class_name, level):
+                choices.setdefault(student_id, []).append((class_name, level))
+    
+    # A student may take up to max_classes_per_student periods, but only one
+    # from each run of overlapping periods: each run with more than one
+    # period gets its own capacity 1 node between student and periods.
+    # (Runs are merged overlaps, so A-B-C chains where A and C do not
+    # collide still count as one run.)
+    max_classes = settings["max_classes_per_student"]
+    groups = {}
+    group_count = 0
+    if max_classes > 1:
+        for student_id, student_choices in choices.items():
+            levels = dict(student_choices)
+            runs = [run for run in conflict_groups(list(levels), classes) if len(run) > 1]
+            groups[student_id] = [[(class_name, levels[class_name]) for class_name in run] for run in runs]
+            group_count += len(runs)
+    
+    position_of = {student_id: position for position, student_id in enumerate(choices)}
+    source, sink = 0, 1
+    period_nodes = {class_name: 2 + i for i, class_name in enumerate(periods)}
+    first_student = len(periods) + 2
+    first_group = first_student + len(choices)
+    flow = MinCostFlow(first_group + group_count)
+    
+    for period_node in period_nodes.values():
+        flow.add_edge(period_node, sink, settings["max_students_per_class"], 0)
+    
+    # First Choice costs less than Fits (unless first choice is not prioritized)
+    costs = {FIRST_CHOICE: 1, FITS: 2 if settings["prioritize_first_choice"] else 1}
+    edges = []
+    group_node = first_group
+    for position, (student_id, student_choices) in enumerate(choices.items()):
+        student_node = first_student + position
+        flow.add_edge(source, student_node, max_classes, 0)
+        
+        grouped = set()
+        for run in groups.get(student_id, ()):
+            flow.add_edge(student_node, group_node, 1, 0)
+            for class_name, level in run:
+                edge = flow.add_edge(group_node, period_nodes[class_name], 1, costs[level])
+                edges.append((edge, student_id, class_name, level))
+                grouped.add(class_name)
+            group_node += 1
+        
+        for class_name, level in student_choices:
+            if class_name not in grouped:
+                edge = flow.add_edge(student_node, period_nodes[class_name], 1, costs[level])
+                edges.append((edge, student_id, class_name, level))
+    
+    on_phase = None
+    if progress:
+        on_phase = lambda flow_value: progress("Placing students", flow_value, len(choices))
+    flow.solve(source, sink, on_phase)
+    
+    placed = {class_name: [] for class_name in periods}
+    for edge, student_id, class_name, level in edges:
+        if flow.flow(edge):
+            placed[class_name].append((-level, position_of[student_id], student_id))
+    # First Choice students first, each level in import order
+    return {class_name: [student_id for _, _, student_id in sorted(rows)]
+            for class_name, rows in placed.items()}
+
+
+def optimal_schedule(classes, preferences, settings, progress=None):
+    """Globally optimal placement of students as a min-cost max flow.
+    
+    Instructors are matched to periods first (max staffed periods, then
+    co-teaching partners paired up), then students flow to the staffed
+    periods (max placements, then min cost), never into two overlapping
+    periods.  Periods that end up below min_students_per_class are closed
+    and both flows are re-solved without them, which terminates after at
+    most one round per period.
+    """
+    min_students = settings["min_students_per_class"]
+    periods = [class_name for class_name, _ in sorted_class_periods(classes)
+               if preferences.count_students(class_name) >= min_students]
+    
+    while True:
+        staffed = _staff_periods(periods, classes, preferences, settings, progress)
+        _pair_co_teachers(staffed, classes, preferences, settings)
+        open_periods = [class_name for class_name in periods if class_name in staffed]
+        placed = _place_students(open_periods, classes, preferences, settings, progress)
+        too_small = {class_name for class_name in open_periods if len(placed[class_name]) < min_students}
+        if not too_small:
+            break
+        periods = [class_name for class_name in open_periods if class_name not in too_small]
+    
+    return [ScheduledClass(class_name, staffed[class_name], placed[class_name])
+            for class_name in open_periods]
+
+
+SOLVERS = {
+    "Greedy": greedy_schedule,
+    "Optimal": optimal_schedule,
+}
+
+
+def split_sections(schedule, classes, preferences, settings, room_count=None):
+    """Open parallel sections of full periods that still have unplaced demand.
+    
+    For each scheduled period at capacity, the students who wanted it but
+    were left out (and are free at that time with room for another class)
+    are counted, and extra sections are opened as long as a spare eligible
+    instructor exists, every section keeps at least min_students_per_class,
+    and, when room_count is given, rooms are left at that time.  The
+    period's students and the newcomers are then dealt round-robin across
+    the sections in priority order, so section sizes differ by at most one
+    and each section gets its share of First Choice students.
+    """
+    capacity = settings["max_students_per_class"]
+    min_students = max(1, settings["min_students_per_class"])
+    max_classes = settings["max_classes_per_student"]
+    
+    booked = {}  # student_id -> Occupancy
+    teaching = {}  # instructor_id -> Occupancy
+    for scheduled in schedule:
+        slot = classes[scheduled.class_name].slot if scheduled.class_name in classes else None
+        for student_id in scheduled.student_ids:
+            booked.setdefault(student_id, Occupancy()).add(slot)
+        for instructor_id in scheduled.instructor_ids:
+            teaching.setdefault(instructor_id, Occupancy()).add(slot)
+    running = [classes[scheduled.class_name].slot for scheduled in schedule
+               if scheduled.class_name in classes and classes[scheduled.class_name].slot]
+    
+    def can_take(student_id, slot):
+        occupancy = booked.get(student_id)
+        return occupancy is None or (len(occupancy) < max_classes and not occupancy.conflicts(slot))
+    
+    def can_teach(instructor_id, slot):
+        occupancy = teaching.get(instructor_id)
+        if occupancy is None:
+            return preferences.class_limit(instructor_id, settings) > 0
+        return (len(occupancy) < preferences.class_limit(instructor_id, settings)
+                and not occupancy.conflicts(slot))
+    
+    result = []
+    for scheduled in schedule:
+        result.append(scheduled)
+        class_obj = classes.get(scheduled.class_name)
+        if class_obj is None or class_obj.slot is None or len(scheduled.student_ids) < capacity:
+            continue
+        slot = class_obj.slot
+        
+        placed = set(scheduled.student_ids)
+        waiting = [student_id
+                   for level in PreferenceIndex.STUDENT_LEVELS
+                   for student_id in preferences.students_for(scheduled.class_name, level)
+                   if student_id not in placed and can_take(student_id, slot)]
+        if not waiting:
+            continue
+        
+        # One new section per spare instructor, while demand and rooms last
+        spare = [instructor_id for instructor_id in preferences.instructors_for(scheduled.class_name)
+                 if can_teach(instructor_id, slot)]
+        concurrent = sum(1 for other in running if other.overlaps(slot))
+        sections = 1
+        while (sections <= len(spare)
+               and (sections + 1) * min_students <= len(placed) + len(waiting)
+               and sections * capacity < len(placed) + len(waiting)
+               and (room_count is None or concurrent + sections <= room_count)):
+            sections += 1
+        if sections == 1:
+            continue
+        
+        # Least-loaded spare instructors lead the new sections, partners joining when allowed
+        spare.sort(key=lambda instructor_id: len(teaching.get(instructor_id, ())))
+        leads = spare[:sections - 1]
+        leftover = set(spare[sections - 1:])
+        staff = [scheduled.instructor_ids]
+        for instructor_id in leads:
+            team = [instructor_id]
+            partner = preferences.partners.get(instructor_id)
+            if settings["max_instructors_per_class"] > 1 and partner in leftover:
+                team.append(partner)
+                leftover.discard(partner)
+            staff.append(team)
+        
+        # Deal the period's students, then the newcomers, across the sections
+        pool = list(scheduled.student_ids) + waiting[:sections * capacity - len(placed)]
+        rosters = [pool[k::sections] for k in range(sections)]
+        
+        scheduled.section = 1
+        scheduled.student_ids = rosters[0]
+        for number in range(2, sections + 1):
+            section = ScheduledClass(scheduled.class_name, staff[number - 1], rosters[number - 1], number)
+            result.append(section)
+            running.append(slot)
+            for instructor_id in section.instructor_ids:
+                teaching.setdefault(instructor_id, Occupancy()).add(slot)
+        for student_id in pool[len(placed):]:
+            booked.setdefault(student_id, Occupancy()).add(slot)
+    
+    return result
+
+
+def solve(classes, preferences, settings, progress=None, room_count=None):
+    """The selected solver's schedule, with full periods split into sections if enabled."""
+    schedule = SOLVERS[settings["solver"]](classes, preferences, settings, progress)
+    if settings["split_sections"]:
+        if progress:
+            progress("Splitting sections", 0, 0)
+        schedule = split_sections(schedule, classes, preferences, settings, room_count)
+    return schedule
+
+
+def building_key(value):
+    # Blank building cells all land in the "N/A" partition
+    if value is None or (isinstance(value, float) and value != value):
+        return "N/A"
+    return str(value)
+
+
+def partition_by_building(preferences):
+    """Building -> PreferenceIndex over that building's students and instructors.
+    
+    Students go to the building in their row.  Instructors whose building
+    matches a student building stay there; the rest (no Building column,
+    blank or unknown building) are dealt one at a time to the building with
+    the most students per instructor so far, so no partition is starved.
+    """
+    students = {}
+    matrix = preferences.student_matrix
+    if matrix is not None:
+        for student_id, row in matrix.row_index.items():
+            building = building_key(matrix.buildings[row]) if matrix.buildings is not None else "N/A"
+            students.setdefault(building, set()).add(student_id)
+    if not students:
+        return {}
+    
+    instructors = {building: set() for building in students}
+    floating = []
+    matrix = preferences.instructor_matrix
+    if matrix is not None:
+        for instructor_id, row in matrix.row_index.items():
+            building = building_key(matrix.buildings[row]) if matrix.buildings is not None else None
+            if building in instructors:
+                instructors[building].add(instructor_id)
+            else:
+                floating.append(instructor_id)
+    
+    # Max-heap on students per (instructor + 1); order breaks ties by first appearance
+    order = {building: position for position, building in enumerate(students)}
+    heap = [(-len(students[b]) / (len(instructors[b]) + 1), order[b], b) for b in students]
+    heapq.heapify(heap)
+    for instructor_id in floating:
+        _, position, building = heapq.heappop(heap)
+        instructors[building].add(instructor_id)
+        heapq.heappush(heap, (-len(students[building]) / (len(instructors[building]) + 1), position, building))
+    
+    return {building: preferences.subset(students[building], instructors[building]) for building in students}
+
+
+# Per worker process copy of the class periods, set once by the pool initializer
+_partition_inputs = {}
+
+
+def _init_partition_worker(classes):
+    _partition_inputs["classes"] = classes
+
+
+def _solve_partition(building, preferences, settings, room_count):
+    return building, solve(_partition_inputs["classes"], preferences, settings, room_count=room_count)
+
+
+def partitioned_schedule(classes, preferences, settings, rooms=None, max_workers=None, progress=None):
+    """Schedule each building on its own, in parallel, and merge the results.
+    
+    Buildings never share a section, so every partition is an independent
+    problem.  Each is solved in a worker process with the selected solver
+    (max_workers=1 solves them in this process instead, e.g. inside a
+    sweep worker).  Sections opened by splitting are limited by the rooms in
+    the partition's building, when the inventory lists any there.  The
+    merged schedule is in period order, buildings in order of appearance.
+    """
+    partitions = partition_by_building(preferences)
+    room_counts = Counter(room.building for room in rooms or ())
+    jobs = [(building, index, settings, room_counts.get(building) or None)
+            for building, index in partitions.items()]
+    
+    results = {}
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if max_workers <= 1:
+        for building, index, job_settings, room_count in jobs:
+            if progress:
+                progress("Scheduling buildings", len(results), len(jobs))
+            results[building] = solve(classes, index, job_settings, room_count=room_count)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_partition_worker,
+                                 initargs=(classes,)) as pool:
+            futures = [pool.submit(_solve_partition, *job) for job in jobs]
+            try:
+                if progress:
+                    progress("Scheduling buildings", 0, len(jobs))
+                for future in as_completed(futures):
+                    building, schedule = future.result()
+                    results[building] = schedule
+                    if progress:
+                        progress("Scheduling buildings", len(results), len(jobs))
+            except Cancelled:
+                pool.shutdown(cancel_futures=True)
+                raise
+    
+    merged = []
+    for position, building in enumerate(partitions):
+        for scheduled in results[building]:
+            if len(partitions) > 1:
+                scheduled.building = building
+            merged.append((classes[scheduled.class_name].sort_key, position, len(merged), scheduled))
+    merged.sort(key=lambda entry: entry[:3])
+    return [scheduled for _, _, _, scheduled in merged]
+
+
+def run_solver(classes, preferences, settings, progress=None, rooms=None, max_workers=None):
+    """Schedule for the given settings, one building at a time if partition_by_building is set."""
+    if settings["partition_by_building"]:
+        return partitioned_schedule(classes, preferences, settings, rooms, max_workers, progress)
+    return solve(classes, preferences, settings, progress, len(rooms) if rooms else None)
+
+
+class Room:
+    __slots__ = ("name", "capacity", "building")
+    
+    def __init__(self, name, capacity, building="N/A"):
+        self.name = name
+        self.capacity = capacity
+        self.building = building
+
+
+ROOM_NAME_COLUMNS = ["room", "room name", "name"]
+
+
+def read_rooms(df):
+    """Room inventory from a sheet with Room (or Name), Capacity and Building columns."""
+    columns = {str(col).strip().lower(): col for col in df.columns}
+    name_column = next((columns[name] for name in ROOM_NAME_COLUMNS if name in columns), None)
+    if name_column is None:
+        raise ValueError("Rooms sheet needs a Room or Name column")
+    if "capacity" not in columns:
+        raise ValueError("Rooms sheet needs a Capacity column")
+    building_columns = [col for col in df.columns if isinstance(col, str) and BUILDING_PATTERN.match(col)]
+    
+    names = df[name_column]
+    capacities = pd.to_numeric(df[columns["capacity"]], errors="coerce")
+    buildings = df[building_columns[-1]] if building_columns else pd.Series("N/A", index=df.index)
+    
+    rooms = []
+    for name, capacity, building in zip(names, capacities, buildings):
+        if pd.isna(name) or pd.isna(capacity):
+            continue
+        rooms.append(Room(str(name), int(capacity), str(building) if pd.notna(building) else "N/A"))
+    return rooms
+
+
+def _majority_building(student_ids, students):
+    counts = Counter(str(students[student_id].building) for student_id in student_ids if student_id in students)
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def assign_rooms(schedule, classes, rooms, students):
+    """Give each scheduled class the smallest free room that fits, preferring its students' building.
+    
+    Interval-graph coloring by sweep line: classes are taken in order of
+    weekly start time, and rooms whose class has ended go back into the
+    free lists first.  Free rooms are kept sorted by capacity (per building
+    and overall), so picking the best fit is a bisect.  Classes without a
+    readable time, or with no free room large enough, stay "TBD".
+    """
+    free = []                # (capacity, name, index) for every free room
+    free_by_building = {}    # building -> same tuples, for the preferred building
+    for index, room in enumerate(rooms):
+        entry = (room.capacity, room.name, index)
+        free.append(entry)
+        free_by_building.setdefault(room.building, []).append(entry)
+    free.sort()
+    for entries in free_by_building.values():
+        entries.sort()
+    
+    def take(entries, size):
+        i = bisect.bisect_left(entries, (size,))
+        return entries[i] if i < len(entries) else None
+    
+    def remove(entries, entry):
+        del entries[bisect.bisect_left(entries, entry)]
+    
+    busy = []  # heap of (week_end, entry) for rooms in use
+    timed = sorted((classes[scheduled.class_name].slot.week_start, position)
+                   for position, scheduled in enumerate(schedule)
+                   if scheduled.class_name in classes and classes[scheduled.class_name].slot)
+    
+    for scheduled in schedule:
+        scheduled.room = "TBD"
+    
+    for week_start, position in timed:
+        # Release rooms whose class ended by now
+        while busy and busy[0][0] <= week_start:
+            _, entry = heapq.heappop(busy)
+            bisect.insort(free, entry)
+            bisect.insort(free_by_building[rooms[entry[2]].building], entry)
+        
+        scheduled = schedule[position]
+        size = len(scheduled.student_ids)
+        building = _majority_building(scheduled.student_ids, students)
+        entry = take(free_by_building.get(building, []), size) or take(free, size)
+        if entry is None:
+            continue
+        
+        room = rooms[entry[2]]
+        remove(free, entry)
+        remove(free_by_building[room.building], entry)
+        scheduled.room = room.name
+        heapq.heappush(busy, (classes[scheduled.class_name].slot.week_end, entry))
+    
+    return schedule
+
+
+class Bookings:
+    """Who is booked into which scheduled classes, kept current during repairs.
+    
+    Built once from a schedule in O(placements); afterwards every booking
+    change goes through it, so a repair only looks at the people and
+    periods it touches.
+    """
+    
+    def __init__(self, schedule, classes):
+        self.classes = classes
+        self.sections = {}     # class_name -> [ScheduledClass]
+        self.students = {}     # student_id -> [ScheduledClass]
+        self.instructors = {}  # instructor_id -> [ScheduledClass]
+        for scheduled in schedule:
+            self.add_section(scheduled)
+    
+    def slot(self, scheduled):
+        class_obj = self.classes.get(scheduled.class_name)
+        return class_obj.slot if class_obj else None
+    
+    def add_section(self, scheduled):
+        self.sections.setdefault(scheduled.class_name, []).append(scheduled)
+        for student_id in scheduled.student_ids:
+            self.students.setdefault(student_id, []).append(scheduled)
+        for instructor_id in scheduled.instructor_ids:
+            self.instructors.setdefault(instructor_id, []).append(scheduled)
+    
+    def remove_section(self, scheduled):
+        self.sections[scheduled.class_name].remove(scheduled)
+        for student_id in scheduled.student_ids:
+            self.students[student_id].remove(scheduled)
+        for instructor_id in scheduled.instructor_ids:
+            self.instructors[instructor_id].remove(scheduled)
+    
+    def book_student(self, scheduled, student_id):
+        scheduled.student_ids.append(student_id)
+        self.students.setdefault(student_id, []).append(scheduled)
+    
+    def unbook_student(self, scheduled, student_id):
+        scheduled.student_ids.remove(student_id)
+        self.students[student_id].remove(scheduled)
+    
+    def book_instructor(self, scheduled, instructor_id):
+        scheduled.instructor_ids.append(instructor_id)
+        self.instructors.setdefault(instructor_id, []).append(scheduled)
+    
+    def unbook_instructor(self, scheduled, instructor_id):
+        scheduled.instructor_ids.remove(instructor_id)
+        self.instructors[instructor_id].remove(scheduled)
+    
+    def _is_free(self, booked, slot, limit):
+        if len(booked) >= limit:
+            return False
+        occupancy = Occupancy()
+        for scheduled in booked:
+            occupancy.add(self.slot(scheduled))
+        return not occupancy.conflicts(slot)
+    
+    def student_can_take(self, student_id, slot, max_classes):
+        return self._is_free(self.students.get(student_id, ()), slot, max_classes)
+    
+    def instructor_can_teach(self, instructor_id, slot, limit):
+        return self._is_free(self.instructors.get(instructor_id, ()), slot, limit)
+    
+    def load(self, instructor_id):
+        return len(self.instructors.get(instructor_id, ()))
+
+
+class ScheduleRepair:
+    """Local repair of a schedule after a few students or instructors change.
+    
+    Only the periods the changed people are booked into or asked for are
+    visited: freed seats are refilled from waiting students, classes left
+    without an instructor get a free replacement (or are cancelled and
+    their students re-placed), and unscheduled periods that became viable
+    are opened.  Everyone else keeps their placement.  Classes that end up
+    below min_students_per_class are kept but marked "Under Minimum".
+    """
+    
+    def __init__(self, scheduler):
+        self.schedule = scheduler.schedule
+        self.classes = scheduler.classes
+        self.preferences = scheduler.preferences
+        self.settings = scheduler.settings
+        self.students = scheduler.students
+        self.rooms = scheduler.rooms
+        self.bookings = scheduler.bookings
+        self.partitioned = any(scheduled.building is not None for scheduled in self.schedule)
+        self.freed = []       # Sections that lost students
+        self.unstaffed = []   # Sections that lost their last instructor
+        self.waiting = []     # Students to (re)place
+        self.openable = set() # Periods someone new asked for or can teach
+        self.touched = set()  # Class names of every period changed
+    
+    def _matrix_periods(self, matrix, person_id, test):
+        row = matrix.row_index[person_id]
+        return {matrix.class_columns[j]: int(matrix.codes[row, j]) for j in np.flatnonzero(test(matrix.codes[row]))}
+    
+    def drop_student(self, student_id):
+        for scheduled in list(self.bookings.students.pop(student_id, ())):
+            scheduled.student_ids.remove(student_id)
+            self.freed.append(scheduled)
+    
+    def student_changed(self, student_id):
+        wanted = self._matrix_periods(self.preferences.student_matrix, student_id, lambda codes: codes >= FITS)
+        for scheduled in list(self.bookings.students.get(student_id, ())):
+            if scheduled.class_name not in wanted:
+                self.bookings.unbook_student(scheduled, student_id)
+                self.freed.append(scheduled)
+        self.waiting.append(student_id)
+        self.openable.update(wanted)
+    
+    def drop_instructor(self, instructor_id):
+        for scheduled in list(self.bookings.instructors.pop(instructor_id, ())):
+            scheduled.instructor_ids.remove(instructor_id)
+            if not scheduled.instructor_ids:
+                self.unstaffed.append(scheduled)
+            self.touched.add(scheduled.class_name)
+    
+    def instructor_changed(self, instructor_id):
+        available = self._matrix_periods(self.preferences.instructor_matrix, instructor_id,
+                                         lambda codes: codes != DOES_NOT_FIT)
+        for scheduled in list(self.bookings.instructors.get(instructor_id, ())):
+            if scheduled.class_name not in available:
+                self.bookings.unbook_instructor(scheduled, instructor_id)
+                if not scheduled.instructor_ids:
+                    self.unstaffed.append(scheduled)
+                self.touched.add(scheduled.class_name)
+        self.openable.update(available)
+    
+    def _building_matches(self, building, student_id):
+        return building is None or building_key(self.students[student_id].building) == building
+    
+    def _staff(self, scheduled):
+        # Least-loaded free instructor for the period, then their partner if allowed
+        slot = self.bookings.slot(scheduled)
+        free = [instructor_id for instructor_id in self.preferences.instructors_for(scheduled.class_name)
+                if instructor_id not in scheduled.instructor_ids
+                and self.bookings.instructor_can_teach(
+                    instructor_id, slot, self.preferences.class_limit(instructor_id, self.settings))]
+        if not free:
+            return False
+        lead = min(free, key=self.bookings.load)
+        self.bookings.book_instructor(scheduled, lead)
+        partner = self.preferences.partners.get(lead)
+        if partner in free and len(scheduled.instructor_ids) < self.settings["max_instructors_per_class"]:
+            self.bookings.book_instructor(scheduled, partner)
+        return True
+    
+    def _place(self, student_id):
+        # Into the first section with a free seat, First Choice periods first
+        max_classes = self.settings["max_classes_per_student"]
+        wanted = self._matrix_periods(self.preferences.student_matrix, student_id, lambda codes: codes >= FITS)
+        order = sorted(wanted, key=lambda class_name: (-wanted[class_name], self.classes[class_name].sort_key))
+        for class_name in order:
+            if len(self.bookings.students.get(student_id, ())) >= max_classes:
+                break
+            for scheduled in self.bookings.sections.get(class_name, ()):
+                if (len(scheduled.student_ids) < self.settings["max_students_per_class"]
+                        and self._building_matches(scheduled.building, student_id)
+                        and self.bookings.student_can_take(student_id, self.bookings.slot(scheduled), max_classes)):
+                    self.bookings.book_student(scheduled, student_id)
+                    self.touched.add(class_name)
+                    break
+    
+    def _candidates(self, class_name, slot, building, limit, exclude=()):
+        # Waiting students for a period, First Choice first, in import order
+        max_classes = self.settings["max_classes_per_student"]
+        chosen = []
+        for level in PreferenceIndex.STUDENT_LEVELS:
+            for student_id in self.preferences.students_for(class_name, level):
+                if len(chosen) >= limit:
+                    return chosen
+                if (student_id not in exclude and self._building_matches(building, student_id)
+                        and self.bookings.student_can_take(student_id, slot, max_classes)):
+                    chosen.append(student_id)
+        return chosen
+    
+    def _refill(self, scheduled):
+        seats = self.settings["max_students_per_class"] - len(scheduled.student_ids)
+        if seats > 0:
+            for student_id in self._candidates(scheduled.class_name, self.bookings.slot(scheduled),
+                                               scheduled.building, seats):
+                self.bookings.book_student(scheduled, student_id)
+        self.touched.add(scheduled.class_name)
+    
+    def _free_room(self, slot, size, building):
+        if not self.rooms or slot is None:
+            return "TBD"
+        used = {scheduled.room for scheduled in self.schedule
+                if self.bookings.slot(scheduled) is not None and self.bookings.slot(scheduled).overlaps(slot)}
+        fitting = [room for room in self.rooms if room.name not in used and room.capacity >= size]
+        if not fitting:
+            return "TBD"
+        return min(fitting, key=lambda room: (room.building != building, room.capacity)).name
+    
+    def _insert(self, scheduled):
+        # Keep the schedule in period order
+        sort_key = self.classes[scheduled.class_name].sort_key
+        position = len(self.schedule)
+        while position > 0 and self.classes[self.schedule[position - 1].class_name].sort_key > sort_key:
+            position -= 1
+        self.schedule.insert(position, scheduled)
+        self.bookings.add_section(scheduled)
+    
+    def _open(self, class_name):
+        slot = self.classes[class_name].slot
+        capacity = self.settings["max_students_per_class"]
+        if self.partitioned:
+            counts = Counter(building_key(self.students[student_id].building)
+                             for student_id in self._candidates(class_name, slot, None, INFINITY))
+            buildings = [building for building, _ in counts.most_common()]
+        else:
+            buildings = [None]
+        for building in buildings:
+            student_ids = self._candidates(class_name, slot, building, capacity)
+            if len(student_ids) < self.settings["min_students_per_class"]:
+                continue
+            scheduled = ScheduledClass(class_name, [], [])
+            scheduled.building = building
+            self._insert(scheduled)
+            if not self._staff(scheduled):
+                # No instructor is free at this time, whichever building asks
+                self.bookings.remove_section(scheduled)
+                self.schedule.remove(scheduled)
+                return
+            for student_id in student_ids:
+                self.bookings.book_student(scheduled, student_id)
+            scheduled.room = self._free_room(slot, len(student_ids), building)
+            self.touched.add(class_name)
+            return
+    
+    def finish(self):
+        """Run the repair; returns the class periods it changed, in period order."""
+        for scheduled in self.unstaffed:
+            if not self._staff(scheduled):
+                # Nobody can take over: cancel and re-place the class's students
+                self.bookings.remove_section(scheduled)
+                self.schedule.remove(scheduled)
+                self.waiting.extend(scheduled.student_ids)
+                self.touched.add(scheduled.class_name)
+        
+        for student_id in self.waiting:
+            if student_id in self.students:
+                self._place(student_id)
+        for scheduled in self.freed:
+            if scheduled in self.bookings.sections.get(scheduled.class_name, ()):
+                self._refill(scheduled)
+        for class_name in sorted(self.openable, key=lambda class_name: self.classes[class_name].sort_key):
+            if not self.bookings.sections.get(class_name):
+                self._open(class_name)
+        
+        for class_name in self.touched:
+            for scheduled in self.bookings.sections.get(class_name, ()):
+                below = len(scheduled.student_ids) < self.settings["min_students_per_class"]
+                scheduled.status = "Under Minimum" if below else "Scheduled"
+        return sorted(self.touched, key=lambda class_name: self.classes[class_name].sort_key)
+
+
+def summarize_schedule(schedule, preferences):
+    """Headline numbers used to compare schedules."""
+    placements = sum(len(scheduled.student_ids) for scheduled in schedule)
+    placed = len({student_id for scheduled in schedule for student_id in scheduled.student_ids})
+    
+    first_choice = 0
+    matrix = preferences.student_matrix
+    if matrix is not None:
+        for scheduled in schedule:
+            j = matrix.column_index.get(scheduled.class_name)
+            if j is None:
+                continue
+            rows = [matrix.row_index[student_id] for student_id in scheduled.student_ids]
+            first_choice += int(np.count_nonzero(matrix.codes[rows, j] == FIRST_CHOICE))
+    
+    loads = {}
+    for scheduled in schedule:
+        for instructor_id in scheduled.instructor_ids:
+            loads[instructor_id] = loads.get(instructor_id, 0) + 1
+    
+    return {
+        "Scheduled Classes": len(schedule),
+        "Placed Students": placed,
+        "Placements": placements,
+        "First Choice Rate": first_choice / placements if placements else 0.0,
+        "Instructors Used": len(loads),
+        "Avg Instructor Load": sum(loads.values()) / len(loads) if loads else 0.0,
+        "Max Instructor Load": max(loads.values()) if loads else 0,
+    }
+
+
+# Terms of the local search objective (higher is better); any can be overridden
+# through the objective_weights setting
+OBJECTIVE_WEIGHTS = {
+    "placement": 1.0,      # Per student seat filled
+    "first_choice": 1.0,   # Extra per seat in a period the student marked First Choice
+    "under_minimum": 2.0,  # Penalty per student a section is short of min_students_per_class
+    "load_balance": 0.5,   # Penalty per unit of the sum of squared instructor loads
+}
+
+
+class SearchReport(namedtuple("SearchReport", ["before", "after", "first_choice_before", "first_choice_after",
+                                               "moves", "accepted", "seconds"])):
+    """Outcome of a LocalSearch run: objective and First Choice rate before and after."""
+    
+    __slots__ = ()
+    
+    def describe(self):
+        return (f"Local search raised the score from {self.before:.1f} to {self.after:.1f} "
+                f"({self.after - self.before:+.1f}) in {self.seconds:.1f} s, {self.accepted} of "
+                f"{self.moves} moves accepted; first choice rate "
+                f"{self.first_choice_before:.0%} -> {self.first_choice_after:.0%}")
+
+
+class LocalSearch:
+    """Simulated annealing over a finished schedule, normally the greedy one.
+    
+    Moves relocate a student to a section of another period they marked (or
+    place a student with room for another class), swap two students between
+    full sections, or hand a section to another eligible instructor.  A
+    move's effect on the objective (see OBJECTIVE_WEIGHTS) is computed from
+    the two sections and people it touches, never by rescoring the schedule.
+    Worse moves are accepted with a probability that shrinks as the time
+    budget runs out, and the best schedule seen is restored at the end.
+    Sections are never emptied or created, so the set of running classes
+    stays as the solver left it.
+    """
+    
+    START_TEMPERATURE = 1.0  # In units of the largest weight
+    END_TEMPERATURE = 0.001
+    CHECK_EVERY = 256  # Moves between clock checks
+    
+    def __init__(self, schedule, classes, preferences, settings, weights=None, seed=0):
+        self.schedule = schedule
+        self.preferences = preferences
+        self.settings = settings
+        self.weights = dict(OBJECTIVE_WEIGHTS, **(weights or {}))
+        self.bookings = Bookings(schedule, classes)
+        self.random = random.Random(seed)
+        
+        self.capacity = settings["max_students_per_class"]
+        self.min_students = settings["min_students_per_class"]
+        self.max_classes = settings["max_classes_per_student"]
+        self.matrix = preferences.student_matrix
+        self.student_ids = list(self.matrix.row_index) if self.matrix is not None else []
+        self._wanted = {}     # student_id -> class names with sections that the student marked
+        self._available = {}  # class_name -> [instructor_id], for random picks
+    
+    def _code(self, student_id, class_name):
+        j = self.matrix.column_index.get(class_name)
+        return BLANK if j is None else int(self.matrix.codes[self.matrix.row_index[student_id], j])
+    
+    def _wanted_periods(self, student_id):
+        wanted = self._wanted.get(student_id)
+        if wanted is None:
+            row = self.matrix.row_index[student_id]
+            wanted = [self.matrix.class_columns[j] for j in np.flatnonzero(self.matrix.codes[row] >= FITS)
+                      if self.bookings.sections.get(self.matrix.class_columns[j])]
+            self._wanted[student_id] = wanted
+        return wanted
+    
+    def _building_matches(self, scheduled, student_id):
+        if scheduled.building is None or self.matrix.buildings is None:
+            return True
+        return building_key(self.matrix.buildings[self.matrix.row_index[student_id]]) == scheduled.building
+    
+    def _conflicts(self, booked, slot):
+        occupancy = Occupancy()
+        for scheduled in booked:
+            occupancy.add(self.bookings.slot(scheduled))
+        return occupancy.conflicts(slot)
+    
+    def _seat_value(self, scheduled, student_id):
+        value = self.weights["placement"]
+        if self._code(student_id, scheduled.class_name) == FIRST_CHOICE:
+            value += self.weights["first_choice"]
+        return value
+    
+    def _fill_penalty(self, size):
+        return self.weights["under_minimum"] * max(0, self.min_students - size)
+    
+    def _resize(self, scheduled, change):
+        # Objective change from the section gaining (or losing) students
+        size = len(scheduled.student_ids)
+        return self._fill_penalty(size) - self._fill_penalty(size + change)
+    
+    def score(self):
+        """The objective for the whole schedule, from scratch."""
+        total = 0.0
+        for scheduled in self.schedule:
+            total += sum(self._seat_value(scheduled, student_id) for student_id in scheduled.student_ids)
+            total -= self._fill_penalty(len(scheduled.student_ids))
+        loads = self.bookings.instructors.values()
+        return total - self.weights["load_balance"] * sum(len(taught) ** 2 for taught in loads)
+    
+    def _propose_student(self):
+        student_id = self.random.choice(self.student_ids)
+        wanted = self._wanted_periods(student_id)
+        if not wanted:
+            return None
+        target = self.random.choice(self.bookings.sections[self.random.choice(wanted)])
+        booked = self.bookings.students.get(student_id, [])
+        if target in booked or not self._building_matches(target, student_id):
+            return None
+        
+        # Move out of one of their sections, or take an extra class while they have room
+        source = None
+        if booked and (len(booked) >= self.max_classes or self.random.random() < 0.5):
+            source = self.random.choice(booked)
+        if self._conflicts([scheduled for scheduled in booked if scheduled is not source],
+                           self.bookings.slot(target)):
+            return None
+        
+        if len(target.student_ids) < self.capacity:
+            delta = self._seat_value(target, student_id) + self._resize(target, 1)
+            if source is not None:
+                if len(source.student_ids) == 1:
+                    return None  # Never empty a section
+                delta += self._resize(source, -1) - self._seat_value(source, student_id)
+            return delta, ("relocate", student_id, source, target)
+        
+        # The target is full: trade places with one of its students
+        if source is None:
+            return None
+        other_id = self.random.choice(target.student_ids)
+        if (other_id in source.student_ids or self._code(other_id, source.class_name) < FITS
+                or not self._building_matches(source, other_id)):
+            return None
+        if self._conflicts([scheduled for scheduled in self.bookings.students[other_id] if scheduled is not target],
+                           self.bookings.slot(source)):
+            return None
+        delta = (self._seat_value(target, student_id) - self._seat_value(source, student_id)
+                 + self._seat_value(source, other_id) - self._seat_value(target, other_id))
+        return delta, ("swap", student_id, source, other_id, target)
+    
+    def _propose_instructor(self):
+        scheduled = self.random.choice(self.schedule)
+        if not scheduled.instructor_ids:
+            return None
+        old_id = self.random.choice(scheduled.instructor_ids)
+        if self.preferences.partners.get(old_id) in scheduled.instructor_ids:
+            return None  # Keep co-teaching pairs together
+        available = self._available.get(scheduled.class_name)
+        if available is None:
+            available = self._available[scheduled.class_name] = list(
+                self.preferences.instructors_for(scheduled.class_name))
+        if not available:
+            return None
+        new_id = self.random.choice(available)
+        if new_id in scheduled.instructor_ids or not self.bookings.instructor_can_teach(
+                new_id, self.bookings.slot(scheduled), self.preferences.class_limit(new_id, self.settings)):
+            return None
+        # Sum of squares change: (a - 1)^2 - a^2 + (b + 1)^2 - b^2
+        change = 2 * (self.bookings.load(new_id) - self.bookings.load(old_id) + 1)
+        return -self.weights["load_balance"] * change, ("staff", scheduled, old_id, new_id)
+    
+    def _relocate(self, student_id, source, target):
+        if source is not None:
+            self.bookings.unbook_student(source, student_id)
+        if target is not None:
+            self.bookings.book_student(target, student_id)
+    
+    def _apply(self, move, undo=False):
+        kind = move[0]
+        if kind == "relocate":
+            _, student_id, source, target = move
+            if undo:
+                source, target = target, source
+            self._relocate(student_id, source, target)
+        elif kind == "swap":
+            _, student_id, source, other_id, target = move
+            if undo:
+                source, target = target, source
+            self._relocate(student_id, source, target)
+            self._relocate(other_id, target, source)
+        else:
+            _, scheduled, old_id, new_id = move
+            if undo:
+                old_id, new_id = new_id, old_id
+            self.bookings.unbook_instructor(scheduled, old_id)
+            self.bookings.book_instructor(scheduled, new_id)
+    
+    def run(self, seconds, progress=None):
+        """Search for up to seconds; the schedule is changed in place.  Returns a SearchReport."""
+        start = time.perf_counter()
+        first_choice_before = summarize_schedule(self.schedule, self.preferences)["First Choice Rate"]
+        score = best = before = self.score()
+        
+        scale = max(self.weights.values()) or 1.0
+        instructor_share = 0.2 if self.weights["load_balance"] else 0.0
+        trail = []  # Moves accepted since the best schedule so far, undone at the end
+        moves = accepted = 0
+        temperature = self.START_TEMPERATURE * scale
+        while self.student_ids and self.schedule:
+            if moves % self.CHECK_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                if elapsed >= seconds:
+                    break
+                if progress:
+                    progress("Improving schedule", int(elapsed * 1000), int(seconds * 1000))
+                ratio = self.END_TEMPERATURE / self.START_TEMPERATURE
+                temperature = self.START_TEMPERATURE * scale * ratio ** (elapsed / seconds)
+            moves += 1
+            
+            if self.random.random() < instructor_share:
+                proposal = self._propose_instructor()
+            else:
+                proposal = self._propose_student()
+            if proposal is None:
+                continue
+            delta, move = proposal
+            if delta >= 0 or self.random.random() < math.exp(delta / temperature):
+                self._apply(move)
+                accepted += 1
+                score += delta
+                trail.append(move)
+                if score > best:
+                    best = score
+                    trail = []
+        
+        for move in reversed(trail):
+            self._apply(move, undo=True)
+        for scheduled in self.schedule:
+            below = len(scheduled.student_ids) < self.min_students
+            scheduled.status = "Under Minimum" if below else "Scheduled"
+        
+        first_choice_after = summarize_schedule(self.schedule, self.preferences)["First Choice Rate"]
+        return SearchReport(before, best, first_choice_before, first_choice_after,
+                            moves, accepted, time.perf_counter() - start)
+
+
+def improve_schedule(schedule, classes, preferences, settings, progress=None):
+    """Run the local search on schedule, in place, for settings["local_search_seconds"]."""
+    search = LocalSearch(schedule, classes, preferences, settings, settings["objective_weights"])
+    return search.run(settings["local_search_seconds"], progress)
+
+
+SWEEP_SETTINGS = ["max_students_per_class", "max_instructors_per_class",
+                  "min_students_per_class", "max_classes_per_instructor", "prioritize_first_choice"]
+
+# Per worker process copy of the scheduling inputs, set once by the pool initializer
+_sweep_inputs = {}
+
+
+def _init_sweep_worker(classes, preferences, rooms):
+    _sweep_inputs["classes"] = classes
+    _sweep_inputs["preferences"] = preferences
+    _sweep_inputs["rooms"] = rooms
+
+
+def _run_sweep_point(settings):
+    # Already inside a pool worker, so building partitions are solved in turn
+    schedule = run_solver(_sweep_inputs["classes"], _sweep_inputs["preferences"], settings,
+                          rooms=_sweep_inputs["rooms"], max_workers=1)
+    return summarize_schedule(schedule, _sweep_inputs["preferences"])
+
+
+def sweep_settings(classes, preferences, settings, ranges, max_workers=None, progress=None, rooms=None):
+    """Run the scheduler for every combination of setting values on a process pool.
+    
+    ranges maps a setting name to the values to try; settings not in ranges
+    keep their current value.  rooms, as for run_solver, limits the sections
+    open at once.  Only the Optimal solver reads prioritize_first_choice, so
+    other solvers keep its current value instead of repeating every row.
+    Returns one comparison row per combination.
+    """
+    if settings["solver"] != "Optimal":
+        ranges = {name: values for name, values in ranges.items() if name != "prioritize_first_choice"}
+    names = list(ranges)
+    points = [dict(settings, **dict(zip(names, values)))
+              for values in itertools.product(*(ranges[name] for name in names))]
+    
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(points) // (4 * max_workers))
+    
+    # The inputs are shipped to each worker once, not once per combination
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sweep_worker,
+                             initargs=(classes, preferences, rooms)) as pool:
+        try:
+            for summary in pool.map(_run_sweep_point, points, chunksize=chunksize):
+                summaries.append(summary)
+                if progress:
+                    progress("Sweeping settings", len(summaries), len(points))
+        except Cancelled:
+            pool.shutdown(cancel_futures=True)
+            raise
+    
+    rows = []
+    for point, summary in zip(points, summaries):
+        row = {name: point[name] for name in SWEEP_SETTINGS}
+        row.update(summary)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def parse_setting_range(text):
+    """Parse "10-30:5", "10-30" or "10, 15, 20" into a list of ints."""
+    values = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d+)\s*-\s*(\d+)(?:\s*:\s*(\d+))?', part)
+        if match:
+            start, stop = int(match.group(1)), int(match.group(2))
+            step = int(match.group(3) or 1)
+            if step < 1 or stop < start:
+                raise ValueError(f"Invalid range: {part}")
+            values.extend(range(start, stop + 1, step))
+        else:
+            values.append(int(part))
+    return values
+
+
+def parse_objective_weights(text):
+    """Parse "first_choice=2, load_balance=0" into overrides of OBJECTIVE_WEIGHTS."""
+    weights = {}
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in OBJECTIVE_WEIGHTS:
+            raise ValueError(f"Unknown objective term: {name}")
+        weights[name] = float(value)
+    return weights
+
+
+def input_fingerprint(preferences, classes, rooms):
+    """Digest of everything a schedule is computed from apart from the settings.
+    
+    Covers the live students and instructors (IDs in order and their row
+    hashes, so an edited answer changes it), the class periods and the rooms.
+    """
+    digest = hashlib.sha256()
+    for matrix in (preferences.student_matrix, preferences.instructor_matrix):
+        if matrix is None:
+            digest.update(b"\0")
+            continue
+        rows = np.fromiter(matrix.row_index.values(), dtype=np.intp, count=len(matrix.row_index))
+        digest.update(repr(list(matrix.row_index)).encode())
+        digest.update(np.ascontiguousarray(matrix.row_hashes[rows]).tobytes())
+    digest.update(repr(list(classes)).encode())
+    digest.update(repr([(room.name, room.capacity, room.building) for room in rooms]).encode())
+    return digest.hexdigest()
+
+
+def _frozen(value):
+    # Hashable form of a settings value (objective_weights is a dict)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _frozen(item)) for key, item in value.items()))
+    return value
+
+
+CachedSchedule = namedtuple("CachedSchedule", ["settings", "schedule", "summary", "search_report"])
+
+
+class ScheduleCache:
+    """The last few generated schedules, keyed by input fingerprint and settings.
+    
+    Entries hold private copies, so repairs and room changes made to the
+    current schedule never leak into them.  The least recently used entry
+    is dropped once max_entries are held.
+    """
+    
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @staticmethod
+    def key(fingerprint, settings):
+        return fingerprint, _frozen(settings)
+    
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    
+    def put(self, key, settings, schedule, summary, search_report=None):
+        self._entries[key] = CachedSchedule(dict(settings), [scheduled.copy() for scheduled in schedule],
+                                            summary, search_report)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def entries(self, fingerprint=None):
+        """Cached schedules, least recently used first; only those for fingerprint if given."""
+        return [entry for key, entry in self._entries.items() if fingerprint is None or key[0] == fingerprint]
+    
+    def clear(self):
+        self._entries.clear()
+
+
+def compare_schedules(first, second):
+    """Side by side summary of two CachedSchedule entries, without recomputing either.
+    
+    One row per summary figure, then the settings that differ, then the
+    number of student placements (student, class period) only in one of them.
+    """
+    rows = []
+    for name, value in first.summary.items():
+        other = second.summary.get(name)
+        rows.append({"Measure": name, "First": value, "Second": other,
+                     "Change": other - value if isinstance(value, (int, float)) else None})
+    for name, value in first.settings.items():
+        if _frozen(value) != _frozen(second.settings.get(name)):
+            rows.append({"Measure": name, "First": value, "Second": second.settings.get(name), "Change": None})
+    
+    def placements(schedule):
+        return {(scheduled.class_name, student_id) for scheduled in schedule for student_id in scheduled.student_ids}
+    
+    first_placements = placements(first.schedule)
+    second_placements = placements(second.schedule)
+    rows.append({"Measure": "Placements Only in First", "First": len(first_placements - second_placements),
+                 "Second": None, "Change": None})
+    rows.append({"Measure": "Placements Only in Second", "First": None,
+                 "Second": len(second_placements - first_placements), "Change": None})
+    return pd.DataFrame(rows, dtype=object).set_index("Measure")
+
+
+DEFAULT_SETTINGS = {
+    "max_students_per_class": 20,
+    "max_instructors_per_class": 2,
+    "min_students_per_class": 6,
+    "prioritize_first_choice": True,
+    "max_classes_per_student": 1,
+    "max_classes_per_instructor": INSTRUCTOR_CLASS_LIMIT,
+    "split_sections": False,
+    "partition_by_building": False,
+    "answer_synonyms": {},  # Extra spellings of the answers, see ANSWER_SYNONYMS
+    "local_search_seconds": 0,  # Time budget for improve_schedule after generating; 0 skips it
+    "objective_weights": dict(OBJECTIVE_WEIGHTS),
+    "solver": "Greedy"
+}
+
+
+class ChangeEvent(namedtuple("ChangeEvent", ["entity", "added", "changed", "removed", "fields", "reset"],
+                               defaults=((), (), (), None, False))):
+    """One change to a Scheduler collection, as passed to its listeners.
+    
+    entity is "students", "instructors", "classes", "rooms" or "schedule";
+    added, changed and removed hold keys of that collection (IDs, class
+    period names, ScheduledClass objects).  fields narrows changed down to
+    some fields (None: all of them), and reset means the whole collection
+    was replaced.
+    """
+    
+    __slots__ = ()
+
+
+# Answers counted by candidate_counts(), per matrix
+def _wants_class(codes):
+    return (codes == FITS) | (codes == FIRST_CHOICE)
+
+
+def _available(codes):
+    return codes != DOES_NOT_FIT
+
+
+class Scheduler:
+    """Imported students, instructors and class periods, and the settings used to schedule them.
+    
+    Every change to the data is announced to the listeners added with
+    subscribe(), so views can update just the rows that changed.
+    """
+
+    def __init__(self, settings=None):
+        self.students = {}
+        self.instructors = {}
+        self.classes = {}
+        self._period_index = None
+        self.preferences = PreferenceIndex()
+        self.rooms = []
+        self.schedule = []
+        self._bookings = None
+        self.search_report = None  # SearchReport of the last generate(), when local search ran
+        self.schedule_cache = ScheduleCache()
+        self.schedule_cached = False  # Whether the last generate() came from schedule_cache
+        self.listeners = []
+        
+        # Settings with defaults
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        # Own copies of the dict-valued settings, so editing them never reaches the defaults
+        self.settings["objective_weights"] = dict(self.settings["objective_weights"])
+        self.settings["answer_synonyms"] = dict(self.settings["answer_synonyms"])
+    
+    def subscribe(self, listener):
+        """Call listener(ChangeEvent) after every change; changes made on a worker thread notify from there."""
+        self.listeners.append(listener)
+    
+    def _changed(self, entity, **changes):
+        event = ChangeEvent(entity, **changes)
+        for listener in self.listeners:
+            listener(event)
+    
+    def load_students(self, df, progress=None):
+        # Encode every class column of the sheet in one pass
+        self.set_student_matrix(PreferenceMatrix(df, progress, self.settings["answer_synonyms"]))
+    
+    def set_student_matrix(self, matrix):
+        # Students are thin views over their matrix row
+        self.students = {student_id: Student(student_id, matrix, row)
+                         for student_id, row in matrix.row_index.items()}
+        self.preferences.set_students(matrix)
+        self._bookings = None
+        self._changed("students", reset=True)
+        self._add_class_periods(matrix.class_columns, "students")
+    
+    def load_instructors(self, df, progress=None):
+        # Encode every class column of the sheet in one pass
+        self.set_instructor_matrix(PreferenceMatrix(df, progress, self.settings["answer_synonyms"]))
+    
+    def set_instructor_matrix(self, matrix):
+        # Instructors are thin views over their matrix row
+        self.instructors = {instructor_id: Instructor(instructor_id, matrix, row)
+                            for instructor_id, row in matrix.row_index.items()}
+        self.preferences.set_instructors(matrix)
+        self._bookings = None
+        self._changed("instructors", reset=True)
+        self._add_class_periods(matrix.class_columns, "instructors")
+    
+    def _add_class_periods(self, class_columns, field):
+        # Create classes if they don't exist; the candidate counts in field changed for the others
+        existing = list(self.classes)
+        added = []
+        for class_name in class_columns:
+            if class_name not in self.classes:
+                self.classes[class_name] = ClassPeriod(class_name)
+                self._period_index = None
+                added.append(class_name)
+        self._changed("classes", added=added, changed=existing, fields=(field,))
+    
+    @property
+    def period_index(self):
+        # Rebuilt lazily after the class periods change
+        if self._period_index is None:
+            self._period_index = IntervalIndex(self.classes)
+        return self._period_index
+    
+    def overlapping_periods(self, time_slot):
+        """Class periods colliding with a "Day start-end" string or TimeSlot."""
+        slot = parse_time_slot(time_slot) if isinstance(time_slot, str) else time_slot
+        if slot is None:
+            raise ValueError(f"Unrecognized time slot: {time_slot}")
+        return self.period_index.overlapping_slot(slot)
+    
+    def clear_students(self):
+        self.students = {}
+        self.preferences.set_students(None)
+        self._bookings = None
+        self._changed("students", reset=True)
+        self._changed("classes", changed=list(self.classes), fields=("students",))
+    
+    def clear_instructors(self):
+        self.instructors = {}
+        self.preferences.set_instructors(None)
+        self._bookings = None
+        self._changed("instructors", reset=True)
+        self._changed("classes", changed=list(self.classes), fields=("instructors",))
+    
+    def load_rooms(self, df):
+        self.rooms = read_rooms(df)
+        self._changed("rooms", reset=True)
+    
+    def clear_rooms(self):
+        self.rooms = []
+        self._changed("rooms", reset=True)
+    
+    def clear_classes(self):
+        # A schedule cannot outlive its class periods: repairs look every section's period up
+        self.classes = {}
+        self._period_index = None
+        self.schedule = []
+        self._bookings = None
+        self.search_report = None
+        self._changed("classes", reset=True)
+        self._changed("schedule", reset=True)
+    
+    def candidate_counts(self, class_name):
+        # Students who marked First Choice or Fits, and instructors not marked Does Not Fit
+        return (self.preferences.count_students(class_name),
+                len(self.preferences.instructors_for(class_name)))
+    
+    def is_ready(self, class_name):
+        student_count, instructor_count = self.candidate_counts(class_name)
+        return student_count >= self.settings["min_students_per_class"] and instructor_count > 0
+    
+    def generate(self, progress=None):
+        # Same inputs and settings as a recent run: reuse its schedule
+        key = ScheduleCache.key(self.fingerprint(), self.settings)
+        cached = self.schedule_cache.get(key)
+        self.schedule_cached = cached is not None
+        if cached is not None:
+            self.schedule = [scheduled.copy() for scheduled in cached.schedule]
+            self.search_report = cached.search_report
+            self._bookings = None
+            self._changed("schedule", reset=True)
+            return self.schedule
+        
+        # Run the selected scheduling algorithm; sections only open while rooms remain
+        schedule = run_solver(self.classes, self.preferences, self.settings, progress, self.rooms)
+        self.search_report = None
+        if self.settings["local_search_seconds"] > 0:
+            self.search_report = improve_schedule(schedule, self.classes, self.preferences, self.settings, progress)
+        if self.rooms:
+            if progress:
+                progress("Assigning rooms", 0, 0)
+            assign_rooms(schedule, self.classes, self.rooms, self.students)
+        self.schedule = schedule
+        self._bookings = None
+        self.schedule_cache.put(key, self.settings, schedule, self.summary(), self.search_report)
+        self._changed("schedule", reset=True)
+        return self.schedule
+    
+    def fingerprint(self):
+        return input_fingerprint(self.preferences, self.classes, self.rooms)
+    
+    def cached_schedules(self):
+        """Cached schedules for the current students, instructors, periods and rooms, oldest first."""
+        return self.schedule_cache.entries(self.fingerprint())
+    
+    @property
+    def bookings(self):
+        # Rebuilt lazily for each newly generated schedule
+        if self._bookings is None:
+            self._bookings = Bookings(self.schedule, self.classes)
+        return self._bookings
+    
+    # Incremental changes.  Each updates the imported data and repairs the
+    # current schedule in place (see ScheduleRepair), returning the class
+    # periods that changed.  Records are mappings with the same columns as
+    # the survey sheet; columns for unknown class periods are ignored.
+    
+    def add_student(self, record):
+        if str(record["ID"]) in self.students:
+            raise ValueError(f"Student {record['ID']} already exists")
+        return self.apply_student_changes(pd.DataFrame([record]))
+    
+    def update_student(self, record):
+        if str(record["ID"]) not in self.students:
+            raise KeyError(f"No student with ID {record['ID']}")
+        return self.apply_student_changes(pd.DataFrame([record]))
+    
+    def remove_student(self, student_id):
+        if student_id not in self.students:
+            raise KeyError(f"No student with ID {student_id}")
+        return self.apply_student_changes(removed=[student_id])
+    
+    def add_instructor(self, record):
+        if str(record["ID"]) in self.instructors:
+            raise ValueError(f"Instructor {record['ID']} already exists")
+        return self.apply_instructor_changes(pd.DataFrame([record]))
+    
+    def update_instructor(self, record):
+        if str(record["ID"]) not in self.instructors:
+            raise KeyError(f"No instructor with ID {record['ID']}")
+        return self.apply_instructor_changes(pd.DataFrame([record]))
+    
+    def remove_instructor(self, instructor_id):
+        if instructor_id not in self.instructors:
+            raise KeyError(f"No instructor with ID {instructor_id}")
+        return self.apply_instructor_changes(removed=[instructor_id])
+    
+    def reimport_students(self, matrix):
+        """Apply a newer export of the students sheet as a delta; returns a ReimportReport."""
+        return self._reimport(matrix, self.preferences.student_matrix,
+                              self.set_student_matrix, self.apply_student_changes)
+    
+    def reimport_instructors(self, matrix):
+        """Apply a newer export of the instructors sheet as a delta; returns a ReimportReport."""
+        return self._reimport(matrix, self.preferences.instructor_matrix,
+                              self.set_instructor_matrix, self.apply_instructor_changes)
+    
+    def _reimport(self, matrix, current, replace, apply_changes):
+        # A different set of class periods cannot be patched in; start over
+        if current is None or set(current.class_columns) != set(matrix.class_columns):
+            replace(matrix)
+            return ReimportReport(list(matrix.row_index), [], [], 0, [], True)
+        
+        added, removed, changed = diff_matrices(current, matrix)
+        rows = [matrix.row_index[person_id] for person_id in added + changed]
+        periods = apply_changes(matrix.take(rows) if rows else None, removed)
+        unchanged = len(matrix.row_index) - len(added) - len(changed)
+        return ReimportReport(added, removed, changed, unchanged, periods, False)
+    
+    def apply_student_changes(self, upserts=None, removed=()):
+        """Add or replace the students in upserts (a DataFrame or PreferenceMatrix), drop removed IDs, repair."""
+        if isinstance(upserts, pd.DataFrame):
+            upserts = PreferenceMatrix(upserts, synonyms=self.settings["answer_synonyms"])
+        matrix = self.preferences.student_matrix
+        if matrix is None:
+            if upserts is not None:
+                self.set_student_matrix(upserts)
+            return []
+        
+        repair = ScheduleRepair(self) if self.schedule else None
+        sections = list(self.schedule)
+        changed = list(upserts.row_index) if upserts is not None else []
+        periods = self._candidate_periods(matrix, list(removed) + changed, _wants_class)
+        added = [student_id for student_id in changed if student_id not in self.students]
+        for student_id in removed:
+            self.preferences.discard_student(student_id)
+            matrix.remove(student_id)
+            del self.students[student_id]
+            if repair:
+                repair.drop_student(student_id)
+        
+        if upserts is not None:
+            for student_id in changed:
+                if student_id in self.students:
+                    self.preferences.discard_student(student_id)
+            matrix.append(upserts)
+            for student_id in changed:
+                self.students[student_id] = Student(student_id, matrix, matrix.row_index[student_id])
+                self.preferences.add_student(student_id)
+                if repair:
+                    repair.student_changed(student_id)
+        
+        repaired = repair.finish() if repair else []
+        periods |= self._candidate_periods(matrix, changed, _wants_class)
+        self._changed("students", added=added,
+                      changed=[student_id for student_id in changed if student_id not in added],
+                      removed=list(removed))
+        self._changed("classes", changed=[class_name for class_name in self.classes if class_name in periods],
+                      fields=("students",))
+        self._schedule_repaired(sections, repaired)
+        return repaired
+    
+    def apply_instructor_changes(self, upserts=None, removed=()):
+        """Add or replace the instructors in upserts (a DataFrame or PreferenceMatrix), drop removed IDs, repair."""
+        if isinstance(upserts, pd.DataFrame):
+            upserts = PreferenceMatrix(upserts, synonyms=self.settings["answer_synonyms"])
+        matrix = self.preferences.instructor_matrix
+        if matrix is None:
+            if upserts is not None:
+                self.set_instructor_matrix(upserts)
+            return []
+        
+        repair = ScheduleRepair(self) if self.schedule else None
+        sections = list(self.schedule)
+        changed = list(upserts.row_index) if upserts is not None else []
+        periods = self._candidate_periods(matrix, list(removed) + changed, _available)
+        added = [instructor_id for instructor_id in changed if instructor_id not in self.instructors]
+        unpaired = []  # Partners left alone by the change, re-paired at the end
+        for instructor_id in removed:
+            self.preferences.discard_instructor(instructor_id)
+            self.preferences.class_limits.pop(instructor_id, None)
+            unpaired.append(self.preferences.unpair(instructor_id))
+            matrix.remove(instructor_id)
+            del self.instructors[instructor_id]
+            if repair:
+                repair.drop_instructor(instructor_id)
+        
+        if upserts is not None:
+            for instructor_id in changed:
+                if instructor_id in self.instructors:
+                    self.preferences.discard_instructor(instructor_id)
+                    unpaired.append(self.preferences.unpair(instructor_id))
+            matrix.append(upserts)
+            for instructor_id in changed:
+                self.instructors[instructor_id] = Instructor(instructor_id, matrix, matrix.row_index[instructor_id])
+                self.preferences.add_instructor(instructor_id)
+        
+        # Everyone else keeps their pairing; only the changed and the abandoned are matched
+        for instructor_id in changed + unpaired:
+            if instructor_id in self.instructors and instructor_id not in self.preferences.partners:
+                self.preferences.pair(instructor_id)
+        if repair:
+            for instructor_id in changed:
+                repair.instructor_changed(instructor_id)
+        
+        repaired = repair.finish() if repair else []
+        periods |= self._candidate_periods(matrix, changed, _available)
+        self._changed("instructors", added=added,
+                      changed=[instructor_id for instructor_id in changed if instructor_id not in added],
+                      removed=list(removed))
+        self._changed("classes", changed=[class_name for class_name in self.classes if class_name in periods],
+                      fields=("instructors",))
+        self._schedule_repaired(sections, repaired)
+        return repaired
+    
+    def _candidate_periods(self, matrix, person_ids, counted):
+        # Class periods whose candidate counts include these people, as the matrix has them now
+        rows = [matrix.row_index[person_id] for person_id in person_ids if person_id in matrix.row_index]
+        if not rows:
+            return set()
+        return {matrix.class_columns[j] for j in np.flatnonzero(counted(matrix.codes[rows]).any(axis=0))}
+    
+    def _schedule_repaired(self, sections, periods):
+        # sections is the schedule before a repair, periods the class periods it changed
+        if not periods:
+            return
+        before = set(sections)
+        after = set(self.schedule)
+        periods = set(periods)
+        self._changed("schedule", added=[scheduled for scheduled in self.schedule if scheduled not in before],
+                      changed=[scheduled for scheduled in self.schedule
+                               if scheduled in before and scheduled.class_name in periods],
+                      removed=[scheduled for scheduled in sections if scheduled not in after])
+    
+    def sweep(self, ranges, max_workers=None, progress=None):
+        return sweep_settings(self.classes, self.preferences, self.settings, ranges, max_workers, progress, self.rooms)
+    
+    def summary(self):
+        return summarize_schedule(self.schedule, self.preferences)
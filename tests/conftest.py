@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from generate_surveys import class_periods, make_instructors, make_students  # noqa: E402
+from scheduler_core import Scheduler  # noqa: E402
+
+
+@pytest.fixture
+def surveys():
+    """Small synthetic student and instructor sheets, the same on every run."""
+    periods = class_periods(25)
+    return make_students(300, periods, seed=7), make_instructors(20, periods, seed=7)
+
+
+@pytest.fixture
+def make_scheduler(surveys):
+    """Build a Scheduler with the surveys loaded and the given settings."""
+    def make(**settings):
+        scheduler = Scheduler(settings)
+        scheduler.load_students(surveys[0])
+        scheduler.load_instructors(surveys[1])
+        return scheduler
+    return make
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from scheduler_core import (BLANK, DOES_NOT_FIT, FIRST_CHOICE, FITS, OTHER, SMALL_FRAME_ROWS, PreferenceMatrix,
+                            Scheduler, answer_codes, normalize_answer, parse_answer_synonyms)
+
+PERIOD = "Monday 9:00am-10:00am"
+
+ANSWERS = [("First Choice", FIRST_CHOICE), ("  first   CHOICE ", FIRST_CHOICE), ("1st Choice", FIRST_CHOICE),
+           ("fits", FITS), ("It Fits", FITS), ("Does Not Fit", DOES_NOT_FIT), ("Doesn’t fit", DOES_NOT_FIT),
+           ("doesnt fit", DOES_NOT_FIT), (None, BLANK), ("", BLANK), ("Maybe", OTHER)]
+
+
+def survey(answers, copies=1):
+    answers = answers * copies
+    return pd.DataFrame({"ID": range(len(answers)), "Name": "x", PERIOD: answers})
+
+
+def test_normalize_answer():
+    assert normalize_answer("  Doesn’t   FIT ") == "doesn't fit"
+    assert answer_codes()["1st choice"] == FIRST_CHOICE
+    assert answer_codes({"Available": "Fits"})["available"] == FITS
+    with pytest.raises(ValueError):
+        answer_codes({"Available": "Sometimes"})
+
+
+@pytest.mark.parametrize("copies", [1, SMALL_FRAME_ROWS])  # Row by row and vectorized encoding
+def test_spellings_encode_alike(copies):
+    matrix = PreferenceMatrix(survey([answer for answer, _ in ANSWERS], copies))
+    assert list(matrix.codes[:, matrix.column_index[PERIOD]]) == [code for _, code in ANSWERS] * copies
+    # Unknown answers are kept verbatim and reported
+    assert set(matrix.other_values.values()) == {"Maybe"}
+    assert matrix.unrecognized_answers() == {"Maybe": copies}
+    assert "Maybe" in matrix.describe_unrecognized()
+
+
+def test_parse_answer_synonyms():
+    assert parse_answer_synonyms("Available = fits; Preferred=FIRST CHOICE;") == {
+        "Available": "Fits", "Preferred": "First Choice"}
+    for text in ["Available", "Available=Sometimes", "=Fits"]:
+        with pytest.raises(ValueError):
+            parse_answer_synonyms(text)
+
+
+def test_synonyms_setting_applies_at_import():
+    scheduler = Scheduler({"answer_synonyms": parse_answer_synonyms("Available=Fits; Busy=Does Not Fit")})
+    scheduler.load_students(survey(["available", "Busy", "Maybe"]))
+    matrix = scheduler.preferences.student_matrix
+    assert list(matrix.codes[:, matrix.column_index[PERIOD]]) == [FITS, DOES_NOT_FIT, OTHER]
@@ -0,0 +1,27 @@
+import pytest
+
+from scheduler_core import DEFAULT_SETTINGS, OBJECTIVE_WEIGHTS, LocalSearch, Scheduler, run_solver
+
+
+def test_running_score_matches_full_score(make_scheduler):
+    scheduler = make_scheduler()
+    schedule = run_solver(scheduler.classes, scheduler.preferences, scheduler.settings)
+    search = LocalSearch(schedule, scheduler.classes, scheduler.preferences, scheduler.settings, seed=3)
+    
+    report = search.run(0.5)
+    assert report.accepted > 0
+    assert report.after >= report.before
+    assert report.after == pytest.approx(search.score())
+
+
+def test_weights_are_not_shared():
+    first = Scheduler()
+    first.settings["objective_weights"]["load_balance"] = 0
+    assert OBJECTIVE_WEIGHTS["load_balance"] == 0.5
+    assert DEFAULT_SETTINGS["objective_weights"] == OBJECTIVE_WEIGHTS
+    assert Scheduler().settings["objective_weights"]["load_balance"] == 0.5
+    
+    weights = {"first_choice": 3.0}
+    second = Scheduler({"objective_weights": weights})
+    second.settings["objective_weights"]["first_choice"] = 0
+    assert weights == {"first_choice": 3.0}
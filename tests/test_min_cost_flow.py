@@ -0,0 +1,48 @@
+import itertools
+import random
+
+import pytest
+
+from scheduler_core import MinCostFlow
+
+
+def brute_force(costs):
+    # Largest assignment of rows to distinct columns (None marks a missing edge), then cheapest
+    rows, columns = len(costs), len(costs[0])
+    best = (0, 0)
+    for picks in itertools.product(range(-1, columns), repeat=rows):
+        taken = [j for j in picks if j >= 0]
+        if len(set(taken)) < len(taken) or any(costs[i][j] is None for i, j in enumerate(picks) if j >= 0):
+            continue
+        total = sum(costs[i][j] for i, j in enumerate(picks) if j >= 0)
+        best = min(best, (-len(taken), total))
+    return -best[0], best[1]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_assignment_matches_brute_force(seed):
+    rng = random.Random(seed)
+    rows, columns = rng.randint(1, 5), rng.randint(1, 5)
+    costs = [[rng.randint(0, 9) if rng.random() < 0.7 else None for _ in range(columns)] for _ in range(rows)]
+    
+    source, sink = rows + columns, rows + columns + 1
+    flow = MinCostFlow(rows + columns + 2)
+    for i in range(rows):
+        flow.add_edge(source, i, 1, 0)
+        for j in range(columns):
+            if costs[i][j] is not None:
+                flow.add_edge(i, rows + j, 1, costs[i][j])
+    for j in range(columns):
+        flow.add_edge(rows + j, sink, 1, 0)
+    
+    assert flow.solve(source, sink) == brute_force(costs)
+
+
+def test_flow_reports_edge_use():
+    flow = MinCostFlow(4)
+    cheap = flow.add_edge(0, 1, 2, 1)
+    dear = flow.add_edge(0, 2, 2, 5)
+    flow.add_edge(1, 3, 2, 0)
+    flow.add_edge(2, 3, 2, 0)
+    assert flow.solve(0, 3) == (4, 12)
+    assert (flow.flow(cheap), flow.flow(dear)) == (2, 2)
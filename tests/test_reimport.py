@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scheduler_core import SMALL_FRAME_ROWS, PreferenceMatrix, Scheduler, diff_matrices, row_hashes
+
+
+def edited(df):
+    # The first three people removed, two answers changed and two people added
+    df = df.copy()
+    class_name = df.columns[3]
+    df.loc[5, class_name] = "Fits" if df.loc[5, class_name] == "First Choice" else "First Choice"
+    df.loc[7, "Name"] = "Renamed"
+    added = df.iloc[:2].copy()
+    added["ID"] = [900000, 900001]
+    return pd.concat([df.iloc[3:], added], ignore_index=True)
+
+
+@pytest.mark.parametrize("rows", [SMALL_FRAME_ROWS // 2, SMALL_FRAME_ROWS * 3])
+def test_diff_matrices(surveys, rows):
+    old_df = surveys[0].head(rows)
+    added, removed, changed = diff_matrices(PreferenceMatrix(old_df), PreferenceMatrix(edited(old_df)))
+    ids = [str(person_id) for person_id in old_df["ID"]]
+    assert added == ["900000", "900001"]
+    assert removed == ids[:3]
+    assert changed == [ids[5], ids[7]]
+
+
+def test_small_matrices_hash_like_large_ones(surveys):
+    df = surveys[0].head(SMALL_FRAME_ROWS // 2)
+    matrix = PreferenceMatrix(df.head(10))
+    matrix.append(PreferenceMatrix(df.iloc[10:]))
+    rows = [matrix.row_index[str(person_id)] for person_id in df["ID"]]
+    assert np.array_equal(matrix.row_hashes[rows], row_hashes(df))
+
+
+def snapshot(scheduler):
+    students = {student_id: dict(student.data) for student_id, student in scheduler.students.items()}
+    counts = {class_name: scheduler.candidate_counts(class_name) for class_name in scheduler.classes}
+    return students, counts
+
+
+def test_reimport_matches_a_fresh_import(make_scheduler, surveys):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    new_df = edited(surveys[0])
+    
+    report = scheduler.reimport_students(PreferenceMatrix(new_df))
+    assert not report.full
+    assert (len(report.added), len(report.removed), len(report.changed)) == (2, 3, 2)
+    assert report.unchanged == len(new_df) - 4
+    
+    fresh = Scheduler()
+    fresh.load_students(new_df)
+    fresh.load_instructors(surveys[1])
+    assert snapshot(scheduler) == snapshot(fresh)
+    placed = {student_id for scheduled in scheduler.schedule for student_id in scheduled.student_ids}
+    assert placed <= set(scheduler.students)
+
+
+def test_new_class_periods_replace_everything(make_scheduler, surveys):
+    scheduler = make_scheduler()
+    report = scheduler.reimport_students(PreferenceMatrix(surveys[0].drop(columns=surveys[0].columns[3])))
+    assert report.full
+    assert len(scheduler.students) == len(surveys[0])
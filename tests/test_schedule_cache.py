@@ -0,0 +1,81 @@
+from scheduler_core import ScheduleCache, ScheduledClass, compare_schedules
+
+
+def test_compare_cached_schedules(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    scheduler.settings["solver"] = "Optimal"
+    scheduler.generate()
+    first, second = scheduler.cached_schedules()
+    
+    comparison = compare_schedules(first, second)
+    assert comparison.loc["Placements", "First"] == first.summary["Placements"]
+    assert comparison.loc["Placements", "Change"] == second.summary["Placements"] - first.summary["Placements"]
+    assert list(comparison.loc["solver", ["First", "Second"]]) == ["Greedy", "Optimal"]
+    assert "max_students_per_class" not in comparison.index
+    
+    def placements(entry):
+        return {(scheduled.class_name, student_id) for scheduled in entry.schedule
+                for student_id in scheduled.student_ids}
+    assert comparison.loc["Placements Only in First", "First"] == len(placements(first) - placements(second))
+    assert comparison.loc["Placements Only in Second", "Second"] == len(placements(second) - placements(first))
+    
+    # Comparing reads the cache only
+    assert compare_schedules(first, first).loc["Placements Only in First", "First"] == 0
+    assert scheduler.schedule_cache.hits == 0
+
+
+def rows(schedule):
+    return [(scheduled.class_name, scheduled.instructor_ids, scheduled.student_ids) for scheduled in schedule]
+
+
+def test_same_inputs_and_settings_reuse_the_schedule(make_scheduler):
+    scheduler = make_scheduler()
+    first = rows(scheduler.generate())
+    assert not scheduler.schedule_cached
+    
+    assert rows(scheduler.generate()) == first
+    assert scheduler.schedule_cached
+    assert (scheduler.schedule_cache.hits, scheduler.schedule_cache.misses) == (1, 1)
+
+
+def test_changed_settings_or_data_miss(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    
+    scheduler.settings["max_students_per_class"] = 12
+    scheduler.generate()
+    assert not scheduler.schedule_cached
+    
+    # Editing one answer changes the fingerprint
+    student_id = next(iter(scheduler.students))
+    record = dict(scheduler.students[student_id].data)
+    class_name = scheduler.preferences.student_matrix.class_columns[0]
+    record[class_name] = "Does Not Fit" if record[class_name] == "First Choice" else "First Choice"
+    scheduler.update_student(record)
+    scheduler.generate()
+    assert not scheduler.schedule_cached
+    assert scheduler.schedule_cache.misses == 3
+    assert len(scheduler.cached_schedules()) == 1
+
+
+def test_repairs_do_not_reach_the_cache(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    cached = rows(scheduler.cached_schedules()[0].schedule)
+    scheduler.schedule[0].room = "Hall"
+    scheduler.schedule[0].student_ids.pop()
+    assert rows(scheduler.cached_schedules()[0].schedule) == cached
+    assert scheduler.cached_schedules()[0].schedule[0].room == "TBD"
+
+
+def test_least_recently_used_entry_is_dropped():
+    cache = ScheduleCache(max_entries=2)
+    schedule = [ScheduledClass("Monday 9:00am-10:00am", ["T1"], ["S1"])]
+    for name in ["a", "b"]:
+        cache.put(ScheduleCache.key(name, {}), {}, schedule, {})
+    assert cache.get(ScheduleCache.key("a", {})) is not None
+    cache.put(ScheduleCache.key("c", {}), {}, schedule, {})
+    assert cache.get(ScheduleCache.key("b", {})) is None
+    assert len(cache) == 2
+    assert len(cache.entries("a")) == 1
@@ -0,0 +1,54 @@
+def placements(scheduler):
+    # student_id -> the sections they are seated in
+    seated = {}
+    for scheduled in scheduler.schedule:
+        for student_id in scheduled.student_ids:
+            seated.setdefault(student_id, set()).add(id(scheduled))
+    return seated
+
+
+def test_removing_a_student_keeps_everyone_else(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    before = placements(scheduler)
+    student_id = next(iter(before))
+    
+    periods = scheduler.remove_student(student_id)
+    after = placements(scheduler)
+    assert student_id not in after
+    assert set(periods) <= {scheduled.class_name for scheduled in scheduler.schedule}
+    for other_id, sections in before.items():
+        if other_id != student_id:
+            assert sections <= after[other_id]
+
+
+def test_updating_a_student_only_moves_them(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    before = placements(scheduler)
+    student_id = next(iter(before))
+    
+    record = dict(scheduler.students[student_id].data)
+    for class_name in scheduler.preferences.student_matrix.class_columns:
+        record[class_name] = "Does Not Fit"
+    scheduler.update_student(record)
+    after = placements(scheduler)
+    assert student_id not in after
+    for other_id, sections in before.items():
+        if other_id != student_id:
+            assert sections <= after[other_id]
+
+
+def test_changes_after_clearing_classes(make_scheduler, surveys):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    student_id = scheduler.schedule[0].student_ids[0]
+    
+    scheduler.clear_classes()
+    assert scheduler.schedule == []
+    assert scheduler.remove_student(student_id) == []
+    
+    # Reloading brings the periods back, ready to schedule again
+    scheduler.load_students(surveys[0])
+    assert scheduler.classes
+    assert scheduler.generate()
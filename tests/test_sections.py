@@ -0,0 +1,18 @@
+from collections import Counter
+
+
+def test_periods_are_not_split_by_default(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.generate()
+    assert all(scheduled.section is None for scheduled in scheduler.schedule)
+    assert len({scheduled.class_name for scheduled in scheduler.schedule}) == len(scheduler.schedule)
+
+
+def test_split_sections_opens_parallel_sections(make_scheduler):
+    scheduler = make_scheduler(split_sections=True, max_students_per_class=8, max_classes_per_instructor=4)
+    scheduler.generate()
+    sections = Counter(scheduled.class_name for scheduled in scheduler.schedule)
+    assert max(sections.values()) > 1
+    for scheduled in scheduler.schedule:
+        assert (scheduled.section is None) == (sections[scheduled.class_name] == 1)
+        assert len(scheduled.student_ids) <= 8
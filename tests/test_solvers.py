@@ -0,0 +1,59 @@
+import itertools
+
+import pytest
+
+from scheduler_core import ClassPeriod, conflict_groups
+
+
+def clashes(scheduler, attribute):
+    # Pairs of overlapping periods booked for the same person
+    booked = {}
+    for scheduled in scheduler.schedule:
+        for person_id in getattr(scheduled, attribute):
+            booked.setdefault(person_id, []).append(scheduler.classes[scheduled.class_name].slot)
+    return [(person_id, first, second) for person_id, slots in booked.items()
+            for first, second in itertools.combinations(slots, 2) if first.overlaps(second)]
+
+
+@pytest.mark.parametrize("partition", [False, True])
+@pytest.mark.parametrize("solver", ["Greedy", "Optimal"])
+def test_instructors_teach_one_class_at_a_time(make_scheduler, solver, partition):
+    scheduler = make_scheduler(solver=solver, partition_by_building=partition, max_classes_per_instructor=4)
+    scheduler.generate()
+    assert scheduler.schedule
+    assert clashes(scheduler, "instructor_ids") == []
+
+
+@pytest.mark.parametrize("solver", ["Greedy", "Optimal"])
+def test_limits_are_kept(make_scheduler, solver):
+    scheduler = make_scheduler(solver=solver, max_classes_per_instructor=3)
+    scheduler.generate()
+    settings = scheduler.settings
+    loads = {}
+    for scheduled in scheduler.schedule:
+        assert len(scheduled.student_ids) <= settings["max_students_per_class"]
+        assert 0 < len(scheduled.instructor_ids) <= settings["max_instructors_per_class"]
+        for instructor_id in scheduled.instructor_ids:
+            loads[instructor_id] = loads.get(instructor_id, 0) + 1
+    assert max(loads.values()) <= 3
+
+
+@pytest.mark.parametrize("partition", [False, True])
+@pytest.mark.parametrize("solver", ["Greedy", "Optimal"])
+def test_students_take_one_class_at_a_time(make_scheduler, solver, partition):
+    scheduler = make_scheduler(solver=solver, partition_by_building=partition, max_classes_per_student=3)
+    scheduler.generate()
+    per_student = {}
+    for scheduled in scheduler.schedule:
+        for student_id in scheduled.student_ids:
+            per_student[student_id] = per_student.get(student_id, 0) + 1
+    assert max(per_student.values()) > 1
+    assert max(per_student.values()) <= 3
+    assert clashes(scheduler, "student_ids") == []
+
+
+def test_conflict_groups_join_overlapping_periods():
+    names = ["Monday 9:00am-10:00am", "Monday 9:30am-11:00am", "Monday 10:30am-11:30am",
+             "Monday 1:00pm-2:00pm", "Tuesday 9:00am-10:00am"]
+    classes = {name: ClassPeriod(name) for name in names}
+    assert conflict_groups(names, classes) == [names[:3], names[3:4], names[4:]]
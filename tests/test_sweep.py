@@ -0,0 +1,14 @@
+def test_greedy_keeps_the_current_first_choice_setting(make_scheduler):
+    scheduler = make_scheduler(solver="Greedy")
+    results = scheduler.sweep({"max_students_per_class": [10, 20], "prioritize_first_choice": [True, False]},
+                              max_workers=1)
+    assert list(results["max_students_per_class"]) == [10, 20]
+    assert list(results["prioritize_first_choice"]) == [True, True]
+
+
+def test_optimal_sweeps_the_first_choice_setting(make_scheduler):
+    scheduler = make_scheduler(solver="Optimal")
+    results = scheduler.sweep({"max_students_per_class": [10, 20], "prioritize_first_choice": [True, False]},
+                              max_workers=1)
+    assert len(results) == 4
+    assert set(results["prioritize_first_choice"]) == {True, False}
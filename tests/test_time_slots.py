@@ -0,0 +1,58 @@
+import pytest
+
+from scheduler_core import ClassPeriod, IntervalIndex, Scheduler, TimeSlot, parse_time_slot
+
+
+@pytest.mark.parametrize("header, slot", [
+    ("Monday 1:00pm-3:00pm", (0, 13 * 60, 15 * 60)),
+    ("Monday 1PM-3PM", (0, 13 * 60, 15 * 60)),
+    ("monday 1:00 pm - 3:00 pm", (0, 13 * 60, 15 * 60)),
+    ("Tuesday 13:00-15:00", (1, 13 * 60, 15 * 60)),
+    ("Wednesday 1-3pm", (2, 13 * 60, 15 * 60)),
+    ("Thursday 11-1pm", (3, 11 * 60, 13 * 60)),
+    ("Friday 9.30am to 10.45am", (4, 9 * 60 + 30, 10 * 60 + 45)),
+    ("Monday Art 1:00pm-3:00pm", (0, 13 * 60, 15 * 60)),
+    ("Monday - Art 1:00pm-3:00pm", (0, 13 * 60, 15 * 60)),
+    ("Saturday 11pm-1am", (5, 23 * 60, 25 * 60)),
+])
+def test_parse_time_slot(header, slot):
+    assert parse_time_slot(header) == TimeSlot(*slot)
+
+
+@pytest.mark.parametrize("header", ["Art 1:00pm-3:00pm", "Someday 1:00pm-3:00pm", "Monday", "Monday 25:00-26:00",
+                                    "Building"])
+def test_unreadable_headers(header):
+    assert parse_time_slot(header) is None
+
+
+def test_equal_slots_are_shared():
+    assert parse_time_slot("Monday 1PM-3PM") is parse_time_slot("Monday 1:00pm-3:00pm")
+
+
+def test_overlaps_are_half_open():
+    nine = parse_time_slot("Monday 9:00am-10:00am")
+    assert nine.overlaps(parse_time_slot("Monday 9:30am-10:30am"))
+    assert not nine.overlaps(parse_time_slot("Monday 10:00am-11:00am"))
+    assert not nine.overlaps(parse_time_slot("Tuesday 9:00am-10:00am"))
+
+
+def test_interval_index_matches_pairwise_overlaps():
+    names = ["Monday 9:00am-10:00am", "Monday 9:30am-12:00pm", "Monday 11:00am-11:30am", "Monday 1:00pm-2:00pm",
+             "Tuesday 9:00am-10:00am", "Sunday 11pm-1am", "Monday TBD"]
+    classes = {name: ClassPeriod(name) for name in names}
+    index = IntervalIndex(classes)
+    for name in names:
+        slot = classes[name].slot
+        if slot is None:
+            continue
+        expected = [other for other in names if classes[other].slot and classes[other].slot.overlaps(slot)]
+        assert sorted(index.overlapping_slot(slot)) == sorted(expected)
+    assert index.overlapping(0, 9 * 60) == []
+
+
+def test_overlapping_periods(surveys):
+    scheduler = Scheduler()
+    scheduler.load_students(surveys[0])
+    assert scheduler.overlapping_periods("Monday 8:15am-8:45am") == ["Monday 8:00am-9:00am", "Monday 8:30am-9:30am"]
+    with pytest.raises(ValueError):
+        scheduler.overlapping_periods("whenever")